@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+"""
+Offline benchmarks for libgreader, run one with `python -m benchmarks.<name>`
+"""
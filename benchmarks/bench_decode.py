@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+"""
+Decoding a stream/contents page: requests' text (charset detection when the
+response has no charset) then json.loads, against handing the bytes to the
+StdlibDecoder and OrjsonDecoder.
+
+    python -m benchmarks.bench_decode [items] [repeat]
+"""
+
+import json
+import sys
+import time
+
+import requests
+
+from libgreader.decoders import StdlibDecoder, OrjsonDecoder, has_orjson
+
+from .payloads import items as makeItems, streamContents
+
+def page(count):
+    records = makeItems(count)
+    for number, record in enumerate(records):
+        record['title'] = u'Élément numéro %d, “quoted”' % number
+    return json.dumps(streamContents(records), ensure_ascii=False).encode('utf-8')
+
+def viaText(body):
+    response = requests.Response()
+    response._content = body
+    response.status_code = 200
+    return json.loads(response.text, strict=False)
+
+def best(decode, body, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        decode(body)
+        times.append(time.time() - start)
+    return min(times)
+
+def main(count=1000, repeat=5):
+    body = page(count)
+    print("%d items, %.1f MB" % (count, len(body) / 1048576.0))
+    print("%-32s %10s %10s" % ('', 'time (s)', 'speedup'))
+    reference = best(viaText, body, repeat)
+    print("%-32s %10.4f %10s" % ('response.text + json.loads', reference, '1.0x'))
+    decoders = [('StdlibDecoder (bytes)', StdlibDecoder())]
+    if has_orjson:
+        decoders.append(('OrjsonDecoder (bytes)', OrjsonDecoder()))
+    for name, decoder in decoders:
+        elapsed = best(decoder.loads, body, repeat)
+        print("%-32s %10.4f %9.1fx" % (name, elapsed, reference / elapsed))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory and construction time of 100k Items, against the eager, __dict__
+based Item that libgreader used up to 0.8.
+
+    python -m benchmarks.bench_items [count]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from libgreader import GoogleReader, AuthenticationMethod, SpecialFeed, Item, ReaderUrl
+
+from .payloads import USER_ID, items as makeItems
+
+class EagerItem(object):
+    """
+    Item as it was before fields were decoded lazily.
+    """
+    def __init__(self, googleReader, item, parent):
+        self.googleReader = googleReader
+        self.parent = parent
+
+        self.data   = item
+        self.id     = item['id']
+        self.title  = item.get('title', '(no title)')
+        self.author = item.get('author', None)
+        self.content = item.get('content', item.get('summary', {})).get('content', '')
+        self.origin  = { 'title': '', 'url': ''}
+        if 'crawlTimeMsec' in item:
+            self.time = int(item['crawlTimeMsec']) // 1000
+        else:
+            self.time = None
+
+        self.url    = None
+        for alternate in item.get('alternate', []):
+            if alternate.get('type', '') == 'text/html':
+                self.url = alternate['href']
+                break
+
+        self.read    = False
+        self.starred = False
+        self.shared  = False
+        for category in item.get('categories', []):
+            if category.endswith('/state/com.google/read'):
+                self.read = True
+            elif category.endswith('/state/com.google/starred'):
+                self.starred = True
+            elif category in ('user/-/state/com.google/broadcast',
+                              'user/%s/state/com.google/broadcast' % self.googleReader.userId):
+                self.shared = True
+
+        self.canUnread = item.get('isReadStateLocked', 'false') != 'true'
+
+        f = item['origin']
+        self.origin = {
+            'title': f.get('title', ''),
+            'url': f.get('htmlUrl', ''),
+        }
+        self.feed = self.googleReader.getFeed(f['streamId'])
+
+        self.parent._addItem(self)
+
+def build(cls, reader, items, touch):
+    container = SpecialFeed(reader, ReaderUrl.READING_LIST)
+    start = time.time()
+    for item in items:
+        cls(reader, item, container)
+    built = time.time() - start
+    if touch:
+        for item in container.items:
+            (item.title, item.content, item.url, item.read, item.starred, item.origin)
+    return container, built, time.time() - start
+
+def measure(cls, reader, items, touch):
+    gc.collect()
+    container, built, elapsed = build(cls, reader, items, touch)
+    del container
+    gc.collect()
+    tracemalloc.start()
+    container = build(cls, reader, items, touch)[0]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, elapsed, memory
+
+def main(count=100000):
+    reader = GoogleReader(AuthenticationMethod())
+    reader.userId = USER_ID
+    items = makeItems(count)
+    print("%d items" % count)
+    print("%-28s %12s %12s %12s" % ('', 'build (s)', 'build+read', 'memory (MB)'))
+    for name, cls, touch in (('eager Item', EagerItem, False),
+                             ('lazy Item', Item, False),
+                             ('lazy Item, fields read', Item, True)):
+        built, elapsed, memory = measure(cls, reader, items, touch)
+        print("%-28s %12.3f %12.3f %12.1f" % (name, built, elapsed, memory / 1048576.0))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
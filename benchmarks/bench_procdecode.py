@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""
+Backfill of many large stream/contents pages: decoding and building Items
+in this process, against decoding in worker processes
+(GoogleReader.enableProcessDecoding) with pages fetched by several threads.
+
+Also reports the parent's share of the work per page, unpickling the
+compact records and building Items, which bounds the speedup however many
+cores there are.
+
+    python -m benchmarks.bench_procdecode [pages] [items per page] [processes]
+"""
+
+import json
+import multiprocessing
+import pickle
+import sys
+import time
+
+from libgreader import GoogleReader, SpecialFeed, ReaderUrl
+from libgreader.procdecode import decodePage, materialize
+
+from .payloads import USER_ID, CannedAuthMethod, items as makeItems, streamContents
+
+def page(count):
+    return json.dumps(streamContents(makeItems(count))).encode('utf-8')
+
+def backfill(reader, pages, workers):
+    containers = [SpecialFeed(reader, ReaderUrl.READING_LIST) for i in range(pages)]
+    start = time.time()
+    results = reader.loadItemsForContainers(containers, max_workers=workers, loadLimit=1000)
+    elapsed = time.time() - start
+    assert all(result.ok for result in results)
+    for container in containers:
+        for item in container.getItems():
+            item.title, item.read
+    return elapsed
+
+def main(pages=16, count=2000, processes=None):
+    processes = processes or multiprocessing.cpu_count()
+    body = page(count)
+    auth = CannedAuthMethod({})
+    auth.getBytes = lambda url, parameters=None: body
+    print("%d pages of %d items, %.1f MB each, %d processes" % (pages, count, len(body) / 1048576.0, processes))
+
+    reader = GoogleReader(auth)
+    reader.userId = USER_ID
+    inline = backfill(reader, pages, processes)
+    print("%-28s %8.3fs" % ('decoded in process', inline))
+
+    reader.enableProcessDecoding(processes, minBytes=0)
+    backfill(reader, 1, 1) # start the workers
+    pooled = backfill(reader, pages, processes)
+    reader.close()
+    print("%-28s %8.3fs %6.2fx" % ('decoded by workers', pooled, inline / pooled))
+
+    start = time.time()
+    decoded = decodePage(body)
+    worker = time.time() - start
+    pickled = pickle.dumps(decoded, pickle.HIGHEST_PROTOCOL)
+    start = time.time()
+    data = materialize(*pickle.loads(pickled))
+    reader = GoogleReader(auth)
+    reader.userId = USER_ID
+    reader.itemsToObjects(SpecialFeed(reader, ReaderUrl.READING_LIST), data['items'])
+    parent = time.time() - start
+    print("per page: worker %.4fs, parent %.4fs (%.0f%%)" % (worker, parent, 100 * parent / (worker + parent)))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
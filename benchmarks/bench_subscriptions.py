@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+Scaling of buildSubscriptionList with the size of the account, from
+synthetic subscription/list and unread-count payloads.
+
+    python -m benchmarks.bench_subscriptions [feeds] [labels]
+"""
+
+import sys
+import time
+
+from libgreader import GoogleReader, ReaderUrl
+
+from .payloads import CannedAuthMethod, subscriptionList, unreadCounts
+
+def buildTime(feeds, labels):
+    auth = CannedAuthMethod({
+        ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList(feeds, labels),
+        ReaderUrl.UNREAD_COUNT_URL: unreadCounts(feeds, labels),
+    })
+    reader = GoogleReader(auth)
+    reader.makeSpecialFeeds()
+    start = time.time()
+    reader.buildSubscriptionList()
+    return time.time() - start
+
+def main(feeds=50000, labels=500):
+    print("%8s %8s %12s %14s" % ('feeds', 'labels', 'build (s)', 'us per feed'))
+    for size in (feeds // 8, feeds // 4, feeds // 2, feeds):
+        elapsed = buildTime(size, labels)
+        print("%8d %8d %12.3f %14.1f" % (size, labels, elapsed, elapsed * 1e6 / size))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
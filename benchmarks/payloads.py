@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic Reader API payloads of configurable size, and an auth method
+serving them so benchmarks never touch the network.
+"""
+
+import json
+
+from libgreader import AuthenticationMethod, ReaderUrl
+
+USER_ID = '01234567890'
+
+def feedId(number):
+    return 'feed/http://example.com/%d/rss' % number
+
+def labelId(number):
+    return 'user/%s/label/label %d' % (USER_ID, number)
+
+def userInfo():
+    return {'userId': USER_ID, 'userName': 'Bench', 'signupTimeSec': 0}
+
+def subscriptionList(feeds, labels=500, labelsPerFeed=2):
+    """
+    feeds subscriptions, each in labelsPerFeed of labels labels
+    """
+    subscriptions = []
+    for number in range(feeds):
+        subscriptions.append({
+            'id': feedId(number),
+            'title': 'Feed %d' % number,
+            'htmlUrl': 'http://example.com/%d/' % number,
+            'firstitemmsec': '1300000000000',
+            'sortid': '%08X' % number,
+            'categories': [{'id': labelId((number + i) % labels),
+                            'label': 'label %d' % ((number + i) % labels)}
+                           for i in range(min(labelsPerFeed, labels))],
+        })
+    return {'subscriptions': subscriptions}
+
+def unreadCounts(feeds, labels=500):
+    counts = []
+    for number in range(feeds):
+        counts.append({'id': feedId(number), 'count': number % 50,
+                       'newestItemTimestampUsec': '1360000000000000'})
+    for number in range(labels):
+        counts.append({'id': labelId(number), 'count': 100,
+                       'newestItemTimestampUsec': '1360000000000000'})
+    for type in ReaderUrl.SPECIAL_FEEDS:
+        counts.append({'id': 'user/%s/state/com.google/%s' % (USER_ID, type), 'count': 1000,
+                       'newestItemTimestampUsec': '1360000000000000'})
+    return {'max': 1000, 'unreadcounts': counts}
+
+def items(count, feeds=500):
+    items = []
+    for i in range(count):
+        items.append({
+            'id': 'tag:google.com,2005:reader/item/%016x' % i,
+            'title': 'Item number %d' % i,
+            'author': 'Author %d' % (i % 100),
+            'crawlTimeMsec': str(1360000000000 + i),
+            'categories': ['user/%s/state/com.google/reading-list' % USER_ID,
+                           'user/%s/state/com.google/fresh' % USER_ID] +
+                          (['user/%s/state/com.google/read' % USER_ID] if i % 3 else []),
+            'alternate': [{'href': 'http://example.com/%d' % i, 'type': 'text/html'}],
+            'summary': {'direction': 'ltr', 'content': '<p>Summary of item %d</p>' % i},
+            'origin': {'streamId': feedId(i % feeds), 'title': 'Feed %d' % (i % feeds),
+                       'htmlUrl': 'http://example.com/%d/' % (i % feeds)},
+        })
+    return items
+
+def streamContents(items, continuation=None):
+    data = {'id': 'user/%s/state/com.google/reading-list' % USER_ID,
+            'updated': 1360000000, 'items': items}
+    if continuation:
+        data['continuation'] = continuation
+    return data
+
+class CannedAuthMethod(AuthenticationMethod):
+    """
+    Serves pre-encoded JSON bodies by url, whatever the parameters.
+    """
+    def __init__(self, responses):
+        super(CannedAuthMethod, self).__init__()
+        self.username  = 'bench'
+        self.responses = {ReaderUrl.USER_INFO_URL: json.dumps(userInfo())}
+        for url, response in responses.items():
+            if not isinstance(response, str):
+                response = json.dumps(response)
+            self.responses[url] = response
+
+    def get(self, url, parameters=None):
+        return self.responses[url]
+
+    def getBytes(self, url, parameters=None):
+        # a real auth method hands over the body it received, not a re-encoding
+        response = self.responses[url]
+        if not isinstance(response, bytes):
+            response = self.responses[url] = response.encode('utf-8')
+        return response
+
+    def post(self, url, postParameters=None, urlParameters=None):
+        return 'OK'
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+"""
+Offline benchmark suite for the parse and object-construction hot paths,
+with baselines kept in benchmarks/baselines.json so regressions show up in
+review.
+
+    python -m benchmarks.suite                 run and compare to the baselines
+    python -m benchmarks.suite --save          run and record new baselines
+    python -m benchmarks.suite --scale 0.1     smaller payloads
+    python -m benchmarks.suite items loaded    only some cases
+
+Exits with status 1 when a case is slower, or peaks higher in memory, than
+its baseline by more than --tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from libgreader import GoogleReader, SpecialFeed, ReaderUrl
+
+from .payloads import (USER_ID, CannedAuthMethod, items as makeItems, labelId,
+                       streamContents, subscriptionList, unreadCounts)
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+def _reader(feeds, labels):
+    auth = CannedAuthMethod({
+        ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList(feeds, labels),
+        ReaderUrl.UNREAD_COUNT_URL: unreadCounts(feeds, labels),
+    })
+    reader = GoogleReader(auth)
+    reader.makeSpecialFeeds()
+    return reader
+
+def _readingList(reader):
+    return reader.getSpecialFeed(ReaderUrl.READING_LIST)
+
+class Case(object):
+    """
+    One benchmark: setup(size) returns the function timed, which processes
+    size units (feeds, items, edits...).
+    """
+    def __init__(self, name, unit, size, setup):
+        self.name  = name
+        self.unit  = unit
+        self.size  = size
+        self.setup = setup
+
+def setupSubscriptions(size):
+    reader = _reader(size, max(1, size // 100))
+    return reader.buildSubscriptionList
+
+def setupItems(size):
+    reader = _reader(0, 1)
+    reader.userId = USER_ID
+    records = makeItems(size)
+    container = _readingList(reader)
+    def run():
+        container.clearItems()
+        reader.itemsToObjects(container, records)
+    return run
+
+def setupLoaded(size):
+    reader = _reader(0, 1)
+    reader.userId = USER_ID
+    records = makeItems(size)
+    container = _readingList(reader)
+    def run():
+        container.clearItems()
+        container._itemsLoadedDone(streamContents(records, 'next'))
+    return run
+
+def setupOverlap(size):
+    reader = _reader(0, 1)
+    reader.userId = USER_ID
+    records = makeItems(size)
+    # the same entries loaded into three containers, as a feed, its category
+    # and the reading list would be
+    containers = [reader.getSpecialFeed(type) for type in
+                  (ReaderUrl.READING_LIST, ReaderUrl.STARRED_LIST, ReaderUrl.SHARED_LIST)]
+    def run():
+        for container in containers:
+            container.clearItems()
+        for container in containers:
+            reader.itemsToObjects(container, records)
+    return run
+
+def setupUnread(size):
+    labels = max(1, size // 100)
+    reader = _reader(size, labels)
+    reader.buildSubscriptionList()
+    changed = unreadCounts(size, labels)
+    for count in changed['unreadcounts']:
+        count['count'] += 1
+    reader.auth.responses[ReaderUrl.UNREAD_COUNT_URL] = json.dumps(changed)
+    loaded = makeItems(20)
+    for category in reader.getCategories():
+        reader.itemsToObjects(category, loaded)
+    def run():
+        reader._unreadDigest = None
+        reader.syncSubscriptionList()
+        for category in reader.getCategories():
+            category.countUnread()
+    return run
+
+def setupMarkRead(size):
+    # items spread over 2000 feeds, about 200 feeds per label
+    reader = _reader(2000, 20)
+    reader.buildSubscriptionList()
+    loaded = []
+    for feed, records in _byFeed(makeItems(size, 2000)).items():
+        loaded.extend(reader.itemsToObjects(reader.getFeed(feed), records))
+    def run():
+        for item in loaded:
+            item.markRead(not item.read)
+    return run
+
+def _byFeed(records):
+    byFeed = {}
+    for record in records:
+        byFeed.setdefault(record['origin']['streamId'], []).append(record)
+    return byFeed
+
+def setupTagCommit(size):
+    reader = _reader(0, 1)
+    reader.userId = USER_ID
+    container = _readingList(reader)
+    items = reader.itemsToObjects(container, makeItems(size))
+    tags = [labelId(number) for number in range(10)]
+    def run():
+        reader.beginAddItemTagTransaction()
+        for number, item in enumerate(items):
+            reader.addItemTag(item, tags[number % len(tags)])
+        reader.commitAddItemTagTransaction()
+    return run
+
+CASES = [
+    Case('subscriptions', 'feeds', 20000, setupSubscriptions),
+    Case('items', 'items', 50000, setupItems),
+    Case('loaded', 'items', 50000, setupLoaded),
+    Case('overlap', 'items', 50000, setupOverlap),
+    Case('unread', 'feeds', 20000, setupUnread),
+    Case('markread', 'items', 20000, setupMarkRead),
+    Case('tagcommit', 'edits', 50000, setupTagCommit),
+]
+
+def measure(case, scale=1.0, repeat=3):
+    """
+    Returns {'size', 'seconds', 'perSecond', 'peakMB'}: the best time of
+    repeat runs, and the memory peak of one more run under tracemalloc.
+    """
+    size = max(1, int(case.size * scale))
+    run = case.setup(size)
+    best = None
+    for i in range(repeat):
+        gc.collect()
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    gc.collect()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'size': size,
+        'seconds': best,
+        'perSecond': size / best if best else float('inf'),
+        'peakMB': peak / 1048576.0,
+    }
+
+def loadBaselines(path=BASELINES):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def saveBaselines(results, path=BASELINES):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def regressions(name, result, baseline, tolerance):
+    """
+    What got worse than baseline by more than tolerance, as strings.
+    Baselines measured at another size are not compared.
+    """
+    if not baseline or baseline.get('size') != result['size']:
+        return []
+    found = []
+    if result['perSecond'] < baseline['perSecond'] / (1 + tolerance):
+        found.append('%s: throughput %.0f/s, baseline %.0f/s'
+                     % (name, result['perSecond'], baseline['perSecond']))
+    if result['peakMB'] > baseline['peakMB'] * (1 + tolerance) + 0.1:
+        found.append('%s: peak memory %.1fMB, baseline %.1fMB'
+                     % (name, result['peakMB'], baseline['peakMB']))
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='libgreader offline benchmarks')
+    parser.add_argument('cases', nargs='*', help='cases to run, all by default')
+    parser.add_argument('--scale', type=float, default=1.0, help='payload size multiplier')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown or memory growth over the baseline')
+    parser.add_argument('--save', action='store_true', help='record the results as baselines')
+    parser.add_argument('--baselines', default=BASELINES, help='baselines file')
+    args = parser.parse_args(argv)
+
+    cases = [case for case in CASES if not args.cases or case.name in args.cases]
+    baselines = loadBaselines(args.baselines)
+    results = {}
+    found = []
+    print("%-14s %8s %6s %10s %12s %10s %10s" % ('case', 'size', 'unit', 'time (s)',
+                                                 'per second', 'peak (MB)', 'vs base'))
+    for case in cases:
+        result = measure(case, args.scale, args.repeat)
+        results[case.name] = result
+        baseline = baselines.get(case.name)
+        ratio = ''
+        if baseline and baseline.get('size') == result['size']:
+            ratio = '%.2fx' % (result['perSecond'] / baseline['perSecond'])
+        print("%-14s %8d %6s %10.3f %12.0f %10.1f %10s" % (case.name, result['size'], case.unit,
+              result['seconds'], result['perSecond'], result['peakMB'], ratio))
+        found.extend(regressions(case.name, result, baseline, args.tolerance))
+
+    if args.save:
+        baselines.update(results)
+        saveBaselines(baselines, args.baselines)
+        print("baselines saved to %s" % args.baselines)
+        return 0
+    for regression in found:
+        print("REGRESSION %s" % regression)
+    return 1 if found else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
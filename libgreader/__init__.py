@@ -18,3 +18,18 @@ else:
     from .auth import AuthenticationMethod, ClientAuthMethod, OAuthMethod, OAuth2Method
     from .items import *
     from .url import ReaderUrl
+    from .transport import ConnectionPool, AdaptiveLimiter
+    from .store import SQLiteItemStore
+    from .cache import ResponseCache, MemoryCache, DiskCache
+    from .hooks import RequestEvent, RequestStats
+    from .decoders import StdlibDecoder, OrjsonDecoder
+    from .tokens import TokenStore, MemoryTokenStore, FileTokenStore
+    from .readerpool import ReaderPool
+    from .retention import RetentionPolicy
+    from .batch import ItemBatch
+    try:
+        from .asyncreader import (AsyncGoogleReader, AsyncConnectionPool,
+                                  AsyncClientAuthMethod, AsyncOAuth2Method)
+    except SyntaxError:
+        # asyncio support needs Python 3.5+
+        pass
@@ -0,0 +1,874 @@
+# -*- coding: utf-8 -*-
+
+"""
+asyncio flavour of GoogleReader and of the auth methods, using aiohttp.
+
+Only importable on Python 3.5+, the Feed/Category/Item model is the same one
+the blocking GoogleReader uses.
+"""
+
+import asyncio
+import contextlib
+import time
+
+try:
+    import json
+except:
+    import simplejson as json
+
+from requests.compat import urlencode
+
+try:
+    import aiohttp
+    has_aiohttp = True
+except ImportError:
+    has_aiohttp = False
+
+from .auth import AuthenticationMethod, ClientAuthMethod, OAuth2Method
+from .googlereader import GoogleReader, ContainerLoadResult
+from .items import _pageItems
+from .hooks import RequestEvent
+from .url import ReaderUrl
+from .transport import ConnectionPool, backoffDelay
+
+def _httpError(status, url):
+    """
+    IOError for a failed request, carrying its status code.
+    """
+    error = IOError("Error %d getting %s" % (status, url))
+    error.status = status
+    return error
+
+class AsyncConnectionPool(object):
+    """
+    asyncio counterpart of ConnectionPool, wrapping an aiohttp ClientSession.
+
+    The session is opened lazily because aiohttp needs a running event loop.
+    Requests go through the limiter and GETs are retried like with
+    ConnectionPool.
+    """
+    RETRY_STATUSES    = ConnectionPool.RETRY_STATUSES
+    THROTTLE_STATUSES = ConnectionPool.THROTTLE_STATUSES
+
+    def __init__(self, poolSize=100, maxPerHost=10, idleTimeout=None,
+                 limiter=None, retries=3, backoff=0.5, maxBackoff=30.0):
+        """
+        :param poolSize: (int) max number of open connections, all hosts included
+        :param maxPerHost: (int) max number of connections kept open per host
+        :param idleTimeout: (float) seconds an idle connection is kept alive,
+            None for aiohttp's default
+        :param limiter: (AdaptiveLimiter) admission control, can be shared
+            with blocking ConnectionPools
+        :param retries: (int) times a GET is retried after a connection
+            error, a 5xx or a throttling response
+        :param backoff: (float) base of the exponential backoff, in seconds
+        :param maxBackoff: (float) longest wait between two retries
+        """
+        if not has_aiohttp:
+            raise ImportError("No module named aiohttp")
+        self.poolSize    = poolSize
+        self.maxPerHost  = maxPerHost
+        self.idleTimeout = idleTimeout
+        self.limiter     = limiter
+        self.retries     = retries
+        self.backoff     = backoff
+        self.maxBackoff  = maxBackoff
+        self._session    = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            options = {'limit': self.poolSize, 'limit_per_host': self.maxPerHost}
+            if self.idleTimeout is not None:
+                options['keepalive_timeout'] = self.idleTimeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**options))
+        return self._session
+
+    async def get(self, url, headers=None):
+        """
+        Returns a (status, text, headers) tuple.
+        """
+        return await self.request('GET', url, headers=headers)
+
+    async def post(self, url, data=None, headers=None):
+        """
+        Returns a (status, text, headers) tuple. data is form-encoded, list
+        values are sent as repeated keys like requests does.
+        """
+        headers = dict(headers or {})
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if isinstance(data, dict):
+            data = urlencode(data, doseq=True)
+        return await self.request('POST', url, data=data, headers=headers)
+
+    async def request(self, method, url, **kwargs):
+        """
+        Returns a (status, text, headers) tuple, once the body is read.
+        """
+        attempts = self.retries + 1 if method == 'GET' else 1
+        for attempt in range(attempts):
+            last = attempt + 1 == attempts
+            if self.limiter is not None:
+                await self._acquire()
+            start = time.time()
+            try:
+                async with self.session().request(method, url, **kwargs) as response:
+                    status, text = response.status, await response.text()
+                    headers = response.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if self.limiter is not None:
+                    self.limiter.release(time.time() - start, error=True)
+                if last:
+                    raise
+                await self._wait(attempt)
+                continue
+            if self.limiter is not None:
+                self.limiter.release(time.time() - start, error=status >= 500,
+                                     throttled=status in self.THROTTLE_STATUSES)
+            if last or status not in self.RETRY_STATUSES:
+                return status, text, headers
+            await self._wait(attempt, headers.get('Retry-After'))
+
+    async def _acquire(self):
+        while True:
+            wait = self.limiter.tryAcquire()
+            if wait is None:
+                return
+            # releases notify blocked threads, not coroutines: check often
+            await asyncio.sleep(min(wait, 0.05))
+
+    async def _wait(self, attempt, retryAfter=None):
+        if self.limiter is not None:
+            self.limiter.countRetry()
+        await asyncio.sleep(backoffDelay(attempt, self.backoff, self.maxBackoff, retryAfter))
+
+    def isOpen(self):
+        return self._session is not None and not self._session.closed
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class AsyncAuthenticationMethod(AuthenticationMethod):
+    """
+    Interface for asyncio auth methods, get and post are coroutines.
+    """
+    def __init__(self, pool=None, tokenStore=None, tokenKey=None):
+        super(AsyncAuthenticationMethod, self).__init__(
+            pool if pool is not None else AsyncConnectionPool(), tokenStore, tokenKey)
+        self._ownsPool = pool is None
+        self._refreshing = None
+
+    async def get(self, url, parameters=None):
+        raise NotImplementedError
+
+    async def post(self, url, postParameters=None, urlParameters=None):
+        raise NotImplementedError
+
+    async def _refreshUnlessReplaced(self, current, used, refresh):
+        """
+        Await refresh() to replace the token used by a failed or expiring
+        request, unless another coroutine replaced it while this one waited
+        for the lock: concurrent callers share a single refresh.
+
+        :param current: function returning the token now in use
+        """
+        if self._refreshing is None:
+            self._refreshing = asyncio.Lock()
+        async with self._refreshing:
+            if current() == used:
+                await refresh()
+
+    async def refreshExpiring(self, margin=0):
+        """
+        Refresh the tokens expiring within margin seconds.
+        """
+        pass
+
+    def startAutoRefresh(self, margin=300, interval=60):
+        """
+        Refresh tokens in a task of the running event loop, margin seconds
+        before they expire. Stopped by close().
+        """
+        if self._refresher is None:
+            self._refresher = asyncio.ensure_future(self._autoRefresh(margin, interval))
+        return self._refresher
+
+    def stopAutoRefresh(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    async def _autoRefresh(self, margin, interval):
+        while True:
+            expiries = self.tokenExpiries()
+            delay = interval
+            if expiries:
+                delay = max(1, min(interval, min(expiries) - margin - time.time()))
+            await asyncio.sleep(delay)
+            try:
+                await self.refreshExpiring(margin)
+            except Exception:
+                # tried again on the next wake up, requests refresh on failure anyway
+                pass
+
+    async def close(self):
+        self.stopAutoRefresh()
+        if self._ownsPool:
+            await self.pool.close()
+
+class AsyncClientAuthMethod(AsyncAuthenticationMethod):
+    """
+    asyncio version of ClientAuthMethod.
+
+    Logging in needs network access, it happens on the first request, or
+    explicitly with `await auth.login()`.
+    """
+    CLIENT_URL = ClientAuthMethod.CLIENT_URL
+
+    def __init__(self, username, password, pool=None):
+        super(AsyncClientAuthMethod, self).__init__(pool)
+        self.username   = username
+        self.password   = password
+        self.auth_token = None
+        self.token      = None
+        self._loginLock = None
+
+    async def login(self):
+        """
+        Fetch the Auth token then the Reader token, once.
+        Raises IOError on error.
+        """
+        if self._loginLock is None:
+            self._loginLock = asyncio.Lock()
+        async with self._loginLock:
+            if self.token is not None:
+                return
+            self.auth_token = await self._getAuth()
+            self.token      = await self._getToken()
+
+    def postParameters(self, post=None):
+        post.update({'T': self.token})
+        return super(AsyncClientAuthMethod, self).postParameters(post)
+
+    def _headers(self):
+        return {'Authorization':'GoogleLogin auth=%s' % self.auth_token}
+
+    async def get(self, url, parameters=None):
+        if self.token is None:
+            await self.login()
+        getString = self.getParameters(parameters)
+        status, text, headers = await self.pool.get(url + "?" + getString, headers=self._headers())
+        if status != 200:
+            raise _httpError(status, url)
+        return text
+
+    async def post(self, url, postParameters=None, urlParameters=None):
+        if self.token is None:
+            await self.login()
+        if urlParameters:
+            url = url + "?" + self.getParameters(urlParameters)
+        postString = self.postParameters(postParameters)
+        status, text, headers = await self.pool.post(url, data=postString, headers=self._headers())
+        if status != 200:
+            raise _httpError(status, url)
+        return text
+
+    async def _getAuth(self):
+        parameters = {
+            'service'     : 'reader',
+            'Email'       : self.username,
+            'Passwd'      : self.password,
+            'accountType' : 'GOOGLE'}
+        status, data, headers = await self.pool.post(self.CLIENT_URL, data=parameters)
+        if status != 200:
+            raise IOError("Error getting the Auth token, have you entered a"
+                    "correct username and password?")
+        #Strip newline and non token text.
+        token_dict = dict(x.split('=') for x in data.split('\n') if x)
+        return token_dict["Auth"]
+
+    async def _getToken(self):
+        status, data, headers = await self.pool.get(ReaderUrl.API_URL + 'token', headers=self._headers())
+        if status != 200:
+            raise IOError("Error getting the Reader token.")
+        return data
+
+class AsyncOAuth2Method(AsyncAuthenticationMethod):
+    """
+    asyncio version of OAuth2Method.
+
+    An access token known to have expired is refreshed before a request,
+    one Google refuses is refreshed and the request retried once, and the
+    tokens are saved to the tokenStore like with OAuth2Method.
+    """
+    AUTHORIZATION_URL = OAuth2Method.AUTHORIZATION_URL
+    ACCESS_TOKEN_URL  = OAuth2Method.ACCESS_TOKEN_URL
+    SCOPE             = OAuth2Method.SCOPE
+
+    def __init__(self, client_id, client_secret, pool=None, tokenStore=None, tokenKey=None):
+        """
+        :param tokenKey: (str) required with a tokenStore, the client_id is
+            shared by every user of the application and can not be the key
+        """
+        if tokenStore is not None and tokenKey is None:
+            raise ValueError("AsyncOAuth2Method needs a tokenKey per user with a tokenStore")
+        super(AsyncOAuth2Method, self).__init__(pool, tokenStore, tokenKey)
+        self.client_id     = client_id
+        self.client_secret = client_secret
+        self.code          = None
+        self.redirect_uri  = None
+        self.username      = "OAuth2"
+        tokens = self._loadTokens()
+        self.access_token  = tokens.get('access')
+        self.refresh_token = tokens.get('refresh')
+        self.action_token  = tokens.get('action')
+        self._accessTokenExpires = tokens.get('accessExpires')
+        self._actionTokenExpires = tokens.get('actionExpires')
+
+    # the steps which make no request are the ones of OAuth2Method
+    setRedirectUri      = OAuth2Method.setRedirectUri
+    buildAuthUrl        = OAuth2Method.buildAuthUrl
+    authFromAccessToken = OAuth2Method.authFromAccessToken
+    tokenExpiries       = OAuth2Method.tokenExpiries
+    _accessRefused      = OAuth2Method._accessRefused
+
+    async def setActionToken(self):
+        self.action_token = await self.get(ReaderUrl.ACTION_TOKEN_URL)
+        self._actionTokenExpires = time.time() + self.ACTION_TOKEN_TTL
+        self._saveTokens(action=self.action_token, actionExpires=self._actionTokenExpires)
+
+    async def setAccessToken(self):
+        params = {
+            'grant_type': 'authorization_code',
+            'code': self.code,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'redirect_uri': self.redirect_uri
+        }
+        await self._requestAccessToken(params)
+
+    async def refreshAccessToken(self):
+        """
+        Get a new access token with the refresh token.
+        """
+        if not self.refresh_token:
+            raise IOError("No refresh token available.")
+        params = {
+            'grant_type': 'refresh_token',
+            'refresh_token': self.refresh_token,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+        }
+        await self._requestAccessToken(params)
+
+    async def _requestAccessToken(self, params):
+        status, text, headers = await self.pool.post(self.ACCESS_TOKEN_URL, data=params)
+        if status != 200:
+            raise IOError('Error getting Access Token')
+        response = json.loads(text)
+        if 'access_token' not in response:
+            raise IOError('Error getting Access Token')
+        self.authFromAccessToken(response['access_token'],
+                                 response.get('refresh_token', self.refresh_token),
+                                 response.get('expires_in'))
+
+    async def refreshExpiring(self, margin=0):
+        await self._refreshAccessToken(margin)
+        if self.action_token:
+            await self._refreshActionToken(margin)
+
+    async def _refreshAccessToken(self, margin=0):
+        if (self.refresh_token and self._accessTokenExpires and
+                self._accessTokenExpires - margin <= time.time()):
+            await self._refreshUnlessReplaced(lambda: self.access_token, self.access_token,
+                                              self.refreshAccessToken)
+
+    async def _refreshActionToken(self, margin=0):
+        if not self.action_token:
+            await self._refreshUnlessReplaced(lambda: self.action_token, None, self.setActionToken)
+        elif self._actionTokenExpires and self._actionTokenExpires - margin <= time.time():
+            await self._refreshUnlessReplaced(lambda: self.action_token, self.action_token,
+                                              self.setActionToken)
+
+    async def _freshAccessToken(self):
+        """
+        The access token, refreshed first if it is known to have expired.
+        """
+        if not self.access_token:
+            raise IOError("No authorized client available.")
+        await self._refreshAccessToken()
+        return self.access_token
+
+    async def get(self, url, parameters=None):
+        """
+        GET url, refreshing the access token and retrying once if it is
+        refused.
+        """
+        def send(accessToken):
+            getParameters = dict(parameters or {})
+            getParameters.update({'access_token': accessToken, 'alt': 'json'})
+            return self.pool.get(url + '?' + self.getParameters(getParameters))
+
+        used = await self._freshAccessToken()
+        status, text, headers = await send(used)
+        if status == 401 and self.refresh_token:
+            await self._refreshUnlessReplaced(lambda: self.access_token, used, self.refreshAccessToken)
+            status, text, headers = await send(self.access_token)
+        if status != 200:
+            if status == 401:
+                self._accessRefused()
+            raise _httpError(status, url)
+        return text
+
+    async def post(self, url, postParameters=None, urlParameters=None):
+        """
+        A refused access or action token is refreshed and the request retried
+        once, a request failing after that raises IOError.
+        """
+        await self._freshAccessToken()
+        await self._refreshActionToken()
+        url = url + '?' + self.getParameters(urlParameters or {})
+
+        def send(accessToken, actionToken):
+            data = dict(postParameters or {})
+            data['T'] = actionToken
+            return self.pool.post(url, data=data, headers={'Authorization': 'Bearer ' + accessToken})
+
+        used = (self.access_token, self.action_token)
+        status, text, headers = await send(*used)
+        if status == 401:
+            if headers.get('X-Reader-Google-Bad-Token') == 'true':
+                await self._refreshUnlessReplaced(lambda: self.action_token, used[1], self.setActionToken)
+                status, text, headers = await send(self.access_token, self.action_token)
+            elif self.refresh_token:
+                await self._refreshUnlessReplaced(lambda: self.access_token, used[0], self.refreshAccessToken)
+                status, text, headers = await send(self.access_token, self.action_token)
+        if status != 200:
+            if status == 401:
+                self._accessRefused()
+            raise _httpError(status, url)
+        return text
+
+class _AsyncModel(GoogleReader):
+    """
+    The GoogleReader holding the feeds, categories and Items of an
+    AsyncGoogleReader. The methods of its containers and Items which make
+    requests get the awaitables of the AsyncGoogleReader instead.
+    """
+    def __init__(self, asyncReader, auth, itemStore=None, cache=None, decoder=None):
+        super(_AsyncModel, self).__init__(auth, itemStore=itemStore, cache=cache, decoder=decoder)
+        self.asyncReader = asyncReader
+
+    def _asyncCall(self, container, method, *args):
+        return getattr(self.asyncReader, method)(container, *args)
+
+    def addItemTag(self, item, tag):
+        return self.asyncReader.addItemTag(item, tag)
+
+    def removeItemTag(self, item, tag):
+        return self.asyncReader.removeItemTag(item, tag)
+
+    def markFeedAsRead(self, feed):
+        return self.asyncReader.markFeedAsRead(feed)
+
+    def _editResult(self, result):
+        return self.asyncReader._editResult(result)
+
+class _AsyncItems(object):
+    """
+    Async iterator over the items of a container, following continuation
+    tokens: what iterItems returns for an AsyncGoogleReader. With prefetch,
+    the next page is requested while the current one is consumed.
+    """
+    def __init__(self, reader, container, excludeRead, pageSize, prefetch, since, until):
+        self.reader    = reader
+        self.container = container
+        self.prefetch  = prefetch
+        self._options  = (excludeRead, pageSize, since, until)
+        self._records  = iter(())
+        self._page     = None
+        self._started  = False
+
+    def __aiter__(self):
+        return self
+
+    def _fetch(self, continuation):
+        excludeRead, pageSize, since, until = self._options
+        page = self.reader._getFeedContent(self.container.fetchUrl, excludeRead, continuation,
+                                           pageSize, since, until)
+        return asyncio.ensure_future(page) if self.prefetch else page
+
+    async def __anext__(self):
+        if not self._started:
+            self._started = True
+            self._page = self._fetch(None)
+        while True:
+            for record in self._records:
+                return self.reader.model._itemFor(record, self.container, attach=False)
+            if self._page is None:
+                raise StopAsyncIteration
+            response, event = await self._page
+            with self.reader._instrumented(event):
+                data = self.reader.model._decodeJson(response)
+            continuation = data.get('continuation', None)
+            self._page = self._fetch(continuation) if continuation else None
+            self._records = iter(_pageItems(data))
+
+class AsyncGoogleReader(object):
+    """
+    Google Reader for asyncio code, every method doing network I/O is a
+    coroutine. Needs one of the Async*AuthMethod.
+
+    Feeds, categories and Items are the ones of the GoogleReader in
+    self.model, whose methods making requests return awaitables:
+    `await feed.loadItems()`, `await item.markRead()`, `async for item in
+    feed.iterItems()`. Responses go through the cache and are reported to
+    the hooks like with GoogleReader.
+    """
+    def __repr__(self):
+        return "<Async Google Reader object: %s>" % self.auth.username
+
+    def __init__(self, auth, itemStore=None, cache=None, decoder=None):
+        """
+        :param auth: (AsyncAuthenticationMethod)
+        :param itemStore: (SQLiteItemStore) local store loaded items are
+            written to
+        :param cache: (ResponseCache) cache for the responses of httpGet
+        :param decoder: object whose loads() parses the JSON responses
+        """
+        self.auth  = auth
+        self.model = _AsyncModel(self, auth, itemStore, cache, decoder)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.auth.close()
+
+    @property
+    def userId(self):
+        return self.model.userId
+
+    @userId.setter
+    def userId(self, userId):
+        self.model.userId = userId
+
+    @property
+    def itemStore(self):
+        return self.model.itemStore
+
+    @property
+    def itemsById(self):
+        return self.model.itemsById
+
+    @property
+    def watermarks(self):
+        return self.model.watermarks
+
+    def getFeeds(self):
+        return self.model.getFeeds()
+
+    def getSubscriptionList(self):
+        return self.model.getSubscriptionList()
+
+    def getCategories(self):
+        return self.model.getCategories()
+
+    def getFeed(self, id):
+        return self.model.getFeed(id)
+
+    def getCategory(self, id):
+        return self.model.getCategory(id)
+
+    def getSpecialFeed(self, type):
+        return self.model.getSpecialFeed(type)
+
+    def addHook(self, hook):
+        self.model.addHook(hook)
+
+    def removeHook(self, hook):
+        self.model.removeHook(hook)
+
+    def _open(self, method, url, parameters=None):
+        """
+        RequestEvent of a request, None without hooks.
+        """
+        if not self.model.instrumentation.hooks:
+            return None
+        return RequestEvent(method, url, parameters)
+
+    @contextlib.contextmanager
+    def _instrumented(self, *events):
+        """
+        Attach the decoding and building done in the block to events, then
+        report them. The block must not await: the events of a thread are
+        shared by all its coroutines.
+        """
+        instrumentation = self.model.instrumentation
+        instrumentation.adopt([event for event in events if event is not None])
+        try:
+            yield
+        finally:
+            for event in instrumentation.take():
+                instrumentation.report(event)
+
+    async def _send(self, event, request):
+        """
+        Await the response of request, timing it for event.
+        """
+        if event is None:
+            return await request
+        start = time.time()
+        try:
+            response = await request
+        except Exception as e:
+            event._failed(e)
+            event.networkTime = time.time() - start
+            self.model.instrumentation.report(event)
+            raise
+        event.networkTime = time.time() - start
+        event._received(response)
+        return response
+
+    async def _fetch(self, url, parameters=None):
+        """
+        (response, RequestEvent) of a GET, answered from the cache when it
+        has it. The event is None without hooks.
+        """
+        event = self._open('GET', url, parameters)
+        cache = self.model.cache
+        if cache is None:
+            return await self._send(event, self.auth.get(url, parameters)), event
+        response = cache.get(url, parameters, self.model.cacheAccount)
+        if response is None:
+            key = dict(parameters or {})
+            response = await self._send(event, self.auth.get(url, parameters))
+            cache.put(url, key, response, self.model.cacheAccount)
+        elif event is not None:
+            event.cached = True
+            event._received(response)
+        return response, event
+
+    async def httpGet(self, url, parameters=None):
+        response, event = await self._fetch(url, parameters)
+        with self._instrumented(event):
+            return response
+
+    async def httpPost(self, url, post_parameters=None):
+        if self.model.cache is not None:
+            self.model.cache.invalidate(url, self.model.cacheAccount)
+        event = self._open('POST', url, post_parameters)
+        response = await self._send(event, self.auth.post(url, post_parameters))
+        with self._instrumented(event):
+            return response
+
+    def _editResult(self, result):
+        return self._awaitEditResult(result)
+
+    async def _awaitEditResult(self, result):
+        return (await result).upper() == 'OK'
+
+    async def getUserInfo(self):
+        response, event = await self._fetch(ReaderUrl.USER_INFO_URL)
+        with self._instrumented(event):
+            result = self.model._decodeJson(response)
+        self.userId = result['userId']
+        return result
+
+    async def getUserSignupDate(self):
+        userinfo = await self.getUserInfo()
+        timestamp = int(float(userinfo["signupTimeSec"]))
+        return time.strftime("%m/%d/%Y %H:%M", time.gmtime(timestamp))
+
+    async def _fetchSubscriptionList(self):
+        """
+        The unread-count and subscription/list responses and their events,
+        requested concurrently, with the user info when it is missing.
+        """
+        requests = [
+            self._fetch(ReaderUrl.UNREAD_COUNT_URL, { 'output': 'json', }),
+            self._fetch(ReaderUrl.SUBSCRIPTION_LIST_URL, { 'output': 'json', }),
+        ]
+        if not self.userId:
+            requests.append(self.getUserInfo())
+        results = await asyncio.gather(*requests)
+        return results[0], results[1]
+
+    async def buildSubscriptionList(self):
+        """
+        Same as GoogleReader.buildSubscriptionList, but the user-info,
+        unread-count and subscription/list requests are made concurrently.
+        """
+        (unreadJson, unreadEvent), (feedsJson, feedsEvent) = await self._fetchSubscriptionList()
+        with self._instrumented(unreadEvent, feedsEvent):
+            self.model._clearLists()
+            self.model._loadSubscriptionList(unreadJson, feedsJson)
+        return True
+
+    async def syncSubscriptionList(self):
+        """
+        Awaitable GoogleReader.syncSubscriptionList.
+        """
+        (unreadJson, unreadEvent), (feedsJson, feedsEvent) = await self._fetchSubscriptionList()
+        with self._instrumented(unreadEvent, feedsEvent):
+            return self.model._syncSubscriptionList(unreadJson, feedsJson)
+
+    async def refreshChanged(self, containers=None, excludeRead=False, loadLimit=20):
+        """
+        Awaitable GoogleReader.refreshChanged.
+        """
+        if not self.userId:
+            await self.getUserInfo()
+        if containers is None:
+            containers = self.model.feeds
+
+        unreadJson, event = await self._fetch(ReaderUrl.UNREAD_COUNT_URL, { 'output': 'json', })
+        with self._instrumented(event):
+            moved = self.model._changedContainers(unreadJson, containers)
+        changed = {}
+        for container, since, newest in moved:
+            if since is not None:
+                changed[container] = await self._loadNewItems(container, since, excludeRead, loadLimit)
+            self.model.watermarks[container.id] = newest
+        return changed
+
+    async def _loadNewItems(self, container, since, excludeRead=False, loadLimit=20):
+        objects = []
+        continuation = None
+        while True:
+            response, event = await self._getFeedContent(container.fetchUrl, excludeRead, continuation, loadLimit, since)
+            with self._instrumented(event):
+                data = self.model._decodeJson(response)
+                objects.extend(container._newItemsLoaded(data))
+            continuation = data.get('continuation', None)
+            if not continuation:
+                break
+        container._newItemsDone(objects)
+        return objects
+
+    async def _getFeedContent(self, url, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
+        """
+        (response, RequestEvent) of a page of items.
+        """
+        parameters = self.model._feedContentParameters(excludeRead, continuation, loadLimit, since, until)
+        return await self._fetch(url, parameters)
+
+    async def getFeedContent(self, feed, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
+        response, event = await self._getFeedContent(feed.fetchUrl, excludeRead, continuation, loadLimit, since, until)
+        with self._instrumented(event):
+            return self.model._decodeJson(response)
+
+    async def getCategoryContent(self, category, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
+        return await self.getFeedContent(category, excludeRead, continuation, loadLimit, since, until)
+
+    async def _loadPage(self, container, excludeRead, continuation, loadLimit, since, until):
+        response, event = await self._getFeedContent(container.fetchUrl, excludeRead, continuation,
+                                                      loadLimit, since, until)
+        with self._instrumented(event):
+            container._itemsLoadedDone(self.model._decodeJson(response), excludeRead)
+
+    async def loadItems(self, container, excludeRead=False, loadLimit=20, since=None, until=None):
+        """
+        Awaitable ItemsContainer.loadItems for a Feed, Category or SpecialFeed,
+        what `await container.loadItems()` runs. The container is always
+        loaded from Google Reader, not restored from the item store.
+        """
+        container.clearItems()
+        container.lastLoadOk     = False
+        container.lastLoadLength = 0
+        if self.itemStore is not None:
+            self.itemStore.clearStream(container.id)
+        await self._loadPage(container, excludeRead, None, loadLimit, since, until)
+
+    async def loadMoreItems(self, container, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
+        """
+        Awaitable ItemsContainer.loadMoreItems.
+        """
+        container.lastLoadOk     = False
+        container.lastLoadLength = 0
+        if not continuation and not container.continuation:
+            return
+        await self._loadPage(container, excludeRead, continuation or container.continuation,
+                             loadLimit, since, until)
+
+    def iterItems(self, container, excludeRead=False, pageSize=20, prefetch=1, since=None, until=None):
+        """
+        Async iterator over every item of container, what
+        `container.iterItems()` returns. Items are not kept in
+        container.items.
+        """
+        return _AsyncItems(self, container, excludeRead, pageSize, prefetch, since, until)
+
+    async def loadItemsForContainers(self, containers, max_workers=8, excludeRead=False, loadLimit=20, since=None, until=None):
+        """
+        Awaitable GoogleReader.loadItemsForContainers, with up to max_workers
+        requests at a time.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def load(container):
+            start = time.time()
+            error = None
+            async with semaphore:
+                try:
+                    await self.loadItems(container, excludeRead, loadLimit, since, until)
+                except Exception as e:
+                    error = e
+            return ContainerLoadResult(container, error, time.time() - start)
+
+        return list(await asyncio.gather(*[load(container) for container in containers]))
+
+    async def _modifyItemTag(self, item_id, action, tag):
+        return await self.httpPost(ReaderUrl.EDIT_TAG_URL,
+                                   {'i': item_id, action: tag, 'ac': 'edit-tags'})
+
+    async def removeItemTag(self, item, tag):
+        self.model._applyItemTag(item, tag, False)
+        return await self._modifyItemTag(item.id, 'r', tag)
+
+    async def addItemTag(self, item, tag):
+        if self.model.inItemTagTransaction:
+            return GoogleReader.addItemTag(self.model, item, tag)
+        self.model._applyItemTag(item, tag, True)
+        return await self._modifyItemTag(item.id, 'a', tag)
+
+    def beginAddItemTagTransaction(self):
+        self.model.beginAddItemTagTransaction()
+
+    async def commitAddItemTagTransaction(self):
+        model = self.model
+        if not model.inItemTagTransaction:
+            raise Exception("Not in addItemTag transaction")
+        for tag in model.addTagBacklog:
+            itemIds = [item['i'] for item in model.addTagBacklog[tag]]
+            feedIds = [item['s'] for item in model.addTagBacklog[tag]]
+            await self.httpPost(ReaderUrl.EDIT_TAG_URL,
+                {'i': itemIds, 'a': tag, 'ac': 'edit-tags', 's': feedIds})
+        model.addTagBacklog = {}
+        model._backlogByItem = None
+        model.inItemTagTransaction = False
+        return True
+
+    async def markFeedAsRead(self, feed):
+        return await self.httpPost(ReaderUrl.MARK_ALL_READ_URL, {'s': feed.id, })
+
+    async def subscribe(self, feedUrl):
+        response = await self.httpPost(ReaderUrl.SUBSCRIPTION_EDIT_URL,
+                                       {'ac':'subscribe', 's': feedUrl})
+        return bool(response and 'OK' in response)
+
+    async def unsubscribe(self, feedUrl):
+        response = await self.httpPost(ReaderUrl.SUBSCRIPTION_EDIT_URL,
+                                       {'ac':'unsubscribe', 's': feedUrl})
+        return bool(response and 'OK' in response)
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 
-import requests
 from requests.compat import urlencode, urlparse
 
 # import urllib2
 
+import threading
 import time
 
 try:
@@ -27,6 +27,8 @@ except:
 
 from .googlereader import GoogleReader
 from .url import ReaderUrl
+from .transport import ConnectionPool
+from .tokens import TokenRefresher
 
 def toUnicode(obj, encoding='utf-8'):
     return obj
@@ -35,6 +37,14 @@ def toUnicode(obj, encoding='utf-8'):
     #         obj = unicode(obj, encoding)
     # return obj
 
+def _httpError(response, url):
+    """
+    IOError for a failed request, carrying its status code.
+    """
+    error = IOError("Error %d getting %s" % (response.status_code, url))
+    error.status = response.status_code
+    return error
+
 class AuthenticationMethod(object):
     """
     Defines an interface for authentication methods, must have a get method
@@ -42,8 +52,72 @@ class AuthenticationMethod(object):
     1. auth on setup
     2. need to have GET method
     """
-    def __init__(self):
+    ACTION_TOKEN_TTL = 25 * 60
+
+    def __init__(self, pool=None, tokenStore=None, tokenKey=None):
+        """
+        :param pool: (ConnectionPool) pool of keep-alive connections, can be
+            shared between auth methods. A private one is created if omitted.
+        :param tokenStore: (TokenStore) where tokens are loaded from on
+            construction and saved to when they change
+        :param tokenKey: (str) key of the tokens in tokenStore, defaults to
+            one per auth method and account
+        """
         self.client = "libgreader" #@todo: is this needed?
+        self._ownsPool = pool is None
+        self.pool = pool if pool is not None else ConnectionPool()
+        self.tokenStore = tokenStore
+        self.tokenKey = tokenKey
+        self._refreshLock = threading.RLock()
+        self._refresher = None
+
+    def _refreshUnlessReplaced(self, current, used, refresh):
+        """
+        Call refresh() to replace the token used by a failed or expiring
+        request, unless another thread replaced it while this one waited for
+        the lock: concurrent callers share a single refresh.
+
+        :param current: function returning the token now in use
+        """
+        with self._refreshLock:
+            if current() == used:
+                refresh()
+
+    def tokenExpiries(self):
+        """
+        Times at which the tokens which can be refreshed expire.
+        """
+        return []
+
+    def refreshExpiring(self, margin=0):
+        """
+        Refresh the tokens expiring within margin seconds.
+        """
+        pass
+
+    def startAutoRefresh(self, margin=300, interval=60):
+        """
+        Refresh tokens on a background thread, margin seconds before they
+        expire. Stopped by close().
+        """
+        if self._refresher is None:
+            self._refresher = TokenRefresher(self, margin, interval)
+            self._refresher.start()
+        return self._refresher
+
+    def stopAutoRefresh(self):
+        if self._refresher is not None:
+            self._refresher.stop()
+            self._refresher = None
+
+    def _loadTokens(self):
+        if self.tokenStore is None:
+            return {}
+        return self.tokenStore.get(self.tokenKey)
+
+    def _saveTokens(self, **tokens):
+        if self.tokenStore is not None:
+            self.tokenStore.update(self.tokenKey, **tokens)
 
     def getParameters(self, extraargs=None):
         parameters = {'ck':time.time(), 'client':self.client}
@@ -54,31 +128,131 @@ class AuthenticationMethod(object):
     def postParameters(self, post=None):
         return post
 
+    def getBytes(self, url, parameters=None):
+        """
+        Like get(), but returns the raw response body as bytes, leaving its
+        decoding to the caller.
+
+        Auth methods which only have get() encode its text back to UTF-8.
+        """
+        content = self.get(url, parameters)
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+        return content
+
+    def getStream(self, url, parameters=None, chunkSize=65536):
+        """
+        Like get(), but yields the raw response body in chunks of bytes.
+
+        Auth methods which can't stream send the whole body as one chunk.
+        """
+        content = self.get(url, parameters)
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+        yield content
+
+    def _iterResponse(self, response, chunkSize):
+        try:
+            for chunk in response.iter_content(chunkSize):
+                yield chunk
+        finally:
+            response.close()
+
+    def close(self):
+        """
+        Release the connections held by this auth method. A pool passed in by
+        the caller is shared, so it is left for its owner to close.
+        """
+        self.stopAutoRefresh()
+        if self._ownsPool:
+            self.pool.close()
+
 class ClientAuthMethod(AuthenticationMethod):
     """
     Auth type which requires a valid Google Reader username and password
     """
     CLIENT_URL = 'https://www.google.com/accounts/ClientLogin'
 
-    def __init__(self, username, password):
-        super(ClientAuthMethod, self).__init__()
+    def __init__(self, username, password, pool=None, tokenStore=None, tokenKey=None):
+        super(ClientAuthMethod, self).__init__(pool, tokenStore, tokenKey or 'ClientLogin:%s' % username)
         self.username   = username
         self.password   = password
+        tokens = self._loadTokens()
+        self.auth_token = tokens.get('auth')
+        self.token      = tokens.get('action')
+        self._tokenExpires = tokens.get('actionExpires')
+        if self.auth_token is None:
+            self._refreshAuth()
+
+    def _refreshAuth(self):
+        """
+        Log in again, the action token of the old Auth token goes with it.
+        """
         self.auth_token = self._getAuth()
-        self.token      = self._getToken()
+        self.token = None
+        self._saveTokens(auth=self.auth_token, action=None, actionExpires=None)
+
+    def _refreshToken(self):
+        self.token = self._getToken()
+        self._tokenExpires = time.time() + self.ACTION_TOKEN_TTL
+        self._saveTokens(action=self.token, actionExpires=self._tokenExpires)
+
+    def _tokenExpiring(self, margin=0):
+        return self._tokenExpires is not None and self._tokenExpires - margin <= time.time()
+
+    def tokenExpiries(self):
+        return [self._tokenExpires] if self.token is not None and self._tokenExpires else []
+
+    def refreshExpiring(self, margin=0):
+        if self.token is not None and self._tokenExpiring(margin):
+            self._refreshUnlessReplaced(lambda: self.token, self.token, self._refreshToken)
+
+    def _authorize(self, send, usedToken=None):
+        """
+        Make a request with send(headers), logging in again or fetching a new
+        action token and retrying once if the tokens it carried were refused.
+
+        :param usedToken: function returning the action token send() used
+        """
+        usedAuth = self.auth_token
+        response = send({'Authorization':'GoogleLogin auth=%s' % usedAuth})
+        if response.status_code == 401:
+            badToken = response.headers.get('X-Reader-Google-Bad-Token') == 'true'
+            response.close()
+            if badToken:
+                self._refreshUnlessReplaced(lambda: self.token, usedToken and usedToken(), self._refreshToken)
+            else:
+                self._refreshUnlessReplaced(lambda: self.auth_token, usedAuth, self._refreshAuth)
+            response = send({'Authorization':'GoogleLogin auth=%s' % self.auth_token})
+        return response
 
     def postParameters(self, post=None):
+        token = self.token
+        if token is None or self._tokenExpiring():
+            self._refreshUnlessReplaced(lambda: self.token, token, self._refreshToken)
         post.update({'T': self.token})
         return super(ClientAuthMethod, self).postParameters(post)
 
+    def _authorizedGet(self, url, parameters=None, **kwargs):
+        getString = self.getParameters(parameters)
+        req = self._authorize(lambda headers: self.pool.get(url + "?" + getString, headers=headers, **kwargs))
+        if req.status_code != 200:
+            req.close()
+            raise _httpError(req, url)
+        return req
+
     def get(self, url, parameters=None):
         """
         Convenience method for requesting to google with proper cookies/params.
         """
-        getString = self.getParameters(parameters)
-        headers = {'Authorization':'GoogleLogin auth=%s' % self.auth_token}
-        req = requests.get(url + "?" + getString, headers=headers)
-        return req.text
+        return self._authorizedGet(url, parameters).text
+
+    def getBytes(self, url, parameters=None):
+        return self._authorizedGet(url, parameters).content
+
+    def getStream(self, url, parameters=None, chunkSize=65536):
+        req = self._authorizedGet(url, parameters, stream=True)
+        return self._iterResponse(req, chunkSize)
 
     def post(self, url, postParameters=None, urlParameters=None):
         """
@@ -86,11 +260,11 @@ class ClientAuthMethod(AuthenticationMethod):
         """
         if urlParameters:
             url = url + "?" + self.getParameters(urlParameters)
-        headers = {'Authorization':'GoogleLogin auth=%s' % self.auth_token,
-                    'Content-Type': 'application/x-www-form-urlencoded'
-                    }
-        postString = self.postParameters(postParameters)
-        req = requests.post(url, data=postString, headers=headers)
+        def send(headers):
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            postString = self.postParameters(postParameters)
+            return self.pool.post(url, data=postString, headers=headers)
+        req = self._authorize(send, lambda: postParameters.get('T'))
         return req.text
 
     def _getAuth(self):
@@ -105,7 +279,7 @@ class ClientAuthMethod(AuthenticationMethod):
             'Email'       : self.username,
             'Passwd'      : self.password,
             'accountType' : 'GOOGLE'}
-        req = requests.post(ClientAuthMethod.CLIENT_URL, data=parameters)
+        req = self.pool.post(ClientAuthMethod.CLIENT_URL, data=parameters)
         if req.status_code != 200:
             raise IOError("Error getting the Auth token, have you entered a"
                     "correct username and password?")
@@ -122,10 +296,10 @@ class ClientAuthMethod(AuthenticationMethod):
         Returns token or raises IOError on error.
         """
         headers = {'Authorization':'GoogleLogin auth=%s' % self.auth_token}
-        req = requests.get(ReaderUrl.API_URL + 'token', headers=headers)
+        req = self.pool.get(ReaderUrl.API_URL + 'token', headers=headers)
         if req.status_code != 200:
             raise IOError("Error getting the Reader token.")
-        return req.content
+        return req.text
 
 class OAuthMethod(AuthenticationMethod):
     """
@@ -244,16 +418,26 @@ class OAuth2Method(AuthenticationMethod):
         'https://www.google.com/reader/api/',
     ]
 
-    def __init__(self, client_id, client_secret):
-        super(OAuth2Method, self).__init__()
+    def __init__(self, client_id, client_secret, pool=None, tokenStore=None, tokenKey=None):
+        """
+        :param tokenKey: (str) required with a tokenStore, the client_id is
+            shared by every user of the application and can not be the key
+        """
+        if tokenStore is not None and tokenKey is None:
+            raise ValueError("OAuth2Method needs a tokenKey per user with a tokenStore")
+        super(OAuth2Method, self).__init__(pool, tokenStore, tokenKey)
         self.client_id         = client_id
         self.client_secret     = client_secret
         self.authorized_client = None
         self.code              = None
-        self.access_token      = None
-        self.action_token      = None
         self.redirect_uri      = None
         self.username          = "OAuth2"
+        tokens = self._loadTokens()
+        self.access_token      = tokens.get('access')
+        self.refresh_token     = tokens.get('refresh')
+        self.action_token      = tokens.get('action')
+        self._accessTokenExpires = tokens.get('accessExpires')
+        self._actionTokenExpires = tokens.get('actionExpires')
 
     def setRedirectUri(self, redirect_uri):
         self.redirect_uri = redirect_uri
@@ -264,6 +448,7 @@ class OAuth2Method(AuthenticationMethod):
             'redirect_uri': self.redirect_uri,
             'scope': ' '.join(self.SCOPE),
             'response_type': 'code',
+            'access_type': 'offline',
         }
         return self.AUTHORIZATION_URL + '?' + urlencode(args)
 
@@ -272,9 +457,12 @@ class OAuth2Method(AuthenticationMethod):
         Get action to prevent XSRF attacks
         http://code.google.com/p/google-reader-api/wiki/ActionToken
 
-        TODO: mask token expiring? handle regenerating?
+        The token is fetched again when it expires, or when a POST is refused
+        because of it.
         '''
         self.action_token = self.get(ReaderUrl.ACTION_TOKEN_URL)
+        self._actionTokenExpires = time.time() + self.ACTION_TOKEN_TTL
+        self._saveTokens(action=self.action_token, actionExpires=self._actionTokenExpires)
 
     def setAccessToken(self):
         params = {
@@ -284,9 +472,26 @@ class OAuth2Method(AuthenticationMethod):
             'client_secret': self.client_secret,
             'redirect_uri': self.redirect_uri
         }
+        self._requestAccessToken(params)
+
+    def refreshAccessToken(self):
+        """
+        Get a new access token with the refresh token.
+        """
+        if not self.refresh_token:
+            raise IOError("No refresh token available.")
+        params = {
+            'grant_type': 'refresh_token',
+            'refresh_token': self.refresh_token,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+        }
+        self._requestAccessToken(params)
+
+    def _requestAccessToken(self, params):
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        request = requests.post(self.ACCESS_TOKEN_URL, data=params,
-                                headers=headers)
+        request = self.pool.post(self.ACCESS_TOKEN_URL, data=params,
+                                 headers=headers)
 
         if request.status_code != 200:
             raise IOError('Error getting Access Token')
@@ -295,63 +500,180 @@ class OAuth2Method(AuthenticationMethod):
         if 'access_token' not in response:
             raise IOError('Error getting Access Token')
         else:
-            self.authFromAccessToken(response['access_token'])
+            self.authFromAccessToken(response['access_token'],
+                                     response.get('refresh_token', self.refresh_token),
+                                     response.get('expires_in'))
 
-    def authFromAccessToken(self, access_token):
+    def authFromAccessToken(self, access_token, refresh_token=None, expires_in=None):
+        """
+        :param refresh_token: (str) lets the access token be refreshed
+        :param expires_in: (int) seconds the access token is valid for
+        """
         self.access_token = access_token
+        if refresh_token is not None:
+            self.refresh_token = refresh_token
+        self._accessTokenExpires = time.time() + int(expires_in) if expires_in else None
+        self._saveTokens(access=access_token, accessExpires=self._accessTokenExpires,
+                         refresh=self.refresh_token)
+
+    def tokenExpiries(self):
+        expiries = []
+        if self.refresh_token and self._accessTokenExpires:
+            expiries.append(self._accessTokenExpires)
+        if self.action_token and self._actionTokenExpires:
+            expiries.append(self._actionTokenExpires)
+        return expiries
+
+    def refreshExpiring(self, margin=0):
+        self._refreshAccessToken(margin)
+        if self.action_token:
+            self._refreshActionToken(margin)
+
+    def _refreshAccessToken(self, margin=0):
+        if (self.refresh_token and self._accessTokenExpires and
+                self._accessTokenExpires - margin <= time.time()):
+            self._refreshUnlessReplaced(lambda: self.access_token, self.access_token,
+                                        self.refreshAccessToken)
+
+    def _refreshActionToken(self, margin=0):
+        if not self.action_token:
+            self._refreshUnlessReplaced(lambda: self.action_token, None, self.setActionToken)
+        elif self._actionTokenExpires and self._actionTokenExpires - margin <= time.time():
+            self._refreshUnlessReplaced(lambda: self.action_token, self.action_token,
+                                        self.setActionToken)
 
-    def get(self, url, parameters=None):
+    def _freshAccessToken(self):
         """
-        Convenience method for requesting to google with proper cookies/params.
+        The access token, refreshed first if it is known to have expired.
         """
         if not self.access_token:
             raise IOError("No authorized client available.")
-        if parameters is None:
-            parameters = {}
-        parameters.update({'access_token': self.access_token, 'alt': 'json'})
-        request = requests.get(url + '?' + self.getParameters(parameters))
+        self._refreshAccessToken()
+        return self.access_token
+
+    def _accessRefused(self):
+        """
+        The access token was refused: forget it, here and in the token store.
+        """
+        self.access_token = None
+        self.action_token = None
+        self._saveTokens(access=None, accessExpires=None, action=None, actionExpires=None)
+
+    def _authorizedGet(self, url, parameters=None, **kwargs):
+        """
+        GET url, refreshing the access token and retrying once if it is
+        refused.
+        """
+        def send(accessToken):
+            getParameters = dict(parameters or {})
+            getParameters.update({'access_token': accessToken, 'alt': 'json'})
+            return self.pool.get(url + '?' + self.getParameters(getParameters), **kwargs)
+
+        used = self._freshAccessToken()
+        request = send(used)
+        if request.status_code == 401 and self.refresh_token:
+            request.close()
+            self._refreshUnlessReplaced(lambda: self.access_token, used, self.refreshAccessToken)
+            request = send(self.access_token)
         if request.status_code != 200:
-            return None
-        else:
-            return toUnicode(request.text)
+            request.close()
+            if request.status_code == 401:
+                self._accessRefused()
+            raise _httpError(request, url)
+        return request
+
+    def get(self, url, parameters=None):
+        """
+        Convenience method for requesting to google with proper cookies/params.
+        """
+        return toUnicode(self._authorizedGet(url, parameters).text)
+
+    def getBytes(self, url, parameters=None):
+        return self._authorizedGet(url, parameters).content
+
+    def getStream(self, url, parameters=None, chunkSize=65536):
+        request = self._authorizedGet(url, parameters, stream=True)
+        return self._iterResponse(request, chunkSize)
 
     def post(self, url, postParameters=None, urlParameters=None):
         """
         Convenience method for requesting to google with proper cookies/params.
+
+        A refused access or action token is refreshed and the request retried
+        once, a request failing after that raises IOError.
         """
-        if not self.access_token:
-            raise IOError("No authorized client available.")
-        if not self.action_token:
-            raise IOError("Need to generate action token.")
+        self._freshAccessToken()
+        self._refreshActionToken()
         if urlParameters is None:
             urlParameters = {}
-        headers = {'Authorization': 'Bearer ' + self.access_token,
-                   'Content-Type': 'application/x-www-form-urlencoded'}
-        postParameters.update({'T':self.action_token})
-        request = requests.post(url + '?' + self.getParameters(urlParameters),
-                                data=postParameters, headers=headers)
+        url = url + '?' + self.getParameters(urlParameters)
+
+        def send(accessToken, actionToken):
+            headers = {'Authorization': 'Bearer ' + accessToken,
+                       'Content-Type': 'application/x-www-form-urlencoded'}
+            postParameters.update({'T': actionToken})
+            return self.pool.post(url, data=postParameters, headers=headers)
+
+        used = (self.access_token, self.action_token)
+        request = send(*used)
+        if request.status_code == 401:
+            request.close()
+            if request.headers.get('X-Reader-Google-Bad-Token') == 'true':
+                self._refreshUnlessReplaced(lambda: self.action_token, used[1], self.setActionToken)
+                request = send(self.access_token, self.action_token)
+            elif self.refresh_token:
+                self._refreshUnlessReplaced(lambda: self.access_token, used[0], self.refreshAccessToken)
+                request = send(self.access_token, self.action_token)
         if request.status_code != 200:
-            return None
-        else:
-            return toUnicode(request.text)
+            request.close()
+            if request.status_code == 401:
+                self._accessRefused()
+            raise _httpError(request, url)
+        return toUnicode(request.text)
 
 class GAPDecoratorAuthMethod(AuthenticationMethod):
     """
     An adapter to work with Google API for Python OAuth2 wrapper.
     Especially useful when deploying to Google AppEngine.
     """
-    def __init__(self, credentials):
+    def __init__(self, credentials, tokenStore=None, tokenKey=None):
         """
         Initialize auth method with existing credentials.
         Args:
             credentials: OAuth2 credentials obtained via GAP OAuth2 library.
+            tokenStore: TokenStore the action token is kept in.
+            tokenKey: key of the action token in tokenStore, one per user,
+                required with a tokenStore.
         """
         if not has_httplib2:
             raise ImportError("No module named httplib2")
-        super(GAPDecoratorAuthMethod, self).__init__()
+        if tokenStore is not None and tokenKey is None:
+            raise ValueError("GAPDecoratorAuthMethod needs a tokenKey per user with a tokenStore")
+        super(GAPDecoratorAuthMethod, self).__init__(
+            tokenStore=tokenStore,
+            tokenKey=tokenKey)
         self._http = None
         self._credentials = credentials
-        self._action_token = None
+        tokens = self._loadTokens()
+        self._action_token = tokens.get('action')
+        self._actionTokenExpires = tokens.get('actionExpires')
+
+    def _setActionToken(self):
+        self._action_token = self.get(ReaderUrl.ACTION_TOKEN_URL)
+        if isinstance(self._action_token, bytes):
+            self._action_token = self._action_token.decode('utf-8')
+        self._actionTokenExpires = time.time() + self.ACTION_TOKEN_TTL
+        self._saveTokens(action=self._action_token, actionExpires=self._actionTokenExpires)
+
+    def tokenExpiries(self):
+        # the credentials refresh the access token themselves
+        return [self._actionTokenExpires] if self._action_token and self._actionTokenExpires else []
+
+    def refreshExpiring(self, margin=0):
+        if (self._action_token is not None and self._actionTokenExpires and
+                self._actionTokenExpires - margin <= time.time()):
+            self._refreshUnlessReplaced(lambda: self._action_token, self._action_token,
+                                        self._setActionToken)
 
     def _setupHttp(self):
         """
@@ -376,12 +698,19 @@ class GAPDecoratorAuthMethod(AuthenticationMethod):
         Implement libgreader's interface for authenticated POST request
         """
         if self._action_token == None:
-            self._action_token = self.get(ReaderUrl.ACTION_TOKEN_URL)
+            self._refreshUnlessReplaced(lambda: self._action_token, None, self._setActionToken)
+        self.refreshExpiring()
 
         if self._http == None:
             self._setupHttp()
         uri = url + "?" + self.getParameters(urlParameters)
         postParameters.update({'T':self._action_token})
         body = self.postParameters(postParameters)
+        used = self._action_token
         response, content = self._http.request(uri, "POST", body=body)
+        if response.status == 401 and response.get('x-reader-google-bad-token') == 'true':
+            self._refreshUnlessReplaced(lambda: self._action_token, used, self._setActionToken)
+            postParameters.update({'T':self._action_token})
+            body = self.postParameters(postParameters)
+            response, content = self._http.request(uri, "POST", body=body)
         return content
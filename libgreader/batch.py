@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+
+try:
+    import numpy
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
+from .items import _DECODED, _decodeState
+
+try:
+    array('q')
+    _TIME_CODE = 'q'
+except ValueError:
+    # Python 2 arrays have no long long
+    _TIME_CODE = 'l'
+
+class ItemBatch(object):
+    """
+    Columnar copy of loaded items, for analytics over many of them without
+    touching Item objects.
+
+    Columns are arrays, one value per item: times (crawl time in seconds,
+    -1 when unknown), feeds (index in feedIds), flags (READ, STARRED and
+    SHARED bits), titles and authors (index in strings, -1 for none). Ids
+    are kept in a list.
+
+    With numpy installed, column() returns numpy arrays sharing the memory
+    of the columns, and select() and countBy() run vectorized; without it
+    they loop over the arrays.
+
+        batch = readingList.toArray()
+        recent = batch.select(read=False, since=time.time() - 3600)
+        print batch.countBy('feeds', recent)
+    """
+    READ    = 1
+    STARRED = 2
+    SHARED  = 4
+
+    COLUMNS = ('times', 'feeds', 'flags', 'titles', 'authors')
+
+    def __repr__(self):
+        return "<ItemBatch %d items, %d feeds>" % (len(self), len(self.feedIds))
+
+    def __init__(self):
+        self.ids      = []
+        self.times    = array(_TIME_CODE)
+        self.feeds    = array('i')
+        self.flags    = array('B')
+        self.titles   = array('i')
+        self.authors  = array('i')
+        self.feedIds  = []
+        self.strings  = []
+        self._feedIndex   = {}
+        self._stringIndex = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def fromItems(cls, items):
+        """
+        :param items: iterable of Item, their current read/starred/shared
+            state is copied
+        """
+        batch = cls()
+        batch.extend(items)
+        return batch
+
+    def _feed(self, feedId):
+        index = self._feedIndex.get(feedId)
+        if index is None:
+            index = self._feedIndex[feedId] = len(self.feedIds)
+            self.feedIds.append(feedId)
+        return index
+
+    def _string(self, string):
+        if string is None:
+            return -1
+        index = self._stringIndex.get(string)
+        if index is None:
+            index = self._stringIndex[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+    def extend(self, items):
+        ids, times, feeds, flags = self.ids, self.times, self.feeds, self.flags
+        titles, authors = self.titles, self.authors
+        feed, string = self._feed, self._string
+        for item in items:
+            data = item.data
+            state = item._state
+            if not state & _DECODED:
+                state = _decodeState(item)
+            time = item.time
+            origin = data.get('origin') or {}
+            ids.append(item.id)
+            times.append(-1 if time is None else time)
+            feeds.append(feed(origin.get('streamId')))
+            # read, starred and shared are the first tags, from the second bit on
+            flags.append((state >> 1) & 7)
+            titles.append(string(item.title))
+            authors.append(string(item.author))
+
+    def column(self, name):
+        """
+        The named column, as a numpy array when numpy is installed.
+        """
+        values = getattr(self, name)
+        if has_numpy:
+            return numpy.frombuffer(values, dtype=values.typecode) if len(values) else \
+                   numpy.zeros(0, dtype=values.typecode)
+        return values
+
+    def take(self, indexes):
+        """
+        A new ItemBatch of the rows at indexes, sharing the feed and string
+        tables.
+        """
+        batch = ItemBatch()
+        batch.feedIds, batch._feedIndex = self.feedIds, self._feedIndex
+        batch.strings, batch._stringIndex = self.strings, self._stringIndex
+        batch.ids = [self.ids[index] for index in indexes]
+        for name in self.COLUMNS:
+            values = getattr(self, name)
+            setattr(batch, name, array(values.typecode, [values[index] for index in indexes]))
+        return batch
+
+    def _flagFilter(self, read, starred, shared):
+        mask = value = 0
+        for bit, wanted in ((self.READ, read), (self.STARRED, starred), (self.SHARED, shared)):
+            if wanted is not None:
+                mask |= bit
+                if wanted:
+                    value |= bit
+        return mask, value
+
+    def select(self, read=None, starred=None, shared=None, since=None, until=None, feeds=None):
+        """
+        Indexes of the rows matching every condition given.
+
+        :param read, starred, shared: (bool) wanted state
+        :param since, until: (int) bounds of the crawl time, in seconds
+        :param feeds: (iterable) feed ids the items must come from
+
+        Returns a numpy array with numpy installed, else an array('i').
+        """
+        mask, value = self._flagFilter(read, starred, shared)
+        wanted = None
+        if feeds is not None:
+            wanted = [self._feedIndex[feedId] for feedId in feeds if feedId in self._feedIndex]
+        if has_numpy:
+            return self._selectNumpy(mask, value, since, until, wanted)
+
+        wantedSet = None if wanted is None else set(wanted)
+        selected = array('i')
+        for index, (time, feed, flags) in enumerate(zip(self.times, self.feeds, self.flags)):
+            if flags & mask != value:
+                continue
+            if since is not None and time < since:
+                continue
+            if until is not None and (time < 0 or time > until):
+                continue
+            if wantedSet is not None and feed not in wantedSet:
+                continue
+            selected.append(index)
+        return selected
+
+    def _selectNumpy(self, mask, value, since, until, wanted):
+        selected = numpy.ones(len(self), dtype=bool)
+        if mask:
+            selected &= (self.column('flags') & mask) == value
+        times = self.column('times')
+        if since is not None:
+            selected &= times >= since
+        if until is not None:
+            selected &= (times >= 0) & (times <= until)
+        if wanted is not None:
+            selected &= numpy.isin(self.column('feeds'), wanted)
+        return numpy.flatnonzero(selected)
+
+    def countBy(self, name, indexes=None):
+        """
+        Count rows per value of the feeds, titles or authors column, over the
+        rows at indexes or all of them.
+
+        Returns a dict of feed id or string -> count.
+        """
+        if name == 'feeds':
+            table = self.feedIds
+        elif name in ('titles', 'authors'):
+            table = self.strings
+        else:
+            raise ValueError("Can not count by %s" % name)
+        if has_numpy:
+            values = self.column(name)
+            if indexes is not None:
+                values = values[numpy.asarray(indexes, dtype=numpy.intp)]
+            values = values[values >= 0]
+            counts = numpy.bincount(values, minlength=0) if len(values) else []
+            return dict((table[value], int(count)) for value, count in enumerate(counts) if count)
+        values = getattr(self, name)
+        if indexes is not None:
+            values = [values[index] for index in indexes]
+        counts = {}
+        for value in values:
+            if value >= 0:
+                key = table[value]
+                counts[key] = counts.get(key, 0) + 1
+        return counts
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import threading
+import time
+
+try:
+    from collections import OrderedDict
+    has_ordereddict = True
+except ImportError:
+    try:
+        # Python 2.6 needs the ordereddict backport
+        from ordereddict import OrderedDict
+        has_ordereddict = True
+    except ImportError:
+        has_ordereddict = False
+
+from requests.compat import urlencode
+
+from .url import ReaderUrl
+
+class ResponseCache(object):
+    """
+    Base class for the caches GoogleReader.httpGet can keep responses in.
+
+    Entries are keyed on the account, the url and its parameters, sorted
+    and without the 'ck' cache buster, and expire after a TTL chosen by url
+    prefix. Posts which change tags, read state or subscriptions drop the
+    entries of their account they make stale. Subclasses provide the
+    storage, with an LRU bound of maxEntries.
+
+    The account is a string identifying whose data a response is, every
+    'user/-/' url reads the same for all users. A cache shared by the
+    readers of several accounts must be given one per account, see
+    GoogleReader.cacheAccount.
+    """
+    DEFAULT_TTL = 30
+
+    def __init__(self, maxEntries=1000, ttl=None, ttls=None):
+        """
+        :param maxEntries: (int) least recently used entries are evicted past it
+        :param ttl: (float) seconds entries are kept for urls not in ttls
+        :param ttls: (dict) url prefix -> seconds, overriding defaultTtls()
+        """
+        self.maxEntries = maxEntries
+        self.ttl        = ttl if ttl is not None else self.DEFAULT_TTL
+        self.ttls       = self.defaultTtls()
+        self.ttls.update(ttls or {})
+        self._lock      = threading.Lock()
+
+    def defaultTtls(self):
+        return {
+            ReaderUrl.USER_INFO_URL:         300,
+            ReaderUrl.SUBSCRIPTION_LIST_URL: 60,
+            ReaderUrl.UNREAD_COUNT_URL:      5,
+            ReaderUrl.CONTENT_BASE_URL:      30,
+        }
+
+    def invalidatedBy(self, url):
+        """
+        Url prefixes of the GET responses a POST to url makes stale, None for
+        all of them.
+        """
+        tags = [ReaderUrl.CONTENT_BASE_URL, ReaderUrl.UNREAD_COUNT_URL]
+        return {
+            ReaderUrl.EDIT_TAG_URL:          tags,
+            ReaderUrl.MARK_ALL_READ_URL:     tags,
+            ReaderUrl.SUBSCRIPTION_EDIT_URL: tags + [ReaderUrl.SUBSCRIPTION_LIST_URL],
+        }.get(url)
+
+    def key(self, url, parameters=None, account=None):
+        parameters = sorted((k, v) for k, v in (parameters or {}).items() if k != 'ck')
+        return self._scope(account) + url + '?' + urlencode(parameters, True)
+
+    def _scope(self, account):
+        """
+        Prefix of the keys of an account.
+        """
+        return account + ' ' if account else ''
+
+    def ttlFor(self, url):
+        best = None
+        for prefix in self.ttls:
+            if url.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.ttls[best] if best is not None else self.ttl
+
+    def get(self, url, parameters=None, account=None):
+        """
+        Returns the cached response or None.
+        """
+        key = self.key(url, parameters, account)
+        with self._lock:
+            entry = self._load(key)
+            if entry is None:
+                return None
+            expires, response = entry
+            if expires < time.time():
+                self._delete(key)
+                return None
+            return response
+
+    def put(self, url, parameters, response, account=None):
+        ttl = self.ttlFor(url)
+        if ttl <= 0 or response is None:
+            return
+        with self._lock:
+            self._store(self.key(url, parameters, account), url, time.time() + ttl, response)
+
+    def invalidate(self, postUrl, account=None):
+        """
+        Drop the entries of account which a POST to postUrl makes stale.
+        """
+        prefixes = self.invalidatedBy(postUrl)
+        scope = self._scope(account)
+        with self._lock:
+            if prefixes is None and not scope:
+                self._clear()
+            elif prefixes is None:
+                self._deletePrefix(scope)
+            else:
+                for prefix in prefixes:
+                    self._deletePrefix(scope + prefix)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _load(self, key):
+        raise NotImplementedError
+
+    def _store(self, key, url, expires, response):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+    def _deletePrefix(self, prefix):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+class MemoryCache(ResponseCache):
+    """
+    In-process ResponseCache.
+    """
+    def __init__(self, maxEntries=1000, ttl=None, ttls=None):
+        if not has_ordereddict:
+            raise ImportError("No module named ordereddict")
+        super(MemoryCache, self).__init__(maxEntries, ttl, ttls)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._entries[key] = entry
+        return entry
+
+    def _store(self, key, url, expires, response):
+        self._entries.pop(key, None)
+        self._entries[key] = (expires, response)
+        while len(self._entries) > self.maxEntries:
+            self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        self._entries.pop(key, None)
+
+    def _deletePrefix(self, prefix):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+    def _clear(self):
+        self._entries.clear()
+
+class DiskCache(ResponseCache):
+    """
+    ResponseCache kept in an SQLite file, so it survives restarts and can
+    be shared by processes.
+    """
+    def __init__(self, path, maxEntries=10000, ttl=None, ttls=None):
+        """
+        :param path: (str) SQLite database file, created if needed
+        """
+        super(DiskCache, self).__init__(maxEntries, ttl, ttls)
+        self.path = path
+        self._db  = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key      TEXT PRIMARY KEY,
+                expires  REAL NOT NULL,
+                lastUsed REAL NOT NULL,
+                response TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_lru ON responses (lastUsed);
+        """)
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def _load(self, key):
+        row = self._db.execute("SELECT expires, response FROM responses WHERE key = ?",
+                               (key,)).fetchone()
+        if row is not None:
+            with self._db:
+                self._db.execute("UPDATE responses SET lastUsed = ? WHERE key = ?",
+                                 (time.time(), key))
+        return row
+
+    def _store(self, key, url, expires, response):
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                             (key, expires, time.time(), response))
+            self._db.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses"
+                             " ORDER BY lastUsed DESC LIMIT -1 OFFSET ?)", (self.maxEntries,))
+
+    def _delete(self, key):
+        with self._db:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _deletePrefix(self, prefix):
+        with self._db:
+            self._db.execute("DELETE FROM responses WHERE substr(key, 1, ?) = ?",
+                             (len(prefix), prefix))
+
+    def _clear(self):
+        with self._db:
+            self._db.execute("DELETE FROM responses")
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+try:
+    import json
+except:
+    import simplejson as json
+
+try:
+    import orjson
+    has_orjson = True
+except ImportError:
+    has_orjson = False
+
+class StdlibDecoder(object):
+    """
+    Decodes Reader API responses with the json module. Bytes are taken as
+    UTF-8, the encoding of JSON, instead of letting the HTTP library guess
+    the charset of the whole body.
+    """
+    def loads(self, data):
+        """
+        :param data: (bytes or str) JSON document
+        """
+        if isinstance(data, bytes):
+            data = data.decode('utf-8', 'replace')
+        return json.loads(data, strict=False)
+
+class OrjsonDecoder(StdlibDecoder):
+    """
+    Decodes with orjson, several times faster than the json module on large
+    stream pages. orjson rejects control characters in strings and invalid
+    UTF-8, which Reader responses may contain, those documents are handed to
+    the lenient stdlib decoder.
+    """
+    def __init__(self):
+        if not has_orjson:
+            raise ImportError("No module named orjson")
+
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return super(OrjsonDecoder, self).loads(data)
+
+def defaultDecoder():
+    """
+    The fastest decoder available.
+    """
+    if has_orjson:
+        return OrjsonDecoder()
+    return StdlibDecoder()
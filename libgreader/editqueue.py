@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from .url import ReaderUrl
+
+class TagEdit(object):
+    """
+    One queued state change. Its result is known once the queue is flushed.
+    """
+    def __repr__(self):
+        return "<TagEdit %s %s %s %s>" % (self.action, self.tag, self.itemId,
+                                          'done' if self.done else 'pending')
+
+    def __init__(self, action, tag, itemId=None, streamId=None):
+        """
+        :param action: 'a' to add the tag, 'r' to remove it, or 'mark-all-read'
+        :param tag: (str) tag in the form "user/-/label/[tag]"
+        :param itemId: (str) edited item, None for mark-all-read
+        :param streamId: (str) item's parent stream, or the stream marked read
+        """
+        self.action    = action
+        self.tag       = tag
+        self.itemId    = itemId
+        self.streamId  = streamId
+        self.result    = None
+        self.error     = None
+        self.cancelled = False
+        self.created   = time.time()
+        self._done     = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def ok(self):
+        """
+        True if the request went through, or was cancelled by an opposite edit.
+        """
+        return self.error is None and bool(self.result) and self.result.upper() == 'OK'
+
+    def wait(self, timeout=None):
+        """
+        Block until the edit is sent and return the response, raising the
+        error of the request if it failed.
+        """
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def _finish(self, result=None, error=None, cancelled=False):
+        self.result    = result
+        self.error     = error
+        self.cancelled = cancelled
+        self._done.set()
+
+class EditQueue(object):
+    """
+    Write-behind queue for item tag edits and mark-all-read requests.
+
+    Edits are held back and coalesced: a second identical edit rides along
+    with the first, and marking a stream read twice sends a single request.
+    Of opposite edits of the same tag on the same item only the last one is
+    sent, or none when it brings the item back to the state it had before
+    the first one and no stream was marked read in between. Pending edits
+    are sent in the order they were queued, the ones between two
+    mark-all-read requests grouped by tag in edit-tag requests of at most
+    batchSize items, when maxPending edits are waiting, when the oldest one
+    is maxAge seconds old, or on flush().
+    """
+    def __init__(self, googleReader, maxPending=250, maxAge=None, batchSize=250):
+        """
+        :param maxPending: (int) flush when this many edits are waiting
+        :param maxAge: (float) flush when the oldest edit waited that many
+            seconds, checked on a background timer. None to disable.
+        :param batchSize: (int) max number of items per edit-tag request
+        """
+        self.googleReader = googleReader
+        self.maxPending   = maxPending
+        self.maxAge       = maxAge
+        self.batchSize    = batchSize
+        self._pending     = {} # key -> edits, the last one decides what is sent
+        self._order       = []
+        self._before      = {} # key -> (tag state before the first edit, marks then)
+        self._tagsByItem  = {} # item id -> tags with pending edits
+        self._marks       = 0  # mark-all-read requests queued so far
+        self._lock        = threading.RLock()
+        self._timer       = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def addTag(self, item, tag, present=None):
+        """
+        :param present: (bool) whether the item had the tag before, None if
+            unknown
+        """
+        return self._queue('a', tag, item.id, item.parent.id, present)
+
+    def removeTag(self, item, tag, present=None):
+        return self._queue('r', tag, item.id, item.parent.id, present)
+
+    def pendingTags(self, itemId):
+        """
+        (tag, present) of the item edits waiting to be sent for itemId.
+        """
+        with self._lock:
+            tags = self._tagsByItem.get(itemId)
+            if not tags:
+                return []
+            return [(tag, self._pending[(tag, itemId)][-1].action == 'a') for tag in tags]
+
+    def markAllRead(self, container):
+        return self._queue('mark-all-read', None, None, container.id)
+
+    def _queue(self, action, tag, itemId, streamId, present=None):
+        edit = TagEdit(action, tag, itemId, streamId)
+        key = (tag, itemId or streamId)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = [edit]
+                self._order.append(key)
+                self._before[key] = (present, self._marks)
+                if itemId is not None:
+                    self._tagsByItem.setdefault(itemId, set()).add(tag)
+            else:
+                present, marks = self._before[key]
+                if (pending[-1].action != action and present == (action == 'a')
+                        and marks == self._marks):
+                    # back to the state before the first edit, nothing to send
+                    del self._pending[key]
+                    del self._before[key]
+                    self._order.remove(key)
+                    self._tagsByItem[itemId].discard(tag)
+                    for cancelled in pending + [edit]:
+                        cancelled._finish('OK', cancelled=True)
+                    return edit
+                pending.append(edit)
+                if marks != self._marks:
+                    # sent after the mark-all-read requests queued since
+                    self._order.remove(key)
+                    self._order.append(key)
+            if action == 'mark-all-read':
+                self._marks += 1
+            full = len(self._pending) >= self.maxPending
+            if not full and self.maxAge is not None and self._timer is None:
+                self._timer = threading.Timer(self.maxAge, self._flushOnAge)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+        return edit
+
+    def _flushOnAge(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self):
+        """
+        Send every pending edit. Errors are stored on the TagEdits.
+
+        Returns the list of TagEdits sent.
+        """
+        with self._lock:
+            pending, order = self._pending, self._order
+            self._pending, self._order, self._before = {}, [], {}
+            self._tagsByItem = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        batches = {}
+        batchOrder = []
+        sent = []
+        for key in order:
+            edits = pending[key]
+            sent.extend(edits)
+            last = edits[-1]
+            if last.action == 'mark-all-read':
+                # the edits queued before it go first
+                self._sendBatches(batches, batchOrder)
+                batches, batchOrder = {}, []
+                self._send(edits, ReaderUrl.MARK_ALL_READ_URL, {'s': last.streamId})
+                continue
+            batchKey = (last.action, last.tag)
+            if batchKey not in batches:
+                batches[batchKey] = []
+                batchOrder.append(batchKey)
+            batches[batchKey].append(edits)
+        self._sendBatches(batches, batchOrder)
+        return sent
+
+    def _sendBatches(self, batches, batchOrder):
+        """
+        Send edit-tag requests for lists of edits grouped by (action, tag).
+        """
+        for action, tag in batchOrder:
+            group = batches[(action, tag)]
+            for start in range(0, len(group), self.batchSize):
+                chunk = group[start:start + self.batchSize]
+                self._send([edit for edits in chunk for edit in edits],
+                           ReaderUrl.EDIT_TAG_URL,
+                           {'i': [edits[0].itemId for edits in chunk],
+                            's': [edits[0].streamId for edits in chunk],
+                            action: tag, 'ac': 'edit-tags'})
+
+    def _send(self, edits, url, parameters):
+        try:
+            result = self.googleReader.httpPost(url, parameters)
+        except Exception as e:
+            for edit in edits:
+                edit._finish(error=e)
+        else:
+            for edit in edits:
+                edit._finish(result)
@@ -1,14 +1,66 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import time
+import uuid
 
 try:
-    import json
-except:
-    import simplejson as json
+    from concurrent import futures
+    has_futures = True
+except ImportError:
+    # Python 2 needs the futures backport
+    has_futures = False
 
 from .url import ReaderUrl
-from .items import SpecialFeed, Item, Category, Feed
+from .items import SpecialFeed, ItemMap, Category, Feed, _READ
+from .jsonstream import StreamedContent
+from .editqueue import EditQueue, TagEdit
+from .hooks import Instrumentation, instrumented, _countChunks
+from .decoders import defaultDecoder
+from .tags import TagDictionary
+from .unread import UnreadCounter
+from .procdecode import decodePage, materialize
+
+class ContainerLoadResult(object):
+    """
+    Outcome of loading one container with GoogleReader.loadItemsForContainers
+    """
+    def __repr__(self):
+        return "<ContainerLoadResult %s ok=%s %.3fs>" % (self.container.id, self.ok, self.elapsed)
+
+    def __init__(self, container, error=None, elapsed=0.0):
+        """
+        :param container: (ItemsContainer) the Feed or Category loaded
+        :param error: (Exception) raised while loading, None on success
+        :param elapsed: (float) seconds spent fetching and building items
+        """
+        self.container = container
+        self.error     = error
+        self.ok        = error is None
+        self.elapsed   = elapsed
+
+class SubscriptionChanges(object):
+    """
+    What GoogleReader.syncSubscriptionList changed, as lists of Feed objects.
+    """
+    def __repr__(self):
+        return "<SubscriptionChanges +%d -%d retitled %d recategorized %d>" % (
+            len(self.added), len(self.removed), len(self.retitled), len(self.recategorized))
+
+    def __init__(self):
+        self.added         = []
+        self.removed       = []
+        self.retitled      = []
+        self.recategorized = []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.retitled or self.recategorized)
+    __nonzero__ = __bool__
+
+def _digest(response):
+    if not isinstance(response, bytes):
+        response = response.encode('utf-8')
+    return hashlib.sha1(response).digest()
 
 class GoogleReader(object):
     """
@@ -26,17 +78,115 @@ class GoogleReader(object):
     def __unicode__(self):
         return "<Google Reader object: %s>" % self.auth.username
 
-    def __init__(self, auth):
+    def __init__(self, auth, streamContent=False, itemStore=None, cache=None, decoder=None):
+        """
+        :param auth: (AuthenticationMethod)
+        :param streamContent: (bool) decode item pages while they download,
+            building Items one at a time instead of parsing the whole page
+        :param itemStore: (SQLiteItemStore) local store loaded items are
+            written to, and containers load from first
+        :param cache: (ResponseCache) cache for the responses of httpGet,
+            its entries are kept apart by cacheAccount
+        :param decoder: object whose loads() parses the JSON responses, from
+            bytes or str. OrjsonDecoder when orjson is installed, else
+            StdlibDecoder.
+        """
         self.auth           = auth
+        self.streamContent  = streamContent
+        self.itemStore      = itemStore
+        self.cache          = cache
+        # the auth method's tokenKey, else an id only this reader's entries use
+        self.cacheAccount   = getattr(auth, 'tokenKey', None) or uuid.uuid4().hex
+        self.decoder        = decoder if decoder is not None else defaultDecoder()
         self.feeds          = []
         self.categories     = []
         self.feedsById      = {}
         self.categoriesById = {}
+        self.itemsById      = ItemMap()
+        self.tagDictionary  = TagDictionary()
+        self.unreadCounter  = UnreadCounter(self)
+        self.decodeExecutor = None
+        self.decodeMinBytes = 0
         self.specialFeeds   = {}
         self.orphanFeeds    = []
-        self.userId         = None
         self.addTagBacklog  = {}
+        self._backlogByItem = None # item id -> tags of addTagBacklog, built when needed
         self.inItemTagTransaction   = False
+        self.editQueue      = None
+        self._subscribedIds = set()
+        self._unreadDigest  = None
+        self._subscriptionDigest = None
+        self.watermarks     = {}
+        self._builtAt       = None
+        self.instrumentation = Instrumentation()
+
+    @property
+    def userId(self):
+        """
+        Id of the user, None until getUserInfo() is called. Kept by the
+        TagDictionary, which tells the user's tags from other users' by it.
+        """
+        return self.tagDictionary.userId
+
+    @userId.setter
+    def userId(self, userId):
+        self.tagDictionary.setUserId(userId)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Send pending edits and release the HTTP connections held by the auth
+        method.
+        """
+        self.flush()
+        self.disableProcessDecoding()
+        close = getattr(self.auth, 'close', None)
+        if close is not None:
+            close()
+
+    def enableProcessDecoding(self, processes=None, minBytes=262144):
+        """
+        Decode item pages of at least minBytes in a pool of worker processes,
+        which reduce items to compact records the Items are built on, see
+        procdecode. Decoding then runs on as many cores as pages are fetched
+        concurrently, by loadItemsForContainers or iterItems prefetching.
+        Workers use the default decoder, not a custom one.
+
+        :param processes: (int) worker processes, one per core by default
+        :param minBytes: (int) smaller pages are decoded in this process,
+            sending them over costs more than it saves
+
+        Returns the ProcessPoolExecutor.
+        """
+        if not has_futures:
+            raise ImportError("No module named concurrent.futures")
+        self.disableProcessDecoding()
+        self.decodeExecutor = futures.ProcessPoolExecutor(max_workers=processes)
+        self.decodeMinBytes = minBytes
+        return self.decodeExecutor
+
+    def disableProcessDecoding(self):
+        """
+        Stop the decoding processes, pages are decoded in this process again.
+        """
+        if self.decodeExecutor is not None:
+            self.decodeExecutor.shutdown(wait=True)
+            self.decodeExecutor = None
+
+    def addHook(self, hook):
+        """
+        Call hook with a RequestEvent for every request made, once the call
+        which made it returns. RequestStats is a ready made aggregator.
+        """
+        self.instrumentation.addHook(hook)
+
+    def removeHook(self, hook):
+        self.instrumentation.removeHook(hook)
 
     def toJSON(self):
         """
@@ -71,6 +221,7 @@ class GoogleReader(object):
     def getSpecialFeed(self, type):
         return self.specialFeeds[type]
 
+    @instrumented
     def buildSubscriptionList(self):
         """
         Hits Google Reader for a users's alphabetically ordered list of feeds.
@@ -78,18 +229,27 @@ class GoogleReader(object):
         Returns true if succesful.
         """
         self._clearLists()
-        unreadById = {}
 
         if not self.userId:
             self.getUserInfo()
 
-        unreadJson = self.httpGet(ReaderUrl.UNREAD_COUNT_URL, { 'output': 'json', })
-        unreadCounts = json.loads(unreadJson, strict=False)['unreadcounts']
-        for unread in unreadCounts:
-            unreadById[unread['id']] = unread['count']
+        unreadJson = self.httpGetBytes(ReaderUrl.UNREAD_COUNT_URL, { 'output': 'json', })
+        feedsJson = self.httpGetBytes(ReaderUrl.SUBSCRIPTION_LIST_URL, { 'output': 'json', })
+        self._loadSubscriptionList(unreadJson, feedsJson)
 
-        feedsJson = self.httpGet(ReaderUrl.SUBSCRIPTION_LIST_URL, { 'output': 'json', })
-        subscriptions = json.loads(feedsJson, strict=False)['subscriptions']
+        return True
+
+    def _loadSubscriptionList(self, unreadJson, feedsJson):
+        """
+        Build feeds and categories from the unread-count and subscription/list
+        responses, shared by the blocking and asyncio readers.
+        """
+        self._unreadDigest = _digest(unreadJson)
+        self._subscriptionDigest = _digest(feedsJson)
+        unreadById = self._parseUnreadCounts(unreadJson, self.watermarks)
+
+        subscriptions = self._decodeJson(feedsJson)['subscriptions']
+        start = time.time()
 
         for sub in subscriptions:
             categories = []
@@ -121,18 +281,195 @@ class GoogleReader(object):
                 self.orphanFeeds.append(feed)
             self._addFeed(feed)
 
-        specialUnreads = [id for id in unreadById
-                            if id.find('user/%s/state/com.google/' % self.userId) != -1]
-        for type in self.specialFeeds:
-            feed = self.specialFeeds[type]
-            feed.unread = 0
-            for id in specialUnreads:
-                if id.endswith('/%s' % type):
-                    feed.unread = unreadById.get(id, 0)
-                    break
+        self._subscribedIds = set(self.feedsById)
+        self._setSpecialUnreads(unreadById)
+        self._seedWatermarks(start)
+        self.instrumentation.built(time.time() - start)
 
-        return True
+    @instrumented
+    def syncSubscriptionList(self):
+        """
+        Bring feeds and categories up to date with Google Reader without
+        rebuilding them: existing Feed and Category objects, and the items they
+        have loaded, are kept. Nothing is parsed when the responses are the
+        same as the last ones.
 
+        Returns a SubscriptionChanges.
+        """
+        if not self.userId:
+            self.getUserInfo()
+
+        unreadJson = self.httpGetBytes(ReaderUrl.UNREAD_COUNT_URL, { 'output': 'json', })
+        feedsJson = self.httpGetBytes(ReaderUrl.SUBSCRIPTION_LIST_URL, { 'output': 'json', })
+        return self._syncSubscriptionList(unreadJson, feedsJson)
+
+    def _syncSubscriptionList(self, unreadJson, feedsJson):
+        changes = SubscriptionChanges()
+        unreadDigest = _digest(unreadJson)
+        subscriptionDigest = _digest(feedsJson)
+        if unreadDigest == self._unreadDigest and subscriptionDigest == self._subscriptionDigest:
+            return changes
+
+        unreadById = self._parseUnreadCounts(unreadJson)
+        if subscriptionDigest != self._subscriptionDigest:
+            subscriptions = self._decodeJson(feedsJson)['subscriptions']
+        start = time.time()
+        if subscriptionDigest != self._subscriptionDigest:
+            self._reconcileSubscriptions(subscriptions, changes)
+            self._seedWatermarks(start)
+        self._setUnreads(unreadById)
+        self.instrumentation.built(time.time() - start)
+
+        self._unreadDigest = unreadDigest
+        self._subscriptionDigest = subscriptionDigest
+        return changes
+
+    def _reconcileSubscriptions(self, subscriptions, changes):
+        feeds = []
+        feedsById = {}
+        categoriesById = {}
+        for sub in subscriptions:
+            categories = []
+            for hCategory in sub.get('categories', []):
+                cId = hCategory['id']
+                category = self.categoriesById.get(cId)
+                if category is None:
+                    category = Category(self, hCategory['label'], cId)
+                    self._addCategory(category)
+                categoriesById[cId] = category
+                categories.append(category)
+
+            feed = self.feedsById.get(sub['id'])
+            if feed is None:
+                feed = Feed(self, sub['title'], sub['id'], sub.get('htmlUrl', None), 0, categories)
+                changes.added.append(feed)
+            else:
+                if feed.title != sub['title']:
+                    feed.title = sub['title']
+                    changes.retitled.append(feed)
+                if set(feed.categories) != set(categories):
+                    for category in list(feed.categories):
+                        if category not in categories:
+                            feed.removeCategory(category)
+                    for category in categories:
+                        feed.addCategory(category)
+                    changes.recategorized.append(feed)
+            feeds.append(feed)
+            feedsById[feed.id] = feed
+
+        subscribed = self._subscribedIds
+        for feed in self.feeds:
+            if feed.id not in feedsById:
+                for category in list(feed.categories):
+                    feed.removeCategory(category)
+                if feed.id in subscribed:
+                    changes.removed.append(feed)
+
+        self.feeds          = feeds
+        self.feedsById      = feedsById
+        self.categories     = [c for c in self.categories if c.id in categoriesById]
+        self.categoriesById = categoriesById
+        self.orphanFeeds    = [f for f in feeds if not f.categories]
+        self._subscribedIds = set(feedsById)
+
+    @instrumented
+    def refreshChanged(self, containers=None, excludeRead=False, loadLimit=20):
+        """
+        Fetch the items added to the streams which changed since they were
+        last seen, from one unread-count request: only the containers whose
+        newest item timestamp moved past their watermark are requested, with
+        since set to it. New items are added to the ones already loaded.
+
+        Watermarks are set by buildSubscriptionList and syncSubscriptionList
+        for every feed and category and moved here. Containers without one
+        are fetched from their last update, or from when the subscription
+        list was built. Unread counts are updated as by syncSubscriptionList.
+
+        :param containers: (list) Feeds, Categories or SpecialFeeds to watch,
+            every feed by default
+
+        Returns a dict of container -> list of new Items, for the containers
+        fetched.
+        """
+        if not self.userId:
+            self.getUserInfo()
+        if containers is None:
+            containers = self.feeds
+
+        unreadJson = self.httpGetBytes(ReaderUrl.UNREAD_COUNT_URL, { 'output': 'json', })
+        changed = {}
+        for container, since, newest in self._changedContainers(unreadJson, containers):
+            if since is not None:
+                changed[container] = container._loadNewItems(since, excludeRead, loadLimit)
+            self.watermarks[container.id] = newest
+        return changed
+
+    def _changedContainers(self, unreadJson, containers):
+        """
+        Update the unread counts from an unread-count response, and list the
+        containers whose watermark must move, as (container, since, newest)
+        tuples: since is the time to fetch new items from, None when there
+        is nothing to fetch.
+        """
+        newestById = {}
+        unreadById = self._parseUnreadCounts(unreadJson, newestById)
+        self._setUnreads(unreadById)
+        self._unreadDigest = _digest(unreadJson)
+
+        moved = []
+        for container in containers:
+            newest = newestById.get(container.id)
+            if newest is None:
+                continue
+            watermark = self.watermarks.get(container.id)
+            if watermark is None:
+                since = container.lastUpdated or self._builtAt or int(time.time())
+                moved.append((container, since, newest))
+            elif newest > watermark:
+                moved.append((container, watermark // 1000000, newest))
+            else:
+                moved.append((container, None, newest))
+        return moved
+
+    def _seedWatermarks(self, now):
+        """
+        Give the feeds and categories missing from the unread-count response,
+        which leaves out streams with nothing unread, a watermark at now.
+        """
+        self._builtAt = int(now)
+        watermark = int(now * 1000000)
+        watermarks = self.watermarks
+        for container in self.feeds + self.categories:
+            if container.id not in watermarks:
+                watermarks[container.id] = watermark
+
+    def _parseUnreadCounts(self, unreadJson, newestById=None):
+        """
+        Returns a dict of stream id -> unread count, and fills newestById with
+        the newest item timestamp of each stream, in microseconds.
+        """
+        unreadById = {}
+        unreadCounts = self._decodeJson(unreadJson)['unreadcounts']
+        for unread in unreadCounts:
+            unreadById[unread['id']] = unread['count']
+            if newestById is not None and 'newestItemTimestampUsec' in unread:
+                newestById[unread['id']] = int(unread['newestItemTimestampUsec'])
+        return unreadById
+
+    def _setUnreads(self, unreadById):
+        self.unreadCounter.seed(unreadById)
+        self._setSpecialUnreads(unreadById)
+
+    def _setSpecialUnreads(self, unreadById):
+        prefix = 'user/%s/state/com.google/' % self.userId
+        specialUnreads = {}
+        for id in unreadById:
+            if id.startswith(prefix):
+                specialUnreads[id[len(prefix):]] = unreadById[id]
+        for type in self.specialFeeds:
+            self.specialFeeds[type].unread = specialUnreads.get(type, 0)
+
+    @instrumented
     def _getFeedContent(self, url, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
         """
         A list of items (from a feed, a category or from URLs made with SPECIAL_ITEMS_URL)
@@ -147,7 +484,28 @@ class GoogleReader(object):
             - id (str)
             - content (dict with content and direction)
             - categories (list of categories including states or ones provided by the feed owner)
+
+        With streamContent on, the dict is a StreamedContent whose items are
+        decoded as they are iterated.
         """
+        parameters = self._feedContentParameters(excludeRead, continuation, loadLimit, since, until)
+        if self.streamContent:
+            return StreamedContent(self.httpGetStream(url, parameters))
+        contentJson = self.httpGetBytes(url, parameters)
+        if self.decodeExecutor is not None and len(contentJson) >= self.decodeMinBytes:
+            return self._decodeInProcess(contentJson)
+        return self._decodeJson(contentJson)
+
+    def _decodeInProcess(self, response):
+        """
+        Parse a stream/contents response in a decoding process.
+        """
+        start = time.time()
+        data = materialize(*self.decodeExecutor.submit(decodePage, response).result())
+        self.instrumentation.decoded(response, time.time() - start)
+        return data
+
+    def _feedContentParameters(self, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
         parameters = {}
         if excludeRead:
             parameters['xt'] = 'user/-/state/com.google/read'
@@ -158,15 +516,95 @@ class GoogleReader(object):
             parameters['ot'] = since
         if until:
             parameters['nt'] = until
-        contentJson = self.httpGet(url, parameters)
-        return json.loads(contentJson, strict=False)
+        return parameters
 
-    def itemsToObjects(self, parent, items):
-        objects = []
-        for item in items:
-            objects.append(Item(self, item, parent))
+    @instrumented
+    def loadItemsForContainers(self, containers, max_workers=8, excludeRead=False, loadLimit=20, since=None, until=None):
+        """
+        Same as calling loadItems() on every container, but the requests are
+        made concurrently on a pool of max_workers threads.
+
+        Responses are turned into Items on the calling thread, through each
+        container's _itemsLoadedDone, so the model is never touched by two
+        threads at once. With streamContent on, each worker still reads and
+        decodes its whole page, which is what is worth doing in parallel.
+
+        Unlike loadItems, containers are not restored from the item store:
+        each is loaded from Google Reader and replaces what was stored for it.
+
+        Returns a list of ContainerLoadResult, in the order of containers.
+        """
+        if not has_futures:
+            raise ImportError("No module named concurrent.futures")
+        containers = list(containers)
+        results = [None] * len(containers)
+
+        instrumentation = self.instrumentation
+
+        def fetch(container):
+            start = time.time()
+            if not instrumentation.hooks:
+                return self._fetchContent(container, excludeRead, loadLimit, since, until) + (start, [])
+            # events are finished on the calling thread, once Items are built
+            instrumentation.enter()
+            try:
+                return self._fetchContent(container, excludeRead, loadLimit, since, until) + (start, instrumentation.take())
+            finally:
+                instrumentation.exit()
+
+        store = self.itemStore
+        pool = futures.ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {}
+            for index, container in enumerate(containers):
+                container.clearItems()
+                container.lastLoadOk     = False
+                container.lastLoadLength = 0
+                if store is not None:
+                    store.clearStream(container.id)
+                pending[pool.submit(fetch, container)] = index
+            for future in futures.as_completed(pending):
+                index = pending[future]
+                container = containers[index]
+                data, error, start, events = future.result()
+                instrumentation.adopt(events)
+                if error is None:
+                    try:
+                        container._itemsLoadedDone(data, excludeRead)
+                    except Exception as e:
+                        error = e
+                results[index] = ContainerLoadResult(container, error, time.time() - start)
+                instrumentation.flush()
+        finally:
+            pool.shutdown(wait=True)
+        return results
+
+    def _fetchContent(self, container, excludeRead, loadLimit, since, until):
+        try:
+            data = container._getContent(excludeRead, None, loadLimit, since, until)
+            if isinstance(data, StreamedContent):
+                # download and decode the page on the worker, not while Items
+                # are built one container at a time
+                items = list(data.iterItems())
+                data = dict(data, items=items)
+            return data, None
+        except Exception as e:
+            return None, e
+
+    def itemsToObjects(self, parent, items, attach=True):
+        start = time.time()
+        objects = self.itemsById.build(self, items, parent, attach)
+        self.instrumentation.built(time.time() - start, len(objects))
         return objects
 
+    def _itemFor(self, record, parent, attach=True):
+        """
+        The Item of an item record: the one already built for its id, which
+        is attached to parent too, or a new one. Items are only kept in
+        itemsById while something else references them.
+        """
+        return self.itemsById.build(self, (record,), parent, attach)[0]
+
     def getFeedContent(self, feed, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
         """
         Return items for a particular feed
@@ -190,12 +628,45 @@ class GoogleReader(object):
 
         tag string must be in form "user/-/label/[tag]"
         """
+        had = self._applyItemTag(item, tag, False)
+        if self.editQueue is not None:
+            return self.editQueue.removeTag(item, tag, had)
         return self._modifyItemTag(item.id, 'r', tag)
 
+    def enableWriteBehind(self, maxPending=250, maxAge=None, batchSize=250):
+        """
+        Queue tag edits and mark-all-read requests instead of sending them
+        right away, see EditQueue. addItemTag, removeItemTag, markFeedAsRead
+        and the Item/container mark* methods then return a TagEdit.
+
+        Returns the EditQueue.
+        """
+        self.flush()
+        self.editQueue = EditQueue(self, maxPending, maxAge, batchSize)
+        return self.editQueue
+
+    def disableWriteBehind(self):
+        """
+        Send pending edits and go back to sending every edit right away.
+        """
+        self.flush()
+        self.editQueue = None
+
+    def flush(self):
+        """
+        Send the edits waiting in the write-behind queue, if enabled.
+
+        Returns the list of TagEdits sent.
+        """
+        if self.editQueue is None:
+            return []
+        return self.editQueue.flush()
+
     def beginAddItemTagTransaction(self):
         if self.inItemTagTransaction:
             raise Exception("Already in addItemTag transaction")
         self.addTagBacklog = {}
+        self._backlogByItem = None
         self.inItemTagTransaction = True
 
     def addItemTag(self, item, tag):
@@ -204,12 +675,15 @@ class GoogleReader(object):
 
         tag string must be in form "user/-/label/[tag]"
         """
+        had = self._applyItemTag(item, tag, True)
         if self.inItemTagTransaction:
             # XXX: what if item's parent is not a feed?
-            if not tag in self.addTagBacklog:
-                self.addTagBacklog[tag] = []                
-            self.addTagBacklog[tag].append({'i': item.id, 's': item.parent.id})
+            self.addTagBacklog.setdefault(tag, []).append({'i': item.id, 's': item.parent.id})
+            if self._backlogByItem is not None:
+                self._backlogByItem = None
             return "OK"
+        elif self.editQueue is not None:
+            return self.editQueue.addTag(item, tag, had)
         else:
             return self._modifyItemTag(item.id, 'a', tag)
 
@@ -222,12 +696,71 @@ class GoogleReader(object):
                 self.httpPost(ReaderUrl.EDIT_TAG_URL,
                     {'i': itemIds, 'a': tag, 'ac': 'edit-tags', 's': feedIds})
             self.addTagBacklog = {}
+            self._backlogByItem = None
             self.inItemTagTransaction = False
             return True
         else:
             raise Exception("Not in addItemTag transaction")
 
+    def _applyItemTag(self, item, tag, present):
+        """
+        Add or remove tag on the local Item, moving the unread counts when
+        it is the read tag, and save its state in the item store.
+
+        Returns whether the Item had the tag before, None when it is added
+        without the write-behind queue, the only one to need it.
+        """
+        bit = self.tagDictionary.bit(tag)
+        if bit == _READ:
+            self.unreadCounter.itemRead(item, present)
+        if present and self.editQueue is None:
+            item._addBit(bit)
+            had = None
+        else:
+            had = item._setBit(bit, present)
+        self._storeItemState(item)
+        return had
+
+    def _itemRefreshed(self, item):
+        """
+        Called when a loaded Item took a newer record: the edits not sent
+        yet win over the tags of the record.
+        """
+        if self.editQueue is not None:
+            for tag, present in self.editQueue.pendingTags(item.id):
+                item._setTag(tag, present)
+        if self.addTagBacklog:
+            if self._backlogByItem is None:
+                self._backlogByItem = {}
+                for tag, edits in self.addTagBacklog.items():
+                    for edit in edits:
+                        self._backlogByItem.setdefault(edit['i'], []).append(tag)
+            for tag in self._backlogByItem.get(item.id, ()):
+                item._setTag(tag, True)
+
+    def _storeItemState(self, item):
+        if self.itemStore is not None:
+            self.itemStore.putState(item)
+
+    def _editResult(self, result):
+        """
+        What the Item/container mark* methods return: whether the edit went
+        through, or the TagEdit when it was queued by the write-behind queue.
+        """
+        if isinstance(result, TagEdit):
+            return result
+        return result.upper() == 'OK'
+
+    def _asyncCall(self, container, method, *args):
+        """
+        Called by the container methods doing I/O: None for this reader, the
+        awaitable they return instead for the model of an AsyncGoogleReader.
+        """
+        return None
+
     def markFeedAsRead(self, feed):
+        if self.editQueue is not None:
+            return self.editQueue.markAllRead(feed)
         return self.httpPost(
             ReaderUrl.MARK_ALL_READ_URL,
             {'s': feed.id, })
@@ -268,12 +801,13 @@ class GoogleReader(object):
         else:
             return False
 
+    @instrumented
     def getUserInfo(self):
         """
         Returns a dictionary of user info that google stores.
         """
-        userJson = self.httpGet(ReaderUrl.USER_INFO_URL)
-        result = json.loads(userJson, strict=False)
+        userJson = self.httpGetBytes(ReaderUrl.USER_INFO_URL)
+        result = self._decodeJson(userJson)
         self.userId = result['userId']
         return result
 
@@ -285,17 +819,99 @@ class GoogleReader(object):
         timestamp = int(float(userinfo["signupTimeSec"]))
         return time.strftime("%m/%d/%Y %H:%M", time.gmtime(timestamp))
 
+    @instrumented
     def httpGet(self, url, parameters=None):
         """
-        Wrapper around AuthenticationMethod get()
-        """
-        return self.auth.get(url, parameters)
-
+        Wrapper around AuthenticationMethod get(), answered from the response
+        cache when there is one.
+        """
+        response = self.httpGetBytes(url, parameters)
+        if isinstance(response, bytes):
+            response = response.decode('utf-8')
+        return response
+
+    @instrumented
+    def httpGetBytes(self, url, parameters=None):
+        """
+        Like httpGet(), but returns the undecoded response body, for the
+        decoder to parse.
+        """
+        event = self.instrumentation.open('GET', url, parameters)
+        if event is None:
+            return self._cachedGet(url, parameters)
+        start = time.time()
+        try:
+            response = self._cachedGet(url, parameters, event)
+        except Exception as e:
+            event._failed(e)
+            raise
+        finally:
+            event.networkTime = time.time() - start
+        event._received(response)
+        return response
+
+    def _cachedGet(self, url, parameters=None, event=None):
+        if self.cache is None:
+            return self.auth.getBytes(url, parameters)
+        response = self.cache.get(url, parameters, self.cacheAccount)
+        if response is None:
+            key = dict(parameters or {})
+            response = self.auth.getBytes(url, parameters)
+            self.cache.put(url, key, response, self.cacheAccount)
+        elif event is not None:
+            event.cached = True
+        return response
+
+    @instrumented
+    def httpGetStream(self, url, parameters=None):
+        """
+        Wrapper around AuthenticationMethod getStream()
+        """
+        event = self.instrumentation.open('GET', url, parameters)
+        if event is None:
+            return self.auth.getStream(url, parameters)
+        start = time.time()
+        try:
+            chunks = self.auth.getStream(url, parameters)
+        except Exception as e:
+            event._failed(e)
+            raise
+        finally:
+            event.networkTime = time.time() - start
+        event.status = 200
+        return _countChunks(chunks, event)
+
+    @instrumented
     def httpPost(self, url, post_parameters=None):
         """
         Wrapper around AuthenticationMethod post()
         """
-        return self.auth.post(url, post_parameters)
+        if self.cache is not None:
+            self.cache.invalidate(url, self.cacheAccount)
+        event = self.instrumentation.open('POST', url, post_parameters)
+        if event is None:
+            return self.auth.post(url, post_parameters)
+        start = time.time()
+        try:
+            response = self.auth.post(url, post_parameters)
+        except Exception as e:
+            event._failed(e)
+            raise
+        finally:
+            event.networkTime = time.time() - start
+        event._received(response)
+        return response
+
+    def _decodeJson(self, response):
+        """
+        Parse a JSON response, timing it for the hooks.
+        """
+        if not self.instrumentation.hooks:
+            return self.decoder.loads(response)
+        start = time.time()
+        data = self.decoder.loads(response)
+        self.instrumentation.decoded(response, time.time() - start)
+        return data
 
     def _addFeed(self, feed):
         if feed.id not in self.feedsById:
@@ -322,3 +938,8 @@ class GoogleReader(object):
         self.categoriesById = {}
         self.categories     = []
         self.orphanFeeds    = []
+        self._subscribedIds = set()
+        self._unreadDigest  = None
+        self._subscriptionDigest = None
+        self.watermarks     = {}
+        self.unreadCounter.clear()
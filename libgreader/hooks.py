@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import functools
+import threading
+import time
+import warnings
+
+from requests.compat import unquote
+
+from .url import ReaderUrl
+
+class RequestEvent(object):
+    """
+    What one request to Google Reader cost, reported to the hooks of a
+    GoogleReader once the call that made it returns.
+
+    networkTime covers the request and reading the response, decodeTime the
+    JSON parsing and buildTime turning it into Feeds, Categories or Items.
+    With streamContent on, item pages are parsed while Items are built, so
+    their decode time is part of buildTime.
+    """
+    def __repr__(self):
+        return "<RequestEvent %s %s %s>" % (self.method, self.endpoint, self.status)
+
+    def __init__(self, method, url, parameters=None):
+        self.method      = method
+        self.url         = url
+        self.endpoint, self.streamId = _splitUrl(url, parameters)
+        self.status      = None
+        self.error       = None
+        self.cached      = False
+        self.bytes       = 0
+        self.networkTime = 0.0
+        self.decodeTime  = 0.0
+        self.buildTime   = 0.0
+        self.itemCount   = 0
+        self.started     = time.time()
+        self._response   = None
+
+    @property
+    def totalTime(self):
+        return self.networkTime + self.decodeTime + self.buildTime
+
+    def _received(self, response):
+        self.status = 200
+        self._response = response
+        if response is not None:
+            self.bytes = len(response if isinstance(response, bytes) else response.encode('utf-8'))
+
+    def _failed(self, error):
+        self.status = getattr(error, 'status', None)
+        self.error = error
+
+def _splitUrl(url, parameters):
+    """
+    (endpoint, streamId) of a Reader API url, the endpoint being the path
+    after the API url.
+    """
+    if url.startswith(ReaderUrl.CONTENT_BASE_URL):
+        return ReaderUrl.CONTENT_PART_URL.rstrip('/'), unquote(url[len(ReaderUrl.CONTENT_BASE_URL):])
+    endpoint = url[len(ReaderUrl.API_URL):] if url.startswith(ReaderUrl.API_URL) else url
+    streamId = (parameters or {}).get('s')
+    if isinstance(streamId, (list, tuple)):
+        streamId = None
+    return endpoint, streamId
+
+def _countChunks(chunks, event):
+    """
+    Pass chunks of a streamed response through, adding their size and the
+    time spent waiting for them to event.
+    """
+    chunks = iter(chunks)
+    while True:
+        start = time.time()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            event.networkTime += time.time() - start
+            return
+        event.networkTime += time.time() - start
+        event.bytes += len(chunk)
+        yield chunk
+
+class Instrumentation(object):
+    """
+    Hooks of a GoogleReader, and the events of the calls in progress.
+
+    Events are collected per thread while a public call runs, the decode and
+    build steps attach their time to them, and they are handed to every hook
+    when the outermost instrumented call returns. Without hooks, nothing is
+    collected.
+    """
+    def __init__(self):
+        self.hooks  = []
+        self._local = threading.local()
+
+    def addHook(self, hook):
+        if hook not in self.hooks:
+            self.hooks = self.hooks + [hook]
+
+    def removeHook(self, hook):
+        self.hooks = [other for other in self.hooks if other != hook]
+
+    def _state(self):
+        local = self._local
+        if not hasattr(local, 'events'):
+            local.depth  = 0
+            local.events = []
+            local.last   = None
+        return local
+
+    def enter(self):
+        self._state().depth += 1
+
+    def exit(self):
+        state = self._state()
+        state.depth -= 1
+        if state.depth <= 0:
+            state.depth = 0
+            self.flush()
+
+    def open(self, method, url, parameters=None):
+        """
+        Start the event of a request, None when there are no hooks.
+        """
+        if not self.hooks:
+            return None
+        event = RequestEvent(method, url, parameters)
+        state = self._state()
+        state.events.append(event)
+        state.last = event
+        return event
+
+    def decoded(self, response, elapsed):
+        """
+        Attach the time spent parsing response to the event it came from.
+        """
+        if not self.hooks:
+            return
+        state = self._state()
+        for event in reversed(state.events):
+            if event._response is response:
+                event.decodeTime += elapsed
+                state.last = event
+                return
+
+    def built(self, elapsed, count=0):
+        """
+        Attach the time spent building objects to the last event decoded.
+        """
+        if not self.hooks:
+            return
+        event = self._state().last
+        if event is not None:
+            event.buildTime += elapsed
+            event.itemCount += count
+
+    def take(self):
+        """
+        Remove and return the events of this thread, to be adopted by the
+        thread which finishes processing their responses.
+        """
+        state = self._state()
+        events, state.events, state.last = state.events, [], None
+        return events
+
+    def adopt(self, events):
+        if events:
+            state = self._state()
+            state.events.extend(events)
+            state.last = events[-1]
+
+    def flush(self):
+        """
+        Hand the events of this thread to the hooks.
+        """
+        for event in self.take():
+            self.report(event)
+
+    def report(self, event):
+        """
+        Hand one event to the hooks.
+        """
+        event._response = None
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                warnings.warn("Request hook %r failed: %s" % (hook, e), RuntimeWarning)
+
+def instrumented(method):
+    """
+    Report the requests made by a GoogleReader or ItemsContainer method once
+    it returns.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = getattr(self, 'googleReader', self).instrumentation
+        if not instrumentation.hooks:
+            return method(self, *args, **kwargs)
+        instrumentation.enter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            instrumentation.exit()
+    return wrapper
+
+class RequestStats(object):
+    """
+    Hook aggregating events per endpoint: request, error and cache hit
+    counters, bytes and items, time spent per step, and a histogram of the
+    network latency.
+
+        stats = RequestStats()
+        reader.addHook(stats)
+        ...
+        print stats.summary()
+    """
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=None):
+        """
+        :param buckets: (tuple) upper bounds of the latency histogram, in seconds
+        """
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._lock   = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def __call__(self, event):
+        with self._lock:
+            stats = self.endpoints.get(event.endpoint)
+            if stats is None:
+                stats = self.endpoints[event.endpoint] = {
+                    'requests': 0, 'errors': 0, 'cached': 0, 'bytes': 0, 'items': 0,
+                    'networkTime': 0.0, 'decodeTime': 0.0, 'buildTime': 0.0,
+                    'histogram': [0] * (len(self.buckets) + 1),
+                }
+            stats['requests']    += 1
+            stats['errors']      += event.error is not None
+            stats['cached']      += event.cached
+            stats['bytes']       += event.bytes
+            stats['items']       += event.itemCount
+            stats['networkTime'] += event.networkTime
+            stats['decodeTime']  += event.decodeTime
+            stats['buildTime']   += event.buildTime
+            stats['histogram'][bisect.bisect_left(self.buckets, event.networkTime)] += 1
+
+    def percentile(self, endpoint, fraction):
+        """
+        Upper bound of the bucket holding the given fraction of the network
+        latencies of endpoint, None past the last bucket or without requests.
+        """
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if not stats:
+                return None
+            histogram = list(stats['histogram'])
+            total = stats['requests']
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= fraction * total:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+    def summary(self):
+        """
+        Dict of endpoint -> totals, with mean times and the p50/p90/p99 latency
+        bucket bounds.
+        """
+        with self._lock:
+            endpoints = dict((endpoint, dict(stats)) for endpoint, stats in self.endpoints.items())
+        for endpoint, stats in endpoints.items():
+            requests = stats['requests']
+            for step in ('networkTime', 'decodeTime', 'buildTime'):
+                stats['mean' + step[0].upper() + step[1:]] = stats[step] / requests
+            for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+                stats[name] = self.percentile(endpoint, fraction)
+        return endpoints
@@ -1,8 +1,69 @@
 # -*- coding: utf-8 -*-
 
+import threading
+import weakref
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
 from requests.compat import quote
 
 from .url import ReaderUrl
+from .jsonstream import StreamedContent
+from .hooks import instrumented
+from .tags import TagDictionary
+
+def _pageItems(data):
+    """
+    Items of a stream/contents response, decoded lazily when it is streamed
+    """
+    if isinstance(data, StreamedContent):
+        return data.iterItems()
+    return data.get('items', [])
+
+def _prefetch(iterable, depth=1):
+    """
+    Iterate over iterable on a background thread, keeping up to depth
+    values ready ahead of the consumer. Errors are re-raised in the consumer.
+    """
+    done = object()
+    ready = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(value):
+        while not stop.is_set():
+            try:
+                ready.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for value in iterable:
+                if not put((value, None)):
+                    return
+        except Exception as e:
+            put((done, e))
+        else:
+            put((done, None))
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            value, error = ready.get()
+            if value is done:
+                if error is not None:
+                    raise error
+                return
+            yield value
+    finally:
+        stop.set()
 
 class ItemsContainer(object):
     """
@@ -14,8 +75,21 @@ class ItemsContainer(object):
         self.lastLoadOk     = False
         self.lastLoadLength = 0
         self.lastUpdated    = None
-        self.unread         = 0
         self.continuation   = None
+        self.retention      = None
+        self.loadedBytes    = 0
+        self._sizedItems    = 0
+
+    @property
+    def unread(self):
+        """
+        Unread count of the stream, kept by the UnreadCounter of the GoogleReader.
+        """
+        return self.googleReader.unreadCounter.get(self.id)
+
+    @unread.setter
+    def unread(self, count):
+        self.googleReader.unreadCounter.set(self.id, count)
 
     def _getContent(self, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
         """
@@ -24,36 +98,176 @@ class ItemsContainer(object):
         """
         return None
 
+    @instrumented
     def loadItems(self, excludeRead=False, loadLimit=20, since=None, until=None):
         """
         Load items and call itemsLoadedDone to transform data in objects
         """
+        awaitable = self.googleReader._asyncCall(self, 'loadItems', excludeRead, loadLimit, since, until)
+        if awaitable is not None:
+            return awaitable
         self.clearItems()
         self.loadtLoadOk    = False
         self.lastLoadLength = 0
-        self._itemsLoadedDone(self._getContent(excludeRead, None, loadLimit, since, until))
+        store = self.googleReader.itemStore
+        if store is not None:
+            if since is None and until is None and self._loadStoredItems(store, excludeRead, loadLimit):
+                return
+            store.clearStream(self.id)
+        self._itemsLoadedDone(self._getContent(excludeRead, None, loadLimit, since, until), excludeRead)
+
+    def _loadStoredItems(self, store, excludeRead, loadLimit):
+        """
+        Restore the items stored for this container, after fetching the ones
+        crawled since the newest of them.
 
+        Returns False when the container must be loaded from Google Reader:
+        nothing stored yet, or more than a page of new items.
+        """
+        state = store.getStreamState(self.id)
+        newest = store.newestCrawlTime(self.id)
+        if state is None or newest is None or state[2] != excludeRead:
+            return False
+        data = self._getContent(excludeRead, None, loadLimit, newest // 1000)
+        if data is None:
+            return False
+        newer = self.googleReader.itemsToObjects(self, _pageItems(data), attach=False)
+        if len(newer) >= loadLimit:
+            return False
+        store.putItems(self.id, newer)
+        reader = self.googleReader
+        for record, read, starred, shared in store.loadItems(self.id, excludeRead):
+            item = reader.itemsById.get(record['id'])
+            if item is not None:
+                # the loaded Item is at least as new as the stored record
+                item._attach(self)
+                continue
+            item = reader._itemFor(record, self)
+            item.read, item.starred, item.shared = read, starred, shared
+        self.continuation   = state[0]
+        self.lastUpdated    = data.get('updated', state[1])
+        self.lastLoadLength = len(self.items)
+        self.lastLoadOk     = True
+        self._retain()
+        return True
+
+    @instrumented
     def loadMoreItems(self, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
         """
         Load more items using the continuation parameters of previously loaded items.
         """
+        awaitable = self.googleReader._asyncCall(self, 'loadMoreItems', excludeRead, continuation,
+                                                 loadLimit, since, until)
+        if awaitable is not None:
+            return awaitable
         self.lastLoadOk     = False
         self.lastLoadLength = 0
         if not continuation and not self.continuation:
             return
-        self._itemsLoadedDone(self._getContent(excludeRead, continuation or self.continuation, loadLimit, since, until))
+        self._itemsLoadedDone(self._getContent(excludeRead, continuation or self.continuation, loadLimit, since, until), excludeRead)
 
-    def _itemsLoadedDone(self, data):
+    def iterItems(self, excludeRead=False, pageSize=20, prefetch=1, since=None, until=None):
+        """
+        Iterator over every item of the container, following continuation
+        tokens as the caller consumes them.
+
+        Up to prefetch pages are fetched in the background while the current
+        one is being consumed, 0 fetches each page only when needed. Items
+        are not kept in self.items, so memory stays bounded whatever the
+        size of the stream. Streamed pages are not prefetched: their
+        continuation comes after the items, and reading it ahead would
+        decode the whole page.
+        """
+        items = self.googleReader._asyncCall(self, 'iterItems', excludeRead, pageSize, prefetch, since, until)
+        if items is not None:
+            return items
+        return self._iterItems(excludeRead, pageSize, prefetch, since, until)
+
+    def _iterItems(self, excludeRead, pageSize, prefetch, since, until):
+        pages = self._iterPages(excludeRead, pageSize, since, until)
+        if prefetch and not self.googleReader.streamContent:
+            pages = _prefetch(pages, prefetch)
+        for data in pages:
+            for item in _pageItems(data):
+                yield self.googleReader._itemFor(item, self, attach=False)
+
+    def _iterPages(self, excludeRead=False, pageSize=20, since=None, until=None):
+        continuation = None
+        while True:
+            data = self._getContent(excludeRead, continuation, pageSize, since, until)
+            if data is None:
+                return
+            yield data
+            # after the items were consumed, a StreamedContent has read it by now
+            continuation = data.get('continuation', None)
+            if not continuation:
+                return
+
+    def _loadNewItems(self, since, excludeRead=False, loadLimit=20):
+        """
+        Fetch every item crawled since the given time, following
+        continuations, and add the ones not loaded yet to the container.
+
+        Returns the new Items.
+        """
+        objects = []
+        for data in self._iterPages(excludeRead, loadLimit, since):
+            objects.extend(self._newItemsLoaded(data))
+        self._newItemsDone(objects)
+        return objects
+
+    def _newItemsLoaded(self, data):
+        """
+        Add the items of a page not loaded yet, returns their Items.
+        """
+        fresh = [item for item in _pageItems(data) if item['id'] not in self.itemsById]
+        self.lastUpdated = data.get('updated', self.lastUpdated)
+        return self.googleReader.itemsToObjects(self, fresh)
+
+    def _newItemsDone(self, objects):
+        store = self.googleReader.itemStore
+        if store is not None and objects:
+            store.putItems(self.id, objects)
+        self._retain()
+
+    def _itemsLoadedDone(self, data, excludeRead=False):
         """
         Called when all items are loaded
+
+        :param excludeRead: (bool) whether the page was loaded without the
+            read items, saved with the continuation in the item store
         """
         if data is None:
             return
+        objects = self.googleReader.itemsToObjects(self, _pageItems(data))
         self.continuation   = data.get('continuation', None)
         self.lastUpdated    = data.get('updated', None)
-        self.lastLoadLength = len(data.get('items', []))
-        self.googleReader.itemsToObjects(self, data.get('items', []))
+        self.lastLoadLength = len(objects)
         self.lastLoadOk = True
+        store = self.googleReader.itemStore
+        if store is not None:
+            store.putItems(self.id, objects)
+            store.setStreamState(self.id, self.continuation, self.lastUpdated, excludeRead)
+        self._retain()
+
+    def setRetention(self, policy):
+        """
+        Bound the items kept loaded with a RetentionPolicy, None keeps them
+        all. Applied right away, then after every page loaded.
+        """
+        self.retention = policy
+        self.loadedBytes = 0
+        self._sizedItems = 0
+        self._retain()
+
+    def _retain(self):
+        if self.retention is not None:
+            self.retention.apply(self)
+
+    def _evictItems(self, items):
+        itemsById = self.itemsById
+        for item in items:
+            itemsById.pop(item.id, None)
 
     def _addItem(self, item):
         self.items.append(item)
@@ -66,33 +280,62 @@ class ItemsContainer(object):
         self.items        = []
         self.itemsById    = {}
         self.continuation = None
+        self.loadedBytes  = 0
+        self._sizedItems  = 0
 
     def getItems(self):
         return self.items
 
+    def getItemsWithTag(self, tag):
+        """
+        Loaded items having a state or label tag, like 'user/-/label/name'.
+        """
+        bit = self.googleReader.tagDictionary.bit(tag)
+        if not bit:
+            return []
+        items = []
+        for item in self.items:
+            state = item._state
+            if not state & _DECODED:
+                state = _decodeState(item)
+            if state & bit:
+                items.append(item)
+        return items
+
     def countItems(self, excludeRead=False):
         if excludeRead:
-            sum([1 for item in self.items if item.isUnread()])
+            return sum([1 for item in self.items if item.isUnread()])
         else:
             return len(self.items)
 
     def markItemRead(self, item, read):
-        if read and item.isUnread():
-            self.unread -= 1
-        elif not read and item.isRead():
-            self.unread += 1
+        """
+        Count item as read or unread in every stream holding it.
+        """
+        self.googleReader.unreadCounter.itemRead(item, read)
 
     def markAllRead(self):
-        self.unread = 0
+        self.googleReader.unreadCounter.allRead(self)
         for item in self.items:
             item.read = True
             item.canUnread = False
+        if self.googleReader.itemStore is not None:
+            self.googleReader.itemStore.putStates(self.items)
         result = self.googleReader.markFeedAsRead(self)
-        return result.upper() == 'OK'
+        return self.googleReader._editResult(result)
 
     def countUnread(self):
         self.unread = self.countItems(excludeRead=True)
 
+    def toArray(self):
+        """
+        The loaded items as an ItemBatch, columns of their times, feeds,
+        states, titles and authors.
+        """
+        # batch builds on the Item internals defined here
+        from .batch import ItemBatch
+        return ItemBatch.fromItems(self.items)
+
 class Category(ItemsContainer):
     """
     Class for representing a category
@@ -115,17 +358,24 @@ class Category(ItemsContainer):
         self.id    = id
 
         self.feeds  = []
+        self._feedSet = set()
 
         self.fetchUrl = ReaderUrl.CATEGORY_URL + Category.urlQuote(self.label)
 
     def _addFeed(self, feed):
-        if not feed in self.feeds:
+        if not feed in self._feedSet:
+            self._feedSet.add(feed)
             self.feeds.append(feed)
             try:
                 self.unread += feed.unread
             except:
                 pass
 
+    def _removeFeed(self, feed):
+        if feed in self._feedSet:
+            self._feedSet.remove(feed)
+            self.feeds.remove(feed)
+
     def getFeeds(self):
         return self.feeds
 
@@ -133,10 +383,8 @@ class Category(ItemsContainer):
         return self.googleReader.getCategoryContent(self, excludeRead, continuation, loadLimit, since, until)
 
     def countUnread(self):
-        self.unread = sum([feed.unread for feed in self.feeds])
-
-    def toArray(self):
-        pass
+        unreadCounter = self.googleReader.unreadCounter
+        unreadCounter.set(self.id, unreadCounter.total(self.feeds))
 
     def toJSON(self):
         pass
@@ -172,36 +420,30 @@ class BaseFeed(ItemsContainer):
         self.unread = unread
 
         self.categories = []
+        self._categorySet = set()
         for category in categories:
             self.addCategory(category)
 
         self.continuation = None
 
     def addCategory(self, category):
-        if not category in self.categories:
+        if not category in self._categorySet:
+            self._categorySet.add(category)
             self.categories.append(category)
             category._addFeed(self)
 
+    def removeCategory(self, category):
+        if category in self._categorySet:
+            self._categorySet.remove(category)
+            self.categories.remove(category)
+            category._removeFeed(self)
+
     def getCategories(self):
         return self.categories
 
     def _getContent(self, excludeRead=False, continuation=None, loadLimit=20, since=None, until=None):
         return self.googleReader.getFeedContent(self, excludeRead, continuation, loadLimit, since, until)
 
-    def markItemRead(self, item, read):
-        super(BaseFeed, self).markItemRead(item, read)
-        for category in self.categories:
-            category.countUnread()
-
-    def markAllRead(self):
-        self.unread = 0
-        for category in self.categories:
-            category.countUnread()
-        return super(BaseFeed, self).markAllRead()
-
-    def toArray(self):
-        pass
-
     def toJSON(self):
         pass
 
@@ -244,80 +486,187 @@ class Feed(BaseFeed):
 
         self.fetchUrl = ReaderUrl.FEED_URL + Category.urlQuote(self.id)
 
+class _LazyField(object):
+    """
+    Item attribute decoded from the raw item record on first access, then
+    kept in a slot. Assigning to it just fills the slot.
+    """
+    def __init__(self, slot, decode):
+        self.slot   = slot
+        self.decode = decode
+        self.member = None
+
+    def __get__(self, item, owner):
+        if item is None:
+            return self
+        try:
+            return self.member.__get__(item, owner)
+        except AttributeError:
+            value = self.decode(item)
+            self.member.__set__(item, value)
+            return value
+
+    def __set__(self, item, value):
+        self.member.__set__(item, value)
+
+class _StateFlag(object):
+    """
+    read/starred/shared flag of an Item, kept as a bit of Item._state.
+    """
+    def __init__(self, bit):
+        self.bit = bit
+
+    def __get__(self, item, owner):
+        if item is None:
+            return self
+        state = item._state
+        if not state & _DECODED:
+            state = _decodeState(item)
+        return bool(state & self.bit)
+
+    def __set__(self, item, value):
+        state = item._state
+        if not state & _DECODED:
+            state = _decodeState(item)
+        if value:
+            item._state = state | self.bit
+        else:
+            item._state = state & ~self.bit
+
+# bits of Item._state, the others are the tags of TagDictionary
+_DECODED = 1
+_READ    = 2 << TagDictionary.READ
+_STARRED = 2 << TagDictionary.STARRED
+_SHARED  = 2 << TagDictionary.SHARED
+
+def _decodeState(item):
+    """
+    Set the bits of every state and label tag of the item, interned in the
+    TagDictionary of its GoogleReader, besides the ones added before.
+    """
+    state = _DECODED | item._state | item.googleReader.tagDictionary.mask(item.data.get('categories', ()))
+    item._state = state
+    return state
+
+def _decodeContent(item):
+    return item.data.get('content', item.data.get('summary', {})).get('content', '')
+
+def _decodeOrigin(item):
+    f = item.data.get('origin', {})
+    if not f:
+        return { 'title': '', 'url': ''}
+    return {
+        'title': f.get('title', ''),
+        'url': f.get('htmlUrl', ''),
+    }
+
+def _decodeTime(item):
+    if 'crawlTimeMsec' in item.data:
+        return int(item.data['crawlTimeMsec']) // 1000
+    return None
+
+def _decodeUrl(item):
+    # check original url
+    for alternate in item.data.get('alternate', []):
+        if alternate.get('type', '') == 'text/html':
+            return alternate['href']
+    return None
+
+def _decodeCanUnread(item):
+    return item.data.get('isReadStateLocked', 'false') != 'true'
+
+def _decodeFeed(item):
+    """
+    Original feed of the item, can be used when item is fetched from a special
+    feed. Unknown feeds are added to the GoogleReader.
+    """
+    try:
+        f = item.data['origin']
+        streamId = f['streamId']
+    except (KeyError, TypeError):
+        return None
+    feed = item.googleReader.getFeed(streamId)
+    if feed:
+        if not feed.title and 'title' in f:
+            feed.title = f['title']
+        return feed
+    feed = Feed(item.googleReader, f.get('title', ''), streamId, f.get('htmlUrl', None), 0, [])
+    item.googleReader._addFeed(feed)
+    return feed
+
 class Item(object):
     """
     Class for representing an individual item (an entry of a feed)
+
+    Only the id is read from the item record up front, every other field is
+    decoded from it the first time it is accessed.
+
+    An entry loaded into several containers (a feed, its categories, the
+    reading list) is one Item, see GoogleReader.itemsById: parent is the
+    first container it was loaded into, parents all of them.
     """
+    __slots__ = ('googleReader', 'parent', '_parents', 'data', 'id', '_state',
+                 '_title', '_author', '_content', '_origin', '_time', '_url',
+                 '_canUnread', '_feed', '__weakref__')
+
+    title     = _LazyField('_title', lambda item: item.data.get('title', '(no title)'))
+    author    = _LazyField('_author', lambda item: item.data.get('author', None))
+    content   = _LazyField('_content', _decodeContent)
+    origin    = _LazyField('_origin', _decodeOrigin)
+    time      = _LazyField('_time', _decodeTime)
+    url       = _LazyField('_url', _decodeUrl)
+    canUnread = _LazyField('_canUnread', _decodeCanUnread)
+    feed      = _LazyField('_feed', _decodeFeed)
+    read      = _StateFlag(_READ)
+    starred   = _StateFlag(_STARRED)
+    shared    = _StateFlag(_SHARED)
+
     def __str__(self):
         return unicode(self).encode('utf-8')
 
     def __unicode__(self):
         return '<"%s" by %s, %s>' % (self.title, self.author, self.id)
 
-    def __init__(self, googleReader, item, parent):
+    def __init__(self, googleReader, item, parent, attach=True):
         """
         :param item: An item loaded from json
         :param parent: the object (Feed of Category) containing the Item
+        :param attach: add the Item to its parent's items
         """
         self.googleReader = googleReader
         self.parent = parent
+        self._parents = None # the other containers the Item was loaded into
 
-        self.data   = item # save original data for accessing other fields
+        self.data   = item # original data, fields are decoded from it on access
         self.id     = item['id']
-        self.title  = item.get('title', '(no title)')
-        self.author = item.get('author', None)
-        self.content = item.get('content', item.get('summary', {})).get('content', '')
-        self.origin  = { 'title': '', 'url': ''}
-        if 'crawlTimeMsec' in item:
-            self.time = int(item['crawlTimeMsec']) // 1000
-        else:
-            self.time = None
-
-        # check original url
-        self.url    = None
-        for alternate in item.get('alternate', []):
-            if alternate.get('type', '') == 'text/html':
-                self.url = alternate['href']
-                break
-
-        # check status
-        self.read    = False
-        self.starred = False
-        self.shared  = False
-        for category in item.get('categories', []):
-            if category.endswith('/state/com.google/read'):
-                self.read = True
-            elif category.endswith('/state/com.google/starred'):
-                self.starred = True
-            elif category in ('user/-/state/com.google/broadcast',
-                              'user/%s/state/com.google/broadcast' % self.googleReader.userId):
-                self.shared = True
-
-        self.canUnread = item.get('isReadStateLocked', 'false') != 'true'
-
-        # keep feed, can be used when item is fetched from a special feed, then it's the original one
-        try:
-            f = item['origin']
-            self.origin = {
-                'title': f.get('title', ''),
-                'url': f.get('htmlUrl', ''),
-            }
-            self.feed = self.googleReader.getFeed(f['streamId'])
-            if not self.feed:
-                raise
-            if not self.feed.title and 'title' in f:
-                self.feed.title = f['title']
-        except:
-            try:
-                self.feed = Feed(self, f.get('title', ''), f['streamId'], f.get('htmlUrl', None), 0, [])
-                try:
-                    self.googleReader._addFeed(self.feed)
-                except:
-                    pass
-            except:
-                self.feed = None
+        self._state = 0
 
-        self.parent._addItem(self)
+        if attach:
+            self.parent._addItem(self)
+
+    @property
+    def parents(self):
+        return (self.parent,) + (self._parents or ())
+
+    def _refresh(self, item):
+        """
+        Replace the record of the Item by a newer one: tags and fields are
+        decoded from it again.
+        """
+        self.data   = item
+        self._state = 0
+        for slot in _LAZY_SLOTS:
+            if hasattr(self, slot):
+                delattr(self, slot)
+
+    def _attach(self, parent):
+        """
+        Add the Item to the items of one more container.
+        """
+        if parent is not self.parent and parent not in (self._parents or ()):
+            self._parents = (self._parents or ()) + (parent,)
+        if self.id not in parent.itemsById:
+            parent._addItem(self)
 
     def isUnread(self):
         return not self.read
@@ -326,27 +675,69 @@ class Item(object):
         return self.read
 
     def markRead(self, read=True):
-        self.parent.markItemRead(self, read)
-        self.read = read
         if read:
             result = self.googleReader.addItemTag(self, ReaderUrl.TAG_READ)
         else:
             result = self.googleReader.removeItemTag(self, ReaderUrl.TAG_READ)
-        return result.upper() == 'OK'
+        return self.googleReader._editResult(result)
 
     def markUnread(self, unread=True):
         return self.markRead(not unread)
 
+    def hasTag(self, tag):
+        """
+        :param tag: (str) state or label, as 'user/-/label/name' or with the user id
+        """
+        state = self._state
+        if not state & _DECODED:
+            state = _decodeState(self)
+        return bool(state & self.googleReader.tagDictionary.bit(tag))
+
+    def getTags(self):
+        """
+        State and label tags of the item, in their 'user/-/' form.
+        """
+        state = self._state
+        if not state & _DECODED:
+            state = _decodeState(self)
+        return self.googleReader.tagDictionary.tagsOf(state)
+
+    def getLabels(self):
+        """
+        Names of the user labels of the item.
+        """
+        prefix = 'user/-/label/'
+        return [tag[len(prefix):] for tag in self.getTags() if tag.startswith(prefix)]
+
+    def _setTag(self, tag, present):
+        """
+        Returns whether the item had the tag before.
+        """
+        return self._setBit(self.googleReader.tagDictionary.bit(tag), present)
+
+    def _setBit(self, bit, present):
+        state = self._state
+        if not state & _DECODED:
+            state = _decodeState(self)
+        self._state = state | bit if present else state & ~bit
+        return bool(state & bit)
+
+    def _addBit(self, bit):
+        """
+        Set a tag bit without decoding the tags of the record, which are
+        merged in when they are.
+        """
+        self._state |= bit
+
     def isShared(self):
         return self.shared
 
     def markShared(self, shared=True):
-        self.shared = shared
         if shared:
             result = self.googleReader.addItemTag(self, ReaderUrl.TAG_SHARED)
         else:
             result = self.googleReader.removeItemTag(self, ReaderUrl.TAG_SHARED)
-        return result.upper() == 'OK'
+        return self.googleReader._editResult(result)
 
     def share(self):
         return self.markShared()
@@ -358,15 +749,134 @@ class Item(object):
         return self.starred
 
     def markStarred(self, starred=True):
-        self.starred = starred
         if starred:
             result = self.googleReader.addItemTag(self, ReaderUrl.TAG_STARRED)
         else:
             result = self.googleReader.removeItemTag(self, ReaderUrl.TAG_STARRED)
-        return result.upper() == 'OK'
+        return self.googleReader._editResult(result)
 
     def star(self):
         return self.markStarred()
 
     def unStar(self):
         return self.markStarred(False)
+
+class ItemMap(object):
+    """
+    Item id -> Item, holding weak references: an Item is dropped once no
+    container or caller references it anymore.
+
+    Lighter than a WeakValueDictionary, which pays for a callback per entry:
+    dead references are swept when the map has doubled since the last sweep.
+
+    While a single container has built Items, its itemsById is the map and
+    no reference is taken: the Items are indexed when a second container
+    loads some. Until then an Item the container dropped is not found again,
+    even when a caller still holds it.
+    """
+    def __init__(self):
+        self._refs    = {}
+        self._sweepAt = 1024
+        self._owner   = None # weak reference to the only container with Items, not indexed
+
+    def get(self, id, default=None):
+        ref = self._refs.get(id)
+        if ref is not None:
+            item = ref()
+            if item is not None:
+                return item
+        owner = self._owner() if self._owner is not None else None
+        if owner is not None:
+            return owner.itemsById.get(id, default)
+        return default
+
+    def __getitem__(self, id):
+        item = self.get(id)
+        if item is None:
+            raise KeyError(id)
+        return item
+
+    def __contains__(self, id):
+        return self.get(id) is not None
+
+    def __setitem__(self, id, item):
+        self._refs[id] = weakref.ref(item)
+        if len(self._refs) >= self._sweepAt:
+            self.sweep()
+
+    def __len__(self):
+        owner = self._owner() if self._owner is not None else None
+        return len(self._refs) + (len(owner.itemsById) if owner is not None else 0)
+
+    def build(self, googleReader, records, parent, attach=True):
+        """
+        The Items of item records, reusing the ones already built, which are
+        attached to parent too and take the newer record.
+
+        Returns a list of Items.
+        """
+        if attach and not self._refs:
+            owner = self._owner() if self._owner is not None else None
+            if owner is None or owner is parent:
+                self._owner = weakref.ref(parent)
+                return self._buildOwned(googleReader, records, parent)
+        self._index()
+        refs = self._refs
+        ref = weakref.ref
+        objects = []
+        for record in records:
+            known = refs.get(record['id'])
+            item = known() if known is not None else None
+            if item is None:
+                item = Item(googleReader, record, parent, attach)
+                refs[item.id] = ref(item)
+            else:
+                if record is not item.data:
+                    item._refresh(record)
+                    googleReader._itemRefreshed(item)
+                if attach:
+                    item._attach(parent)
+            objects.append(item)
+        if len(refs) >= self._sweepAt:
+            self.sweep()
+        return objects
+
+    def _buildOwned(self, googleReader, records, parent):
+        itemsById = parent.itemsById
+        objects = []
+        for record in records:
+            item = itemsById.get(record['id'])
+            if item is None:
+                item = Item(googleReader, record, parent)
+            elif record is not item.data:
+                item._refresh(record)
+                googleReader._itemRefreshed(item)
+            objects.append(item)
+        return objects
+
+    def _index(self):
+        """
+        Take references to the Items of the owner container.
+        """
+        owner = self._owner() if self._owner is not None else None
+        self._owner = None
+        if owner is not None:
+            ref = weakref.ref
+            refs = self._refs
+            for id, item in owner.itemsById.items():
+                refs[id] = ref(item)
+
+    def sweep(self):
+        """
+        Forget the ids of the Items which were garbage collected.
+        """
+        self._refs = dict((id, ref) for id, ref in self._refs.items() if ref() is not None)
+        self._sweepAt = max(1024, 2 * len(self._refs))
+
+# lazy fields read and fill their slot through the slot descriptor directly
+_LAZY_SLOTS = []
+for _field in list(vars(Item).values()):
+    if isinstance(_field, _LazyField):
+        _field.member = vars(Item)[_field.slot]
+        _LAZY_SLOTS.append(_field.slot)
+del _field
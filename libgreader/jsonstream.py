@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import codecs
+import re
+from collections import deque
+
+try:
+    import json
+except:
+    import simplejson as json
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class StreamedContent(dict):
+    """
+    stream/contents response decoded while it is being downloaded.
+
+    The members found before the 'items' array are available as soon as the
+    object is created, items are decoded one at a time by iterItems(), and
+    the members found after the array (usually 'continuation') are filled in
+    once it has been consumed. Only the item being decoded and the unparsed
+    tail of the last chunk are held in memory.
+    """
+    def __init__(self, chunks):
+        """
+        :param chunks: iterable of bytes, the raw response body
+        """
+        super(StreamedContent, self).__init__()
+        self._chunks  = iter(chunks)
+        self._text    = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder(strict=False)
+        self._buffer  = ''
+        self._pos     = 0
+        self._eof     = False
+        self._inItems = False
+        self._done    = False
+        self._pending = deque()
+        self.itemCount = 0
+        self._expect('{')
+        self._parseMembers()
+
+    def __getitem__(self, key):
+        if key == 'items':
+            return list(self.iterItems())
+        self._finish(key)
+        return super(StreamedContent, self).__getitem__(key)
+
+    def get(self, key, default=None):
+        if key == 'items':
+            return self['items'] if self._inItems or self._pending else default
+        self._finish(key)
+        return super(StreamedContent, self).get(key, default)
+
+    def iterItems(self):
+        """
+        Yields the dict of every item not consumed yet, then parses the rest
+        of the response.
+        """
+        while self._pending:
+            yield self._pending.popleft()
+        for item in self._decodeItems():
+            yield item
+
+    def _decodeItems(self):
+        while self._inItems:
+            char = self._peek()
+            if char == ']':
+                self._pos += 1
+                self._inItems = False
+                break
+            if char == ',':
+                self._pos += 1
+                continue
+            self.itemCount += 1
+            yield self._value()
+        self._parseMembers()
+
+    def _finish(self, key):
+        # members after the items array are only known once it is decoded,
+        # keep the items for iterItems() meanwhile
+        if self._inItems and not super(StreamedContent, self).__contains__(key):
+            self._pending.extend(self._decodeItems())
+
+    def _fill(self):
+        if self._eof:
+            return False
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            text = self._text.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._text.decode(b'', True)
+        self._eof = True
+        return False
+
+    def _peek(self):
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError("Expecting '%s' at char %d of JSON stream" % (char, self._pos))
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            # a number at the very end of the buffer may be cut in two
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _parseMembers(self):
+        """
+        Parse object members until the 'items' array or the closing brace.
+        """
+        while not self._inItems and not self._done:
+            char = self._peek()
+            if char == '}':
+                self._pos += 1
+                self._done = True
+                self._chunks = iter(())
+                return
+            if char == ',':
+                self._pos += 1
+                continue
+            key = self._value()
+            self._expect(':')
+            if key == 'items':
+                self._expect('[')
+                self._inItems = True
+                return
+            self[key] = self._value()
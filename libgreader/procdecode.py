@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""
+Decoding of stream/contents pages in worker processes, see
+GoogleReader.enableProcessDecoding.
+
+Workers parse a page and reduce each item to a compact tuple, its long
+strings (title, author, content) concatenated in one text per page and
+referenced by offsets, which pickles in a fraction of the time a list of
+nested dicts would. The members Item does not use are kept as they are in
+a remainder dict. The parent wraps each tuple in a CompactRecord, the
+read-only mapping Items decode their fields from.
+"""
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from .decoders import defaultDecoder
+
+_decoder = None
+
+# fields of a compact record
+(_ID, _CRAWL_TIME, _CATEGORIES, _ORIGIN, _URL, _LOCKED, _CONTENT_KEY,
+ _TITLE, _AUTHOR, _CONTENT, _CONTENT_EXTRA, _REST) = range(12)
+
+# members a compact record holds in its tuple, when their value fits
+_COMPACT_KEYS = frozenset(['id', 'crawlTimeMsec', 'categories', 'origin', 'alternate',
+                           'isReadStateLocked', 'content', 'summary', 'title', 'author'])
+_STRING_TYPES = (type(u''), type(''))
+
+def _keep(item, rest, key):
+    if key in item:
+        rest[key] = item[key]
+    return None
+
+def decodePage(body):
+    """
+    Parse a stream/contents response in a worker process.
+
+    Returns (page without its items, list of compact records, text).
+    """
+    global _decoder
+    if _decoder is None:
+        _decoder = defaultDecoder()
+    page = _decoder.loads(body)
+    parts = []
+    offset = [0]
+
+    def span(value):
+        if value is None:
+            return None
+        start = offset[0]
+        parts.append(value)
+        offset[0] = start + len(value)
+        return (start, offset[0])
+
+    records = []
+    extras = {} # direction -> the content members besides the text, pickled once
+    for item in page.pop('items', None) or []:
+        # members kept as they are: the ones Item does not use, and the ones
+        # the tuple could not give back unchanged
+        if _COMPACT_KEYS.issuperset(item):
+            rest = {}
+        else:
+            rest = dict((key, value) for key, value in item.items() if key not in _COMPACT_KEYS)
+
+        origin = item.get('origin')
+        if (isinstance(origin, dict) and len(origin) == 3 and
+                'streamId' in origin and 'title' in origin and 'htmlUrl' in origin):
+            origin = (origin['streamId'], origin['title'], origin['htmlUrl'])
+        else:
+            origin = _keep(item, rest, 'origin')
+        alternates = item.get('alternate')
+        alternate = alternates[0] if isinstance(alternates, list) and len(alternates) == 1 else None
+        if (isinstance(alternate, dict) and len(alternate) == 2 and 'href' in alternate
+                and alternate.get('type') == 'text/html'):
+            url = alternate['href']
+        else:
+            url = _keep(item, rest, 'alternate')
+        contentKey = 'content' if 'content' in item else 'summary' if 'summary' in item else None
+        content = item.get(contentKey) if contentKey else None
+        extra = None
+        if isinstance(content, dict) and isinstance(content.get('content'), _STRING_TYPES):
+            if len(content) == 2 and isinstance(content.get('direction'), _STRING_TYPES):
+                extra = extras.get(content['direction'])
+                if extra is None:
+                    extra = extras[content['direction']] = (('direction', content['direction']),)
+            elif len(content) > 1:
+                extra = tuple((key, value) for key, value in content.items() if key != 'content')
+            content = content['content']
+            if contentKey == 'content':
+                _keep(item, rest, 'summary')
+        else:
+            _keep(item, rest, 'content')
+            _keep(item, rest, 'summary')
+            contentKey = content = None
+        categories = item.get('categories')
+        if isinstance(categories, list):
+            categories = tuple(categories)
+        else:
+            categories = _keep(item, rest, 'categories')
+        locked = item.get('isReadStateLocked')
+        if locked is not None and locked != 'true':
+            _keep(item, rest, 'isReadStateLocked')
+        title, author = item.get('title'), item.get('author')
+        if title is not None and not isinstance(title, _STRING_TYPES):
+            title = _keep(item, rest, 'title')
+        if author is not None and not isinstance(author, _STRING_TYPES):
+            author = _keep(item, rest, 'author')
+        crawlTime = item.get('crawlTimeMsec')
+        if crawlTime is None:
+            crawlTime = _keep(item, rest, 'crawlTimeMsec')
+        records.append((
+            item['id'],
+            crawlTime,
+            categories,
+            origin,
+            url,
+            locked == 'true',
+            contentKey,
+            span(title),
+            span(author),
+            span(content),
+            extra,
+            rest or None,
+        ))
+    return page, records, u''.join(parts)
+
+class CompactRecord(Mapping):
+    """
+    Item record rebuilt on demand from a compact tuple and the text of its
+    page. The fields Item uses are in the tuple: id, crawlTimeMsec,
+    categories, origin, alternate (the text/html link), isReadStateLocked,
+    title, author, and content or summary. Every other member is in the
+    remainder dict, so the mapping holds the whole original record.
+    """
+    __slots__ = ('_record', '_text')
+
+    def __init__(self, record, text):
+        self._record = record
+        self._text   = text
+
+    def _string(self, index):
+        span = self._record[index]
+        if span is None:
+            return None
+        return self._text[span[0]:span[1]]
+
+    def __getitem__(self, key):
+        record = self._record
+        if key == 'id':
+            return record[_ID]
+        if key == 'title' and record[_TITLE] is not None:
+            return self._string(_TITLE)
+        if key == 'author' and record[_AUTHOR] is not None:
+            return self._string(_AUTHOR)
+        if key == record[_CONTENT_KEY]:
+            content = {'content': self._string(_CONTENT)}
+            if record[_CONTENT_EXTRA] is not None:
+                content.update(record[_CONTENT_EXTRA])
+            return content
+        if key == 'crawlTimeMsec' and record[_CRAWL_TIME] is not None:
+            return record[_CRAWL_TIME]
+        if key == 'categories' and record[_CATEGORIES] is not None:
+            return list(record[_CATEGORIES])
+        if key == 'origin' and record[_ORIGIN] is not None:
+            streamId, title, htmlUrl = record[_ORIGIN]
+            return {'streamId': streamId, 'title': title, 'htmlUrl': htmlUrl}
+        if key == 'alternate' and record[_URL] is not None:
+            return [{'href': record[_URL], 'type': 'text/html'}]
+        if key == 'isReadStateLocked' and record[_LOCKED]:
+            return 'true'
+        rest = record[_REST]
+        if rest is not None and key in rest:
+            return rest[key]
+        raise KeyError(key)
+
+    def _keys(self):
+        record = self._record
+        keys = ['id']
+        for key, index in (('title', _TITLE), ('author', _AUTHOR), ('crawlTimeMsec', _CRAWL_TIME),
+                           ('categories', _CATEGORIES), ('origin', _ORIGIN), ('alternate', _URL)):
+            if record[index] is not None:
+                keys.append(key)
+        if record[_CONTENT_KEY] is not None:
+            keys.append(record[_CONTENT_KEY])
+        if record[_LOCKED]:
+            keys.append('isReadStateLocked')
+        if record[_REST] is not None:
+            keys.extend(record[_REST])
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+def materialize(page, records, text):
+    """
+    The stream/contents dict of a page decoded by decodePage.
+    """
+    page['items'] = [CompactRecord(record, text) for record in records]
+    return page
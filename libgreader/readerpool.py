@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import deque
+
+try:
+    from collections import OrderedDict
+    has_ordereddict = True
+except ImportError:
+    try:
+        # Python 2.6 needs the ordereddict backport
+        from ordereddict import OrderedDict
+        has_ordereddict = True
+    except ImportError:
+        has_ordereddict = False
+
+try:
+    from concurrent import futures
+    has_futures = True
+except ImportError:
+    # Python 2 needs the futures backport
+    has_futures = False
+
+from .googlereader import GoogleReader
+from .transport import ConnectionPool
+
+class _Account(object):
+    def __init__(self, key, reader, weight, maxConcurrency):
+        self.key            = key
+        self.reader         = reader
+        self.weight         = weight
+        self.maxConcurrency = maxConcurrency
+        self.currentWeight  = 0
+        self.queue          = deque()
+        self.running        = 0
+        self.submitted      = 0
+        self.completed      = 0
+        self.failed         = 0
+        self.waitTime       = 0.0
+        self.busyTime       = 0.0
+
+    def ready(self):
+        return bool(self.queue) and self.running < self.maxConcurrency
+
+    def stats(self):
+        return {
+            'weight': self.weight,
+            'maxConcurrency': self.maxConcurrency,
+            'queued': len(self.queue),
+            'running': self.running,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'waitTime': self.waitTime,
+            'busyTime': self.busyTime,
+        }
+
+class ReaderPool(object):
+    """
+    Many GoogleReader instances, one per account, sharing one ConnectionPool
+    and a fixed set of worker threads.
+
+    Work is submitted per account and queued there. Workers pick the next
+    task with smooth weighted round-robin among the accounts which have work
+    queued and fewer tasks running than their cap, so an account with a huge
+    backlog gets its share of the workers and no more.
+    """
+    def __init__(self, connectionPool=None, maxWorkers=16, maxConcurrency=1):
+        """
+        :param connectionPool: (ConnectionPool) shared by every account, one is
+            created for maxWorkers connections if omitted
+        :param maxWorkers: (int) number of worker threads
+        :param maxConcurrency: (int) default cap on the tasks of one account
+            running at once. The model of a GoogleReader is not thread safe,
+            only raise it for tasks which do not share containers.
+        """
+        if not has_futures:
+            raise ImportError("No module named concurrent.futures")
+        if not has_ordereddict:
+            raise ImportError("No module named ordereddict")
+        self._ownsPool      = connectionPool is None
+        self.connectionPool = connectionPool if connectionPool is not None else \
+                              ConnectionPool(maxPerHost=maxWorkers)
+        self.maxWorkers     = maxWorkers
+        self.maxConcurrency = maxConcurrency
+        self._accounts      = {}
+        self._ready         = OrderedDict()
+        self._condition     = threading.Condition()
+        self._closed        = False
+        self._workers       = []
+        for number in range(maxWorkers):
+            worker = threading.Thread(target=self._work, name='ReaderPool-%d' % number)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def addAccount(self, key, reader, weight=1, maxConcurrency=None):
+        """
+        :param key: identifies the account in submit() and stats()
+        :param reader: (GoogleReader or AuthenticationMethod) its auth method
+            is moved to the shared connection pool
+        :param weight: (int) share of the workers relative to other accounts
+        :param maxConcurrency: (int) cap on its tasks running at once
+
+        Returns the GoogleReader.
+        """
+        if not isinstance(reader, GoogleReader):
+            reader = GoogleReader(reader)
+        auth = reader.auth
+        if isinstance(getattr(auth, 'pool', None), ConnectionPool) and auth.pool is not self.connectionPool:
+            if auth._ownsPool:
+                auth.pool.close()
+            auth.pool = self.connectionPool
+            auth._ownsPool = False
+        with self._condition:
+            if key in self._accounts:
+                raise KeyError("Account %r already in the pool" % (key,))
+            self._accounts[key] = _Account(key, reader, weight,
+                                           maxConcurrency or self.maxConcurrency)
+        return reader
+
+    def removeAccount(self, key):
+        """
+        Remove an account, cancelling its queued tasks. Returns its GoogleReader.
+        """
+        with self._condition:
+            account = self._accounts.pop(key)
+            self._ready.pop(key, None)
+            queued, account.queue = list(account.queue), deque()
+        for future, function, args, kwargs, queuedAt in queued:
+            future.cancel()
+        return account.reader
+
+    def getReader(self, key):
+        return self._accounts[key].reader
+
+    def submit(self, key, function, *args, **kwargs):
+        """
+        Queue function(reader, *args, **kwargs) for the reader of account key.
+
+        Returns a concurrent.futures.Future.
+        """
+        future = futures.Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("ReaderPool is closed")
+            account = self._accounts[key]
+            account.queue.append((future, function, args, kwargs, time.time()))
+            account.submitted += 1
+            if account.ready():
+                self._ready[key] = account
+            self._condition.notify()
+        return future
+
+    def submitAll(self, function, *args, **kwargs):
+        """
+        submit() function for every account, returns a dict of key -> Future.
+        """
+        return dict((key, self.submit(key, function, *args, **kwargs))
+                    for key in list(self._accounts))
+
+    def _next(self):
+        """
+        Pick the account to run a task of, by smooth weighted round-robin.
+        Called with the condition held.
+        """
+        best = None
+        total = 0
+        for account in self._ready.values():
+            account.currentWeight += account.weight
+            total += account.weight
+            if best is None or account.currentWeight > best.currentWeight:
+                best = account
+        if best is not None:
+            best.currentWeight -= total
+        return best
+
+    def _work(self):
+        while True:
+            with self._condition:
+                account = self._next()
+                while account is None:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                    account = self._next()
+                future, function, args, kwargs, queuedAt = account.queue.popleft()
+                account.running += 1
+                if not account.ready():
+                    self._ready.pop(account.key, None)
+            started = time.time()
+            ok = True
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = function(account.reader, *args, **kwargs)
+                except BaseException as e:
+                    ok = False
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            with self._condition:
+                account.running -= 1
+                account.waitTime += started - queuedAt
+                account.busyTime += time.time() - started
+                if ok:
+                    account.completed += 1
+                else:
+                    account.failed += 1
+                if account.ready() and account.key in self._accounts:
+                    self._ready[account.key] = account
+                    self._condition.notify()
+
+    def stats(self):
+        """
+        Dict of key -> queued, running, submitted, completed and failed tasks,
+        total seconds spent queued (waitTime) and running (busyTime).
+        """
+        with self._condition:
+            return dict((key, account.stats()) for key, account in self._accounts.items())
+
+    def close(self, wait=True):
+        """
+        Stop the workers once the queued tasks are done, then close every
+        reader and the connection pool if the ReaderPool created it.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        for account in list(self._accounts.values()):
+            account.reader.close()
+        if self._ownsPool:
+            self.connectionPool.close()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+def itemBytes(item):
+    """
+    Rough memory cost of an Item: its text fields plus a fixed overhead for
+    the Item, its record and the indexes holding it. Only meant to compare
+    against a budget.
+    """
+    data = item.data
+    size = RetentionPolicy.ITEM_OVERHEAD
+    for field in ('title', 'author', 'id'):
+        value = data.get(field)
+        if value:
+            size += len(value)
+    for field in ('content', 'summary'):
+        value = data.get(field)
+        if value:
+            size += len(value.get('content', ''))
+    return size
+
+class RetentionPolicy(object):
+    """
+    Bounds the items an ItemsContainer keeps loaded, for long-lived
+    processes paging through big streams.
+
+    Once a page is loaded, items older than maxAge (by Item.time) are
+    evicted, then the ones loaded first until at most maxItems remain and
+    their estimated size fits in maxBytes. Evicted items leave items and
+    itemsById, and are written to spillStore (a SQLiteItemStore) when one is
+    given. The unread count, continuation and lastLoadLength of the
+    container describe the stream and are left alone.
+
+        container.setRetention(RetentionPolicy(maxItems=10000, maxAge=86400))
+    """
+    ITEM_OVERHEAD = 600
+
+    def __init__(self, maxItems=None, maxAge=None, maxBytes=None, spillStore=None):
+        """
+        :param maxItems: (int) items kept at most
+        :param maxAge: (int) seconds, items crawled earlier are evicted
+        :param maxBytes: (int) budget for the estimated size of the items kept
+        :param spillStore: (SQLiteItemStore) where evicted items are written
+        """
+        self.maxItems   = maxItems
+        self.maxAge     = maxAge
+        self.maxBytes   = maxBytes
+        self.spillStore = spillStore
+
+    def apply(self, container):
+        """
+        Evict what exceeds the policy from container.
+
+        Returns the evicted Items, oldest loaded first.
+        """
+        items = container.items
+        if self.maxBytes is not None:
+            # size the items loaded since the last call
+            for item in items[container._sizedItems:]:
+                container.loadedBytes += itemBytes(item)
+
+        evicted = []
+        if self.maxAge is not None:
+            cutoff = time.time() - self.maxAge
+            kept = []
+            for item in items:
+                if item.time is not None and item.time < cutoff:
+                    evicted.append(item)
+                else:
+                    kept.append(item)
+            if evicted:
+                items = container.items = kept
+
+        count = 0
+        if self.maxItems is not None and len(items) > self.maxItems:
+            count = len(items) - self.maxItems
+        if self.maxBytes is not None:
+            size = container.loadedBytes
+            for item in evicted + items[:count]:
+                size -= itemBytes(item)
+            while count < len(items) and size > self.maxBytes:
+                size -= itemBytes(items[count])
+                count += 1
+            container.loadedBytes = size
+        if count:
+            evicted.extend(items[:count])
+            del items[:count]
+        if self.maxBytes is not None:
+            container._sizedItems = len(items)
+
+        if evicted:
+            container._evictItems(evicted)
+            if self.spillStore is not None:
+                self.spillStore.putItems(container.id, evicted)
+        return evicted
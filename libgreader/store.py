@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import threading
+
+try:
+    import json
+except:
+    import simplejson as json
+
+class SQLiteItemStore(object):
+    """
+    On-disk cache of loaded items, shared by every container of a GoogleReader.
+
+    Items are keyed by id with their raw record, crawl time and local
+    read/starred/shared state; each stream remembers which items it holds and
+    the continuation token of the last page loaded. A GoogleReader created
+    with an itemStore writes every loaded page through to it, and
+    ItemsContainer.loadItems serves from it, only asking Google Reader for
+    items crawled since the newest stored one.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            id        TEXT PRIMARY KEY,
+            data      TEXT NOT NULL,
+            crawlTime INTEGER,
+            read      INTEGER NOT NULL DEFAULT 0,
+            starred   INTEGER NOT NULL DEFAULT 0,
+            shared    INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS stream_items (
+            stream    TEXT NOT NULL,
+            item      TEXT NOT NULL,
+            crawlTime INTEGER,
+            PRIMARY KEY (stream, item)
+        );
+        CREATE INDEX IF NOT EXISTS stream_items_crawl ON stream_items (stream, crawlTime);
+        CREATE TABLE IF NOT EXISTS streams (
+            stream       TEXT PRIMARY KEY,
+            continuation TEXT,
+            updated      INTEGER,
+            excludeRead  INTEGER NOT NULL DEFAULT 0
+        );
+    """
+
+    def __init__(self, path=':memory:'):
+        """
+        :param path: (str) SQLite database file, created if needed
+        """
+        self.path  = path
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def putItems(self, streamId, items):
+        """
+        Store Item objects as members of streamId.
+        """
+        rows = []
+        members = []
+        for item in items:
+            crawlTime = item.data.get('crawlTimeMsec')
+            crawlTime = int(crawlTime) if crawlTime is not None else None
+            data = item.data if isinstance(item.data, dict) else dict(item.data)
+            rows.append((item.id, json.dumps(data), crawlTime,
+                         int(item.read), int(item.starred), int(item.shared)))
+            members.append((streamId, item.id, crawlTime))
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._db.executemany("INSERT OR REPLACE INTO stream_items VALUES (?, ?, ?)", members)
+
+    def putState(self, item):
+        """
+        Save the local read/starred/shared state of an Item already stored.
+        """
+        self.putStates([item])
+
+    def putStates(self, items):
+        rows = [(int(item.read), int(item.starred), int(item.shared), item.id) for item in items]
+        with self._lock:
+            with self._db:
+                self._db.executemany("UPDATE items SET read = ?, starred = ?, shared = ? WHERE id = ?", rows)
+
+    def setStreamState(self, streamId, continuation, updated, excludeRead=False):
+        with self._lock:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO streams VALUES (?, ?, ?, ?)",
+                                 (streamId, continuation, updated, int(excludeRead)))
+
+    def getStreamState(self, streamId):
+        """
+        Returns (continuation, updated, excludeRead) of the last page loaded
+        for streamId, or None if it was never loaded.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT continuation, updated, excludeRead FROM streams"
+                                   " WHERE stream = ?", (streamId,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], bool(row[2])
+
+    def clearStream(self, streamId):
+        """
+        Forget which items streamId holds, the items themselves are kept.
+        """
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM stream_items WHERE stream = ?", (streamId,))
+                self._db.execute("DELETE FROM streams WHERE stream = ?", (streamId,))
+
+    def newestCrawlTime(self, streamId):
+        """
+        Crawl time in msec of the newest stored item of streamId, or None.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT MAX(crawlTime) FROM stream_items WHERE stream = ?",
+                                   (streamId,)).fetchone()
+        return row[0]
+
+    def loadItems(self, streamId, excludeRead=False, limit=-1):
+        """
+        Stored items of streamId, newest first, as a list of
+        (data, read, starred, shared) tuples. Every item unless limit is given.
+        """
+        query = ("SELECT items.data, items.read, items.starred, items.shared"
+                 " FROM stream_items JOIN items ON items.id = stream_items.item"
+                 " WHERE stream_items.stream = ?")
+        if excludeRead:
+            query += " AND items.read = 0"
+        query += " ORDER BY stream_items.crawlTime DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(query, (streamId, limit)).fetchall()
+        return [(json.loads(data), bool(read), bool(starred), bool(shared))
+                for data, read, starred, shared in rows]
+
+    def countItems(self, streamId):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM stream_items WHERE stream = ?",
+                                    (streamId,)).fetchone()[0]
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from .url import ReaderUrl
+
+class TagDictionary(object):
+    """
+    Interns the state and label tags of a GoogleReader's items, giving each
+    a small integer id, so an Item keeps its tags as one int with a bit per
+    tag instead of a list of strings.
+
+    Tags are canonical in their 'user/-/' form, 'user/<userId>/label/x' and
+    'user/-/label/x' are the same tag. read, starred and broadcast (shared)
+    always have ids 0, 1 and 2. Categories set by the feed owner, which do
+    not start with 'user/', are not tags, nor are the tags of other users,
+    like the labels of an item shared by a friend. Until userId is known
+    every user tag is taken as the reader's own.
+
+    Bits are shifted by one: bit 0 of an Item state tells its tags were
+    decoded.
+    """
+    READ    = 0
+    STARRED = 1
+    SHARED  = 2
+
+    # spellings whose bit is remembered, dropped all at once past it
+    MAX_SPELLINGS = 65536
+
+    def __init__(self, userId=None):
+        self.userId = userId
+        self.tags  = []
+        self._ids  = {}
+        self._bits = {} # any spelling of a tag -> its bit, 0 if not a tag
+        self._lock = threading.Lock()
+        for tag in (ReaderUrl.TAG_READ, ReaderUrl.TAG_STARRED, ReaderUrl.TAG_SHARED):
+            self.intern(tag)
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __contains__(self, tag):
+        return self.canonical(tag) in self._ids
+
+    def setUserId(self, userId):
+        """
+        Tags spelled with userId are the reader's own from now on. Items
+        decoded before keep their state.
+        """
+        if userId != self.userId:
+            self.userId = userId
+            self._bits = {}
+
+    def canonical(self, tag):
+        """
+        'user/-/...' form of a tag of the user, None for other categories.
+        """
+        if not tag.startswith('user/'):
+            return None
+        end = tag.find('/', 5)
+        if end < 0:
+            return None
+        owner = tag[5:end]
+        if owner != '-' and self.userId is not None and owner != self.userId:
+            return None
+        return 'user/-' + tag[end:]
+
+    def intern(self, tag):
+        """
+        Returns the id of tag, assigning the next one if it is new. None
+        when it is not a user tag.
+        """
+        canonical = self.canonical(tag)
+        if canonical is None:
+            return None
+        id = self._ids.get(canonical)
+        if id is None:
+            with self._lock:
+                id = self._ids.get(canonical)
+                if id is None:
+                    id = self._ids[canonical] = len(self.tags)
+                    self.tags.append(canonical)
+        return id
+
+    def bit(self, tag):
+        """
+        State bit of tag, 0 when it is not a user tag.
+        """
+        bit = self._bits.get(tag)
+        if bit is None:
+            id = self.intern(tag)
+            # feed categories and the tags of other users are not interned,
+            # there is no end to them, their spellings are only remembered
+            bit = 0 if id is None else 2 << id
+            if len(self._bits) >= self.MAX_SPELLINGS:
+                self._bits = {}
+            self._bits[tag] = bit
+        return bit
+
+    def mask(self, tags):
+        """
+        State bits of a list of tags, like the categories of an item record.
+        """
+        bits = self._bits
+        mask = 0
+        for tag in tags:
+            bit = bits.get(tag)
+            if bit is None:
+                bit = self.bit(tag)
+            mask |= bit
+        return mask
+
+    def tagsOf(self, mask):
+        """
+        Canonical tags whose bits are set in mask.
+        """
+        tags = []
+        mask >>= 1
+        id = 0
+        while mask:
+            if mask & 1:
+                tags.append(self.tags[id])
+            mask >>= 1
+            id += 1
+        return tags
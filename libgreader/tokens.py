@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import json
+except:
+    import simplejson as json
+
+try:
+    import fcntl
+    has_fcntl = True
+except ImportError:
+    # Windows: writes stay atomic, concurrent updates may lose one of them
+    has_fcntl = False
+
+class TokenStore(object):
+    """
+    Base class for the stores auth methods keep their tokens in, so a new
+    process can make its first request without logging in again.
+
+    Tokens are saved as a dict per key (one key per account and auth method).
+    Values named '<name>Expires' hold the time '<name>' expires at, get()
+    leaves out the tokens which have.
+    """
+    def get(self, key):
+        """
+        Returns the dict of unexpired tokens saved under key, empty if none.
+        """
+        tokens = self.load(key) or {}
+        now = time.time()
+        for name in list(tokens):
+            expires = tokens.get(name + 'Expires')
+            if expires is not None and expires <= now:
+                del tokens[name]
+                del tokens[name + 'Expires']
+        return tokens
+
+    def update(self, key, **tokens):
+        """
+        Save tokens under key, along the ones already saved. None deletes.
+        """
+        raise NotImplementedError
+
+    def load(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+def _merge(saved, tokens):
+    merged = dict(saved or {})
+    for name, value in tokens.items():
+        if value is None:
+            merged.pop(name, None)
+        else:
+            merged[name] = value
+    return merged
+
+class MemoryTokenStore(TokenStore):
+    """
+    TokenStore shared by the auth methods of one process.
+    """
+    def __init__(self):
+        self._tokens = {}
+        self._lock   = threading.Lock()
+
+    def load(self, key):
+        with self._lock:
+            return dict(self._tokens.get(key, {}))
+
+    def update(self, key, **tokens):
+        with self._lock:
+            self._tokens[key] = _merge(self._tokens.get(key), tokens)
+
+    def delete(self, key):
+        with self._lock:
+            self._tokens.pop(key, None)
+
+class FileTokenStore(TokenStore):
+    """
+    TokenStore kept in a JSON file, readable by its owner only, which any
+    number of processes can share.
+
+    Updates are read-modify-write cycles under an exclusive lock on a
+    '.lock' file next to it, and the new content replaces the file through
+    an atomic rename, so readers never see a partial write.
+    """
+    def __init__(self, path):
+        """
+        :param path: (str) token file, created if needed
+        """
+        self.path     = path
+        self.lockPath = path + '.lock'
+        self._lock    = threading.Lock()
+
+    def _locked(self, exclusive):
+        lockFile = open(self.lockPath, 'a')
+        if has_fcntl:
+            fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return lockFile
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _write(self, content):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temporary = tempfile.mkstemp(prefix='.tokens', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(content, f)
+            os.chmod(temporary, 0o600)
+            if hasattr(os, 'replace'):
+                os.replace(temporary, self.path)
+            else:
+                os.rename(temporary, self.path)
+        except:
+            os.unlink(temporary)
+            raise
+
+    def load(self, key):
+        with self._lock:
+            lockFile = self._locked(False)
+            try:
+                return self._read().get(key, {})
+            finally:
+                lockFile.close()
+
+    def update(self, key, **tokens):
+        with self._lock:
+            lockFile = self._locked(True)
+            try:
+                content = self._read()
+                content[key] = _merge(content.get(key), tokens)
+                self._write(content)
+            finally:
+                lockFile.close()
+
+    def delete(self, key):
+        with self._lock:
+            lockFile = self._locked(True)
+            try:
+                content = self._read()
+                if content.pop(key, None) is not None:
+                    self._write(content)
+            finally:
+                lockFile.close()
+
+class TokenRefresher(object):
+    """
+    Background thread refreshing the tokens of an auth method margin seconds
+    before they expire, so requests never wait on a refresh or fail with an
+    expired token. Started by AuthenticationMethod.startAutoRefresh().
+    """
+    def __init__(self, auth, margin=300, interval=60):
+        """
+        :param margin: (float) seconds before expiry tokens are refreshed at
+        :param interval: (float) longest sleep between two checks
+        """
+        self.auth      = auth
+        self.margin    = margin
+        self.interval  = interval
+        self.lastError = None
+        self._stop     = threading.Event()
+        self._thread   = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _delay(self):
+        expiries = self.auth.tokenExpiries()
+        if not expiries:
+            return self.interval
+        return max(1, min(self.interval, min(expiries) - self.margin - time.time()))
+
+    def _run(self):
+        while not self._stop.wait(self._delay()):
+            try:
+                self.auth.refreshExpiring(self.margin)
+                self.lastError = None
+            except Exception as e:
+                # tried again on the next wake up, requests refresh on failure anyway
+                self.lastError = e
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+def backoffDelay(attempt, backoff, maxBackoff, retryAfter=None):
+    """
+    Seconds to wait before retry number attempt + 1: jittered exponential
+    backoff, at least the Retry-After header of the response if any.
+    """
+    delay = random.uniform(0, min(maxBackoff, backoff * 2 ** attempt))
+    try:
+        delay = max(delay, min(maxBackoff, float(retryAfter)))
+    except (TypeError, ValueError):
+        pass
+    return delay
+
+class AdaptiveLimiter(object):
+    """
+    Admission control for requests to the Reader API, shared by every pool
+    (and so every auth method) it is given to.
+
+    A token bucket caps the request rate, and the number of requests in
+    flight is capped by a limit adjusted AIMD style: it grows by about one per
+    window of successful requests, and is multiplied down on errors,
+    throttling responses, or when latency climbs well above the best seen.
+    """
+    def __init__(self, rate=20.0, burst=40, concurrency=4, minConcurrency=1, maxConcurrency=64,
+                 increase=1.0, decrease=0.5, latencyTolerance=3.0):
+        """
+        :param rate: (float) requests per second, None for no rate limit
+        :param burst: (int) requests which can be made at once after idling
+        :param concurrency: (int) initial limit of requests in flight
+        :param minConcurrency: (int) the limit never goes below it
+        :param maxConcurrency: (int) the limit never goes above it
+        :param increase: (float) added to the limit per window of successes
+        :param decrease: (float) the limit is multiplied by it on congestion
+        :param latencyTolerance: (float) latencies above this many times the
+            best average latency seen count as congestion
+        """
+        self.rate             = rate
+        self.burst            = burst
+        self.minConcurrency   = minConcurrency
+        self.maxConcurrency   = maxConcurrency
+        self.increase         = increase
+        self.decrease         = decrease
+        self.latencyTolerance = latencyTolerance
+        self.limit            = float(concurrency)
+        self.inFlight         = 0
+        self.tokens           = float(burst)
+        self.successes        = 0
+        self.errors           = 0
+        self.throttled        = 0
+        self.retries          = 0
+        self.latency          = None
+        self.bestLatency      = None
+        self._refilled        = time.time()
+        self._lastDecrease    = 0.0
+        self._started         = deque() # admission times of the requests in flight
+        self._condition       = threading.Condition()
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+        """
+        with self._condition:
+            while True:
+                wait = self._admit()
+                if wait is None:
+                    return
+                self._condition.wait(wait)
+
+    def tryAcquire(self):
+        """
+        acquire() without blocking, for asyncio code: returns None when the
+        request may be sent, else the seconds to wait before trying again,
+        when a token is due or the oldest request in flight should be done.
+        """
+        with self._condition:
+            return self._admit()
+
+    def _admit(self):
+        wait = None
+        now = time.time()
+        if self.inFlight >= int(self.limit):
+            oldest = now - self._started[0] if self._started else 0.0
+            # a request takes about the average latency, as long again as
+            # the oldest one has been waiting until one is measured
+            latency = self.latency if self.latency is not None else 2 * oldest
+            wait = max(0.001, latency - oldest)
+        elif self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+        if wait is not None:
+            return wait
+        if self.rate:
+            self.tokens -= 1
+        self.inFlight += 1
+        self._started.append(now)
+        return None
+
+    def release(self, latency, error=False, throttled=False):
+        """
+        Report the outcome of a request let through by acquire().
+        """
+        with self._condition:
+            self.inFlight -= 1
+            if self._started:
+                self._started.popleft()
+            if throttled:
+                self.throttled += 1
+            elif error:
+                self.errors += 1
+            else:
+                self.successes += 1
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                if self.bestLatency is None or self.latency < self.bestLatency:
+                    self.bestLatency = self.latency
+            congested = error or throttled or (
+                self.bestLatency is not None and
+                latency > self.bestLatency * self.latencyTolerance)
+            now = time.time()
+            if congested:
+                # one decrease per round trip, requests in flight saw the same congestion
+                if now - self._lastDecrease > (self.latency or latency):
+                    self.limit = max(self.minConcurrency, self.limit * self.decrease)
+                    self._lastDecrease = now
+            else:
+                self.limit = min(self.maxConcurrency, self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+
+    def countRetry(self):
+        with self._condition:
+            self.retries += 1
+
+    def stats(self):
+        """
+        Snapshot of the limiter state, for monitoring and tuning.
+        """
+        with self._condition:
+            return {
+                'limit': int(self.limit),
+                'inFlight': self.inFlight,
+                'tokens': self.tokens,
+                'rate': self.rate,
+                'successes': self.successes,
+                'errors': self.errors,
+                'throttled': self.throttled,
+                'retries': self.retries,
+                'latency': self.latency,
+                'bestLatency': self.bestLatency,
+            }
+
+class _Release(object):
+    """
+    Reports the outcome of a request to its limiter, once.
+    """
+    def __init__(self, limiter, start, error=False, throttled=False):
+        self.limiter   = limiter
+        self.start     = start
+        self.error     = error
+        self.throttled = throttled
+        self.done      = False
+
+    def __call__(self):
+        if not self.done:
+            self.done = True
+            self.limiter.release(time.time() - self.start, self.error, self.throttled)
+
+class _StreamedResponse(requests.Response):
+    """
+    Streamed response keeping its place in the limiter until it is closed,
+    or garbage collected unclosed.
+    """
+    def close(self):
+        try:
+            super(_StreamedResponse, self).close()
+        finally:
+            self._release()
+
+    def __del__(self):
+        self._release()
+
+class ConnectionPool(object):
+    """
+    Pool of keep-alive HTTP connections used by the AuthenticationMethods.
+
+    Wraps a requests Session so that consecutive calls to the Reader API reuse
+    the same TCP/TLS connections instead of paying a new handshake per call.
+    One pool can be shared by as many auth methods (and therefore GoogleReader
+    instances) as needed, it is thread safe.
+    """
+    RETRY_STATUSES    = (429, 500, 502, 503, 504)
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, poolSize=10, maxPerHost=10, idleTimeout=None,
+                 limiter=None, retries=3, backoff=0.5, maxBackoff=30.0):
+        """
+        :param poolSize: (int) number of per-host connection pools to keep
+        :param maxPerHost: (int) max number of connections kept open per host
+        :param idleTimeout: (float) seconds after which an unused pool is
+            dropped and reopened on the next request, None to keep it forever
+        :param limiter: (AdaptiveLimiter) admission control, can be shared
+        :param retries: (int) times a GET is retried after a connection
+            error, a 5xx or a throttling response
+        :param backoff: (float) base of the exponential backoff, in seconds
+        :param maxBackoff: (float) longest wait between two retries
+        """
+        self.poolSize    = poolSize
+        self.maxPerHost  = maxPerHost
+        self.idleTimeout = idleTimeout
+        self.limiter     = limiter
+        self.retries     = retries
+        self.backoff     = backoff
+        self.maxBackoff  = maxBackoff
+        self._session    = None
+        self._lastUsed   = None
+        self._lock       = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _buildSession(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.poolSize,
+                              pool_maxsize=self.maxPerHost)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session(self):
+        """
+        Returns the current Session, (re)opening it if it was closed or has
+        been idle for longer than idleTimeout.
+        """
+        with self._lock:
+            now = time.time()
+            if (self._session is not None and self.idleTimeout is not None
+                    and now - self._lastUsed > self.idleTimeout):
+                self._session.close()
+                self._session = None
+            if self._session is None:
+                self._session = self._buildSession()
+            self._lastUsed = now
+            return self._session
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the limiter. GETs are idempotent, so they are
+        retried with jittered exponential backoff on failure.
+
+        A request made with stream=True holds its place in the limiter until
+        the response is closed, its latency includes reading the body.
+        """
+        attempts = self.retries + 1 if method == 'GET' else 1
+        for attempt in range(attempts):
+            last = attempt + 1 == attempts
+            if self.limiter is not None:
+                self.limiter.acquire()
+            start = time.time()
+            try:
+                response = self.session().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if self.limiter is not None:
+                    self.limiter.release(time.time() - start, error=True)
+                if last:
+                    raise
+                self._wait(attempt)
+                continue
+            status = response.status_code
+            done = last or status not in self.RETRY_STATUSES
+            if self.limiter is not None:
+                release = _Release(self.limiter, start, error=status >= 500,
+                                   throttled=status in self.THROTTLE_STATUSES)
+                if done and kwargs.get('stream'):
+                    response.__class__ = _StreamedResponse
+                    response._release = release
+                else:
+                    release()
+            if done:
+                return response
+            response.close()
+            self._wait(attempt, response.headers.get('Retry-After'))
+
+    def _wait(self, attempt, retryAfter=None):
+        if self.limiter is not None:
+            self.limiter.countRetry()
+        time.sleep(backoffDelay(attempt, self.backoff, self.maxBackoff, retryAfter))
+
+    def isOpen(self):
+        return self._session is not None
+
+    def close(self):
+        """
+        Close every pooled connection. The pool stays usable, a new
+        Session is opened on the next request.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from itertools import repeat
+from operator import attrgetter
+
+from .url import ReaderUrl
+from .items import Category, Feed
+
+READING_LIST_ID = ReaderUrl.SPECIAL_FEEDS_PART_URL + ReaderUrl.READING_LIST
+
+_streamId = attrgetter('id')
+
+class UnreadCounter(object):
+    """
+    Unread counts of the streams of a GoogleReader, one entry per stream id,
+    behind the unread attribute of its Feeds, Categories and SpecialFeeds.
+
+    Counts are seeded from the unread-count response. Marking an item read
+    or unread then moves the count of every stream holding it by one: its
+    feed, the categories of that feed, the reading list and the containers
+    it was loaded into, whatever the size of the account. Counts never go
+    below 0, Google Reader caps them anyway.
+    """
+    def __init__(self, googleReader):
+        self.googleReader = googleReader
+        self.counts       = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def get(self, streamId):
+        return self.counts.get(streamId, 0)
+
+    def set(self, streamId, count):
+        self.counts[streamId] = count
+
+    def clear(self):
+        self.counts = {}
+
+    def seed(self, unreadById):
+        """
+        Set the counts of the feeds from the unread-count response, and the
+        ones of the categories to the sum of their feeds.
+        """
+        feeds = self.googleReader.feeds
+        feedIds = list(map(_streamId, feeds))
+        feedCounts = list(map(unreadById.get, feedIds, repeat(0, len(feedIds))))
+        self.counts.update(zip(feedIds, feedCounts))
+        sums = dict((category, 0) for category in self.googleReader.categories)
+        for feed, count in zip(feeds, feedCounts):
+            if count:
+                for category in feed.categories:
+                    sums[category] += count
+        self.counts.update((category.id, count) for category, count in sums.items())
+
+    def total(self, streams):
+        """
+        Sum of the counts of some streams.
+        """
+        return sum(map(self.counts.get, map(_streamId, streams), repeat(0, len(streams))))
+
+    def _add(self, streamIds, delta):
+        counts = self.counts
+        for streamId in streamIds:
+            count = counts.get(streamId, 0) + delta
+            counts[streamId] = count if count > 0 else 0
+
+    def _streamsOf(self, item):
+        """
+        Ids of the streams an item counts in.
+        """
+        streamIds = [READING_LIST_ID]
+        try:
+            feedId = item.data['origin']['streamId']
+        except (KeyError, TypeError):
+            feedId = None
+        feed = self.googleReader.feedsById.get(feedId)
+        if feed is None:
+            for parent in item.parents:
+                if parent.id == feedId and isinstance(parent, Feed):
+                    feed = parent
+        if feed is not None:
+            streamIds.append(feed.id)
+            streamIds.extend(map(_streamId, feed.categories))
+        if item.parent is not feed and item.parent.id not in streamIds:
+            streamIds.append(item.parent.id)
+        for parent in item._parents or ():
+            if parent.id not in streamIds:
+                streamIds.append(parent.id)
+        return streamIds
+
+    def itemRead(self, item, read):
+        """
+        Count the change of item to read or unread, before its flag is set.
+        """
+        if read == item.read:
+            return
+        self._add(self._streamsOf(item), -1 if read else 1)
+
+    def allRead(self, container):
+        """
+        Zero the count of container and take what it held off the streams
+        it is part of: the categories and reading list for a feed, the
+        feeds of a category, and everything for the reading list.
+        """
+        counts = self.counts
+        if container.id == READING_LIST_ID:
+            for streamId in counts:
+                counts[streamId] = 0
+        elif isinstance(container, Category):
+            for feed in container.getFeeds():
+                self._feedRead(feed, exclude=container)
+        elif isinstance(container, Feed):
+            self._feedRead(container)
+        counts[container.id] = 0
+
+    def _feedRead(self, feed, exclude=None):
+        count = self.counts.get(feed.id, 0)
+        if count:
+            others = [category.id for category in feed.categories if category is not exclude]
+            self._add(others + [READING_LIST_ID], -count)
+        self.counts[feed.id] = 0
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+asyncio flavour of the canned responses auth method.
+
+Written without the async syntax, answers are Futures, so that the test
+loader can import this module on every Python version. Only usable on
+Python 3.5+, tests import it behind a guard.
+"""
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+from .fakes import FakeAuthMethod
+
+def _answer(value, delay=0):
+    """
+    Future resolved to value after delay seconds, on the running loop.
+    """
+    loop = asyncio.get_event_loop()
+    future = loop.create_future()
+    loop.call_later(delay, future.set_result, value)
+    return future
+
+class FakeAsyncAuthMethod(FakeAuthMethod):
+    def __init__(self, responses=None, delay=0.05):
+        super(FakeAsyncAuthMethod, self).__init__(responses)
+        self.delay = delay
+
+    def get(self, url, parameters=None):
+        return _answer(FakeAuthMethod.get(self, url, parameters), self.delay)
+
+    def post(self, url, postParameters=None, urlParameters=None):
+        return _answer(FakeAuthMethod.post(self, url, postParameters, urlParameters))
+
+    def close(self):
+        return _answer(None)
+
+class FakeAsyncPool(object):
+    """
+    AsyncConnectionPool answering every request with the same status, or
+    with the (status, text, headers) of answers first, in order.
+    """
+    def __init__(self, status=200, text='OK', answers=None):
+        self.status   = status
+        self.text     = text
+        self.answers  = list(answers or [])
+        self.requests = []
+
+    def _answer(self, method, url, data=None, headers=None):
+        self.requests.append((method, url, data, headers))
+        if self.answers:
+            return _answer(self.answers.pop(0))
+        return _answer((self.status, self.text, {}))
+
+    def get(self, url, headers=None):
+        return self._answer('GET', url, headers=headers)
+
+    def post(self, url, data=None, headers=None):
+        return self._answer('POST', url, data, headers)
+
+    def close(self):
+        return _answer(None)
+
+class FakeAiohttpResponse(object):
+    def __init__(self, status, text=''):
+        self.status  = status
+        self.headers = {}
+        self._text   = text
+
+    def text(self):
+        return _answer(self._text)
+
+    def __aenter__(self):
+        return _answer(self)
+
+    def __aexit__(self, *exc_info):
+        return _answer(None)
+
+class FakeAiohttpSession(object):
+    """
+    aiohttp ClientSession answering with a list of statuses, in order.
+    """
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.methods  = []
+
+    def request(self, method, url, **kwargs):
+        self.methods.append(method)
+        return FakeAiohttpResponse(self.statuses.pop(0))
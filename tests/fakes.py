@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+Canned Reader API responses, for the tests which do not need a Google account.
+"""
+
+import json
+
+from libgreader import AuthenticationMethod, Category, ReaderUrl
+
+USER_ID = '01234567890'
+
+def userInfo():
+    return {'userId': USER_ID, 'userName': 'Foo', 'signupTimeSec': 0}
+
+def unreadCounts(counts, newest=None):
+    """
+    :param newest: dict of stream id -> newest item timestamp, in microseconds
+    """
+    unread = []
+    for id, count in counts.items():
+        unread.append({'id': id, 'count': count})
+        if newest and id in newest:
+            unread[-1]['newestItemTimestampUsec'] = str(newest[id])
+    return {'max': 1000, 'unreadcounts': unread}
+
+def subscriptionList(feeds):
+    """
+    :param feeds: list of (feed id, title, [label, ...])
+    """
+    subscriptions = []
+    for id, title, labels in feeds:
+        subscriptions.append({
+            'id': id,
+            'title': title,
+            'htmlUrl': 'http://%s/' % title,
+            'categories': [{'id': 'user/%s/label/%s' % (USER_ID, label), 'label': label}
+                           for label in labels],
+        })
+    return {'subscriptions': subscriptions}
+
+def item(id, feedId='feed/http://a/', read=False, starred=False, crawlTimeMsec=1000000):
+    categories = []
+    if read:
+        categories.append('user/%s/state/com.google/read' % USER_ID)
+    if starred:
+        categories.append('user/%s/state/com.google/starred' % USER_ID)
+    return {
+        'id': id,
+        'title': 'title %s' % id,
+        'author': 'author',
+        'crawlTimeMsec': str(crawlTimeMsec),
+        'categories': categories,
+        'alternate': [{'href': 'http://a/%s' % id, 'type': 'text/html'}],
+        'summary': {'content': 'content %s' % id},
+        'origin': {'streamId': feedId, 'title': 'A', 'htmlUrl': 'http://a/'},
+    }
+
+def streamContents(items, continuation=None):
+    data = {'id': 'feed/http://a/', 'updated': 1000, 'items': items}
+    if continuation:
+        data['continuation'] = continuation
+    return data
+
+class FakeAuthMethod(AuthenticationMethod):
+    """
+    Answers GETs from a dict of url -> response (dict or callable returning
+    one) and records every request made.
+    """
+    def __init__(self, responses=None):
+        super(FakeAuthMethod, self).__init__()
+        self.username  = 'fake'
+        self.responses = {ReaderUrl.USER_INFO_URL: userInfo()}
+        self.responses.update(responses or {})
+        self.gets      = []
+        self.posts     = []
+
+    def _respond(self, url, parameters):
+        response = self.responses[url]
+        if callable(response):
+            response = response(parameters or {})
+        if isinstance(response, dict):
+            response = json.dumps(response)
+        return response
+
+    def get(self, url, parameters=None):
+        self.gets.append((url, dict(parameters or {})))
+        return self._respond(url, parameters)
+
+    def post(self, url, postParameters=None, urlParameters=None):
+        self.posts.append((url, dict(postParameters or {})))
+        return 'OK'
+
+def feedUrl(feedId):
+    return ReaderUrl.FEED_URL + Category.urlQuote(feedId)
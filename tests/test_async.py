@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for AsyncGoogleReader, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+try:
+    import asyncio
+    from libgreader import AsyncGoogleReader, AsyncOAuth2Method, AsyncConnectionPool
+    from libgreader.asyncreader import has_aiohttp
+    from .asyncfakes import FakeAsyncAuthMethod, FakeAsyncPool, FakeAiohttpSession
+except (ImportError, SyntaxError):
+    # asyncio support needs Python 3.5+
+    asyncio = None
+
+from libgreader import ReaderUrl, AdaptiveLimiter, MemoryCache, MemoryTokenStore
+
+from .fakes import *
+
+FEED_ID = 'feed/http://a/'
+
+@unittest.skipIf(asyncio is None, 'asyncio not available')
+class TestAsyncGoogleReader(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAsyncAuthMethod({
+            ReaderUrl.UNREAD_COUNT_URL: unreadCounts({FEED_ID: 2}),
+            ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList([(FEED_ID, 'A', ['tech'])]),
+            feedUrl(FEED_ID):
+                streamContents([item('1'), item('2', read=True)], 'more'),
+        })
+        self.loop = asyncio.new_event_loop()
+        self.reader = AsyncGoogleReader(self.auth)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def loadFeed(self):
+        self.run_async(self.reader.buildSubscriptionList())
+        feed = self.reader.getFeed(FEED_ID)
+        self.run_async(self.reader.loadItems(feed))
+        return feed
+
+    def test_build_subscription_list_is_concurrent(self):
+        start = self.loop.time()
+        self.run_async(self.reader.buildSubscriptionList())
+        elapsed = self.loop.time() - start
+        self.assertEqual(3, len(self.auth.gets))
+        self.assertTrue(elapsed < 2 * self.auth.delay)
+        self.assertEqual(USER_ID, self.reader.userId)
+        self.assertEqual(2, self.reader.getFeed(FEED_ID).unread)
+        self.assertEqual(['tech'], [c.label for c in self.reader.getCategories()])
+
+    def test_load_items(self):
+        feed = self.loadFeed()
+        self.assertEqual(['1', '2'], [i.id for i in feed.getItems()])
+        self.assertEqual('more', feed.continuation)
+        self.assertTrue(feed.lastLoadOk)
+
+    def test_tag_edits_update_items(self):
+        feed = self.loadFeed()
+        first = feed.getItem('1')
+        self.run_async(self.reader.addItemTag(first, ReaderUrl.TAG_READ))
+        self.assertTrue(first.isRead())
+        self.assertEqual(1, feed.unread)
+        self.assertEqual(1, self.reader.getCategories()[0].unread)
+        self.run_async(self.reader.removeItemTag(first, ReaderUrl.TAG_READ))
+        self.assertFalse(first.isRead())
+        self.assertEqual(2, feed.unread)
+
+    def test_item_mark_methods_are_awaitable(self):
+        feed = self.loadFeed()
+        first = feed.getItem('1')
+        self.assertTrue(self.run_async(first.markRead()))
+        self.assertTrue(self.run_async(first.star()))
+        self.assertTrue(first.isRead())
+        self.assertEqual(1, feed.unread)
+        self.assertEqual(2, len(self.auth.posts))
+        self.assertTrue(self.run_async(feed.markAllRead()))
+        self.assertEqual(ReaderUrl.MARK_ALL_READ_URL, self.auth.posts[-1][0])
+
+    def test_sync_subscription_list(self):
+        self.run_async(self.reader.buildSubscriptionList())
+        self.auth.responses[ReaderUrl.UNREAD_COUNT_URL] = unreadCounts({FEED_ID: 5})
+        self.run_async(self.reader.syncSubscriptionList())
+        self.assertEqual(5, self.reader.getFeed(FEED_ID).unread)
+
+    def test_refresh_changed(self):
+        newest = {FEED_ID: 1000000000}
+        self.auth.responses[ReaderUrl.UNREAD_COUNT_URL] = lambda parameters: unreadCounts({FEED_ID: 2}, newest)
+        self.run_async(self.reader.buildSubscriptionList())
+        feed = self.reader.getFeed(FEED_ID)
+        newest[FEED_ID] = 2000000000
+        self.auth.responses[feedUrl(FEED_ID)] = streamContents([item('3')])
+        changed = self.run_async(self.reader.refreshChanged())
+        self.assertEqual(['3'], [i.id for i in changed[feed]])
+        self.assertEqual(1000, self.auth.gets[-1][1]['ot'])
+        self.assertEqual(2000000000, self.reader.watermarks[FEED_ID])
+
+    def test_load_items_for_containers(self):
+        self.run_async(self.reader.buildSubscriptionList())
+        feed = self.reader.getFeed(FEED_ID)
+        results = self.run_async(self.reader.loadItemsForContainers([feed]))
+        self.assertTrue(results[0].ok)
+        self.assertEqual(['1', '2'], [i.id for i in feed.getItems()])
+
+    def test_container_methods_are_awaitable(self):
+        self.run_async(self.reader.buildSubscriptionList())
+        feed = self.reader.getFeed(FEED_ID)
+        self.run_async(feed.loadItems())
+        self.assertEqual(['1', '2'], [i.id for i in feed.getItems()])
+        self.auth.responses[feedUrl(FEED_ID)] = streamContents([item('3')])
+        self.run_async(feed.loadMoreItems())
+        self.assertEqual('more', self.auth.gets[-1][1]['c'])
+        self.assertEqual(['1', '2', '3'], [i.id for i in feed.getItems()])
+
+    def test_iter_items_is_an_async_iterator(self):
+        pages = {None: streamContents([item('1'), item('2')], 'more'),
+                 'more': streamContents([item('3')])}
+        self.auth.responses[feedUrl(FEED_ID)] = lambda parameters: pages[parameters.get('c')]
+        self.run_async(self.reader.buildSubscriptionList())
+        feed = self.reader.getFeed(FEED_ID)
+        items = feed.iterItems(pageSize=2)
+        ids = []
+        while True:
+            try:
+                ids.append(self.run_async(items.__anext__()).id)
+            except StopAsyncIteration:
+                break
+        self.assertEqual(['1', '2', '3'], ids)
+        self.assertEqual([], feed.getItems())
+
+    def test_requests_cached_and_reported(self):
+        reader = AsyncGoogleReader(self.auth, cache=MemoryCache())
+        events = []
+        reader.addHook(events.append)
+        self.run_async(reader.buildSubscriptionList())
+        self.assertEqual(3, len(events))
+        self.assertFalse(any(event.cached for event in events))
+        subscriptions = [e for e in events if e.endpoint == 'subscription/list'][0]
+        self.assertTrue(subscriptions.bytes > 0)
+        self.assertEqual(200, subscriptions.status)
+        self.run_async(reader.syncSubscriptionList())
+        self.assertEqual(3, len(self.auth.gets))
+        self.assertEqual([True, True], [event.cached for event in events[3:]])
+        self.run_async(reader.getFeed(FEED_ID).loadItems())
+        self.assertEqual(2, events[-1].itemCount)
+        self.run_async(reader.getFeed(FEED_ID).getItem('1').markRead())
+        self.assertEqual(('POST', ReaderUrl.EDIT_TAG_URL), (events[-1].method, events[-1].url))
+        self.run_async(reader.syncSubscriptionList())
+        self.assertEqual(ReaderUrl.UNREAD_COUNT_URL, self.auth.gets[-1][0])
+
+@unittest.skipIf(asyncio is None, 'asyncio not available')
+class TestAsyncOAuth2Method(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_failed_requests_raise(self):
+        auth = AsyncOAuth2Method('id', 'secret', pool=FakeAsyncPool(503, ''))
+        auth.authFromAccessToken('access')
+        auth.action_token = 'action'
+        self.assertRaises(IOError, self.run_async, auth.get(ReaderUrl.USER_INFO_URL))
+        self.assertRaises(IOError, self.run_async, auth.post(ReaderUrl.EDIT_TAG_URL, {}))
+
+    def test_expired_access_token_refreshed(self):
+        pool = FakeAsyncPool(answers=[(200, '{"access_token": "new", "expires_in": 3600}', {})])
+        store = MemoryTokenStore()
+        auth = AsyncOAuth2Method('id', 'secret', pool=pool, tokenStore=store, tokenKey='user')
+        auth.authFromAccessToken('old', 'refresh', expires_in=-1)
+        self.assertEqual('OK', self.run_async(auth.get(ReaderUrl.USER_INFO_URL)))
+        self.assertEqual(AsyncOAuth2Method.ACCESS_TOKEN_URL, pool.requests[0][1])
+        self.assertTrue('access_token=new' in pool.requests[1][1])
+        self.assertEqual('new', store.get('user')['access'])
+        self.assertEqual('new', AsyncOAuth2Method('id', 'secret', pool=pool, tokenStore=store,
+                                                  tokenKey='user').access_token)
+
+    def test_refused_tokens_refreshed_and_retried(self):
+        pool = FakeAsyncPool(answers=[
+            (401, '', {}), (200, '{"access_token": "new"}', {}), (200, 'user', {}),
+            (401, '', {'X-Reader-Google-Bad-Token': 'true'}), (200, 'action2', {}), (200, 'OK', {}),
+        ])
+        auth = AsyncOAuth2Method('id', 'secret', pool=pool)
+        auth.authFromAccessToken('old', 'refresh')
+        auth.action_token = 'action'
+        self.assertEqual('user', self.run_async(auth.get(ReaderUrl.USER_INFO_URL)))
+        self.assertEqual('new', auth.access_token)
+        self.assertEqual('OK', self.run_async(auth.post(ReaderUrl.EDIT_TAG_URL, {'i': '1'})))
+        self.assertEqual('action2', auth.action_token)
+        self.assertEqual('action2', pool.requests[-1][2]['T'])
+
+    def test_token_store_needs_a_key(self):
+        self.assertRaises(ValueError, AsyncOAuth2Method, 'id', 'secret',
+                          pool=FakeAsyncPool(), tokenStore=MemoryTokenStore())
+
+@unittest.skipIf(asyncio is None or not has_aiohttp, 'aiohttp not available')
+class TestAsyncConnectionPool(unittest.TestCase):
+    def test_requests_go_through_the_limiter(self):
+        limiter = AdaptiveLimiter(rate=None)
+        pool = AsyncConnectionPool(limiter=limiter, backoff=0)
+        session = FakeAiohttpSession([503, 200, 503])
+        pool.session = lambda: session
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(200, loop.run_until_complete(pool.get('http://x'))[0])
+            self.assertEqual(503, loop.run_until_complete(pool.post('http://x', {}))[0])
+        finally:
+            loop.close()
+        self.assertEqual(['GET', 'GET', 'POST'], session.methods)
+        stats = limiter.stats()
+        self.assertEqual((0, 1, 2, 1), (stats['inFlight'], stats['successes'],
+                                        stats['throttled'], stats['retries']))
+
+if __name__ == '__main__':
+    unittest.main()
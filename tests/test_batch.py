@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the columnar ItemBatch view of loaded items.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+from libgreader import GoogleReader, ItemBatch, SpecialFeed, ReaderUrl
+
+from .fakes import *
+
+class TestItemBatch(unittest.TestCase):
+    def setUp(self):
+        self.reader = GoogleReader(FakeAuthMethod())
+        self.reader.userId = USER_ID
+        self.container = SpecialFeed(self.reader, ReaderUrl.READING_LIST)
+        self.reader.itemsToObjects(self.container, [
+            item('1', 'feed/http://a/', crawlTimeMsec=1000000),
+            item('2', 'feed/http://b/', read=True, crawlTimeMsec=2000000),
+            item('3', 'feed/http://a/', starred=True, crawlTimeMsec=3000000),
+            item('4', 'feed/http://b/', read=True, starred=True, crawlTimeMsec=4000000),
+            {'id': '5'},
+        ])
+        self.container.getItem('1').markStarred()
+        self.batch = self.container.toArray()
+
+    def test_columns(self):
+        batch = self.batch
+        self.assertEqual(5, len(batch))
+        self.assertEqual(['1', '2', '3', '4', '5'], batch.ids)
+        self.assertEqual([1000, 2000, 3000, 4000, -1], list(batch.times))
+        self.assertEqual(['feed/http://a/', 'feed/http://b/', None], batch.feedIds)
+        self.assertEqual([0, 1, 0, 1, 2], list(batch.feeds))
+        self.assertEqual([ItemBatch.STARRED, ItemBatch.READ, ItemBatch.STARRED,
+                          ItemBatch.READ | ItemBatch.STARRED, 0], list(batch.flags))
+        self.assertEqual('title 3', batch.strings[batch.titles[2]])
+        self.assertEqual(-1, batch.authors[4])
+        self.assertEqual([1000, 2000, 3000, 4000, -1], list(batch.column('times')))
+
+    def test_select(self):
+        batch = self.batch
+        self.assertEqual([0, 2, 4], list(batch.select(read=False)))
+        self.assertEqual([2], list(batch.select(read=False, since=2000)))
+        self.assertEqual([0, 1], list(batch.select(until=2000)))
+        self.assertEqual([3], list(batch.select(starred=True, feeds=['feed/http://b/', 'feed/http://c/'])))
+        self.assertEqual([3], list(batch.select(read=True, starred=True)))
+        self.assertEqual([], list(batch.select(feeds=['feed/http://c/'])))
+
+    def test_count_by(self):
+        batch = self.batch
+        self.assertEqual({'feed/http://a/': 2, 'feed/http://b/': 2, None: 1}, batch.countBy('feeds'))
+        unread = batch.select(read=False)
+        self.assertEqual({'feed/http://a/': 2, None: 1}, batch.countBy('feeds', unread))
+        self.assertEqual({'author': 4}, batch.countBy('authors'))
+        self.assertRaises(ValueError, batch.countBy, 'flags')
+
+    def test_take(self):
+        subset = self.batch.take(self.batch.select(feeds=['feed/http://b/']))
+        self.assertEqual(['2', '4'], subset.ids)
+        self.assertEqual([2000, 4000], list(subset.times))
+        self.assertEqual({'feed/http://b/': 2}, subset.countBy('feeds'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Smoke tests for the offline benchmark suite, so it keeps running as the
+library changes.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+try:
+    import tracemalloc
+    from benchmarks import suite
+except ImportError:
+    # the suite measures memory peaks with tracemalloc, Python 3.4+
+    suite = None
+
+@unittest.skipIf(suite is None, 'tracemalloc not available')
+class TestSuite(unittest.TestCase):
+    def test_every_case_runs(self):
+        for case in suite.CASES:
+            result = suite.measure(case, scale=0.001, repeat=1)
+            self.assertTrue(result['size'] >= 1)
+            self.assertTrue(result['peakMB'] > 0)
+
+    def test_regressions(self):
+        baseline = {'size': 10, 'perSecond': 100.0, 'peakMB': 10.0}
+        same = dict(baseline)
+        self.assertEqual(suite.regressions('x', same, baseline, 0.25), [])
+        slow = dict(baseline, perSecond=50.0)
+        self.assertEqual(len(suite.regressions('x', slow, baseline, 0.25)), 1)
+        fat = dict(baseline, peakMB=20.0)
+        self.assertEqual(len(suite.regressions('x', fat, baseline, 0.25)), 1)
+        resized = dict(slow, size=20)
+        self.assertEqual(suite.regressions('x', resized, baseline, 0.25), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the httpGet response caches, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import os
+import shutil
+import tempfile
+import time
+
+from libgreader import GoogleReader, Feed, MemoryCache, DiskCache, ReaderUrl
+
+from .fakes import *
+
+FEED_ID = 'feed/http://a/'
+
+class CacheTests(object):
+    def makeCache(self, **options):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.auth = FakeAuthMethod({
+            ReaderUrl.UNREAD_COUNT_URL: unreadCounts({FEED_ID: 1}),
+            feedUrl(FEED_ID): streamContents([item('1')]),
+        })
+        self.reader = GoogleReader(self.auth, cache=self.makeCache())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_ignores_parameter_order_and_ck(self):
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL, {'output': 'json', 'ck': 1, 'a': 2})
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL, {'a': 2, 'ck': 3, 'output': 'json'})
+        self.assertEqual(1, len(self.auth.gets))
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL, {'a': 3, 'output': 'json'})
+        self.assertEqual(2, len(self.auth.gets))
+
+    def test_ttl(self):
+        self.reader.cache = self.makeCache(ttls={ReaderUrl.UNREAD_COUNT_URL: 0.05})
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        time.sleep(0.06)
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        self.assertEqual(2, len(self.auth.gets))
+
+    def test_lru(self):
+        self.reader.cache = self.makeCache(maxEntries=2)
+        for n in (1, 2, 1, 3, 1, 2):
+            self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL, {'n': n})
+        self.assertEqual([1, 2, 3, 2], [p['n'] for url, p in self.auth.gets])
+
+    def test_post_invalidates(self):
+        feed = Feed(self.reader, 'A', FEED_ID)
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        self.reader.httpGet(ReaderUrl.USER_INFO_URL)
+        feed.loadItems()
+        feed.getItems()[0].markRead()
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        self.reader.httpGet(ReaderUrl.USER_INFO_URL)
+        feed.loadItems()
+        self.assertEqual([ReaderUrl.UNREAD_COUNT_URL, ReaderUrl.USER_INFO_URL, feedUrl(FEED_ID),
+                          ReaderUrl.UNREAD_COUNT_URL, feedUrl(FEED_ID)],
+                         [url for url, p in self.auth.gets])
+
+    def test_accounts_kept_apart(self):
+        cache = self.makeCache()
+        readers = []
+        for name in ('alice', 'bob', 'alice'):
+            auth = FakeAuthMethod({ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList([(FEED_ID, name, [])])})
+            auth.tokenKey = 'ClientLogin:%s' % name
+            readers.append(GoogleReader(auth, cache=cache))
+        titles = [reader._decodeJson(reader.httpGet(ReaderUrl.SUBSCRIPTION_LIST_URL))['subscriptions'][0]['title']
+                  for reader in readers]
+        self.assertEqual(['alice', 'bob', 'alice'], titles)
+        self.assertEqual([1, 1, 0], [len(reader.auth.gets) for reader in readers])
+
+        readers[1].httpPost(ReaderUrl.SUBSCRIPTION_EDIT_URL, {})
+        readers[0].httpGet(ReaderUrl.SUBSCRIPTION_LIST_URL)
+        self.assertEqual(1, len(readers[0].auth.gets))
+
+    def test_readers_without_token_key_share_nothing(self):
+        other = GoogleReader(FakeAuthMethod({ReaderUrl.UNREAD_COUNT_URL: unreadCounts({})}),
+                             cache=self.reader.cache)
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        other.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        self.assertEqual(1, len(other.auth.gets))
+
+class TestMemoryCache(CacheTests, unittest.TestCase):
+    def makeCache(self, **options):
+        return MemoryCache(**options)
+
+class TestDiskCache(CacheTests, unittest.TestCase):
+    def makeCache(self, **options):
+        return DiskCache(os.path.join(self.directory, 'cache%f.db' % time.time()), **options)
+
+    def test_persists(self):
+        path = os.path.join(self.directory, 'shared.db')
+        DiskCache(path).put(ReaderUrl.UNREAD_COUNT_URL, {}, 'cached')
+        self.assertEqual('cached', DiskCache(path).get(ReaderUrl.UNREAD_COUNT_URL))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the JSON decoders, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+from libgreader import GoogleReader, ReaderUrl
+from libgreader.decoders import StdlibDecoder, OrjsonDecoder, has_orjson, defaultDecoder
+
+from .fakes import *
+
+LENIENT = b'{"title": "tab\tin a string", "text": "caf\xc3\xa9"}'
+
+class TestDecoders(unittest.TestCase):
+    def test_stdlib_decodes_bytes_and_text(self):
+        decoder = StdlibDecoder()
+        self.assertEqual(u'caf\xe9', decoder.loads(LENIENT)['text'])
+        self.assertEqual(u'caf\xe9', decoder.loads(LENIENT.decode('utf-8'))['text'])
+
+    @unittest.skipUnless(has_orjson, "orjson is not installed")
+    def test_orjson_falls_back_on_control_characters(self):
+        decoder = OrjsonDecoder()
+        self.assertEqual('tab\tin a string', decoder.loads(LENIENT)['title'])
+        self.assertEqual([1, 2], decoder.loads(b'[1, 2]'))
+        self.assertTrue(isinstance(defaultDecoder(), OrjsonDecoder))
+
+    def test_reader_uses_decoder(self):
+        class CountingDecoder(StdlibDecoder):
+            calls = []
+            def loads(self, data):
+                self.calls.append(type(data))
+                return super(CountingDecoder, self).loads(data)
+        decoder = CountingDecoder()
+        reader = GoogleReader(FakeAuthMethod(), decoder=decoder)
+        self.assertEqual(USER_ID, reader.getUserInfo()['userId'])
+        self.assertEqual([bytes], decoder.calls)
+
+    def test_httpGet_still_returns_text(self):
+        reader = GoogleReader(FakeAuthMethod())
+        response = reader.httpGet(ReaderUrl.USER_INFO_URL)
+        self.assertFalse(isinstance(response, bytes))
+        self.assertTrue(isinstance(reader.httpGetBytes(ReaderUrl.USER_INFO_URL), bytes))
+
+if __name__ == '__main__':
+    unittest.main()
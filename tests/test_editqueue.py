@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the write-behind edit queue, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+from libgreader import GoogleReader, Item, SpecialFeed, ReaderUrl
+
+from .fakes import *
+
+class TestEditQueue(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAuthMethod()
+        self.reader = GoogleReader(self.auth)
+        self.reader.userId = USER_ID
+        self.container = SpecialFeed(self.reader, ReaderUrl.READING_LIST)
+        self.items = [Item(self.reader, item(str(i)), self.container) for i in range(10)]
+
+    def test_opposite_edits_cancel(self):
+        queue = self.reader.enableWriteBehind()
+        first = self.items[0].star()
+        second = self.items[0].unStar()
+        self.assertEqual(0, len(queue))
+        self.assertTrue(first.done and first.cancelled and first.ok)
+        self.assertTrue(second.ok)
+        self.reader.flush()
+        self.assertEqual([], self.auth.posts)
+
+    def test_pending_tags_of_an_item(self):
+        queue = self.reader.enableWriteBehind()
+        self.items[0].star()
+        self.items[0].markRead()
+        self.items[1].star()
+        self.items[1].unStar()
+        self.assertEqual(sorted([(ReaderUrl.TAG_STARRED, True), (ReaderUrl.TAG_READ, True)]),
+                         sorted(queue.pendingTags('0')))
+        self.assertEqual([], queue.pendingTags('1'))
+        self.reader.flush()
+        self.assertEqual([], queue.pendingTags('0'))
+
+    def test_edit_undoing_server_state_is_sent(self):
+        starred = Item(self.reader, item('s', starred=True), self.container)
+        self.reader.enableWriteBehind()
+        starred.star()
+        starred.unStar()
+        self.assertFalse(starred.isStarred())
+        self.reader.flush()
+        self.assertEqual([ReaderUrl.TAG_STARRED], [post.get('r') for url, post in self.auth.posts])
+
+    def test_edits_sent_in_queue_order(self):
+        entry = Item(self.reader, item('r', read=True), self.container)
+        self.reader.enableWriteBehind()
+        entry.markUnread()
+        self.container.markAllRead()
+        self.reader.flush()
+        self.assertEqual([ReaderUrl.EDIT_TAG_URL, ReaderUrl.MARK_ALL_READ_URL],
+                         [url for url, post in self.auth.posts])
+        self.assertTrue(entry.isRead())
+
+    def test_mark_all_read_between_edits_keeps_the_last(self):
+        entry = self.items[0]
+        self.reader.enableWriteBehind()
+        entry.markRead()
+        self.reader.markFeedAsRead(self.container)
+        entry.markUnread()
+        self.reader.flush()
+        self.assertEqual([ReaderUrl.MARK_ALL_READ_URL, ReaderUrl.EDIT_TAG_URL],
+                         [url for url, post in self.auth.posts])
+        self.assertEqual(ReaderUrl.TAG_READ, self.auth.posts[1][1]['r'])
+
+    def test_edits_are_batched(self):
+        self.reader.enableWriteBehind(batchSize=4)
+        edits = [entry.markRead() for entry in self.items]
+        edits.append(self.items[0].markRead())
+        self.assertFalse(any(edit.done for edit in edits))
+        self.assertEqual(11, len(self.reader.flush()))
+        self.assertEqual([4, 4, 2], [len(post['i']) for url, post in self.auth.posts])
+        self.assertEqual(ReaderUrl.TAG_READ, self.auth.posts[0][1]['a'])
+        self.assertEqual([self.container.id] * 4, self.auth.posts[0][1]['s'])
+        self.assertTrue(all(edit.ok for edit in edits))
+
+    def test_flush_on_size(self):
+        self.reader.enableWriteBehind(maxPending=3)
+        for entry in self.items[:3]:
+            entry.star()
+        self.assertEqual(1, len(self.auth.posts))
+        self.assertEqual(3, len(self.auth.posts[0][1]['i']))
+
+    def test_flush_on_age(self):
+        self.reader.enableWriteBehind(maxAge=0.05)
+        edit = self.reader.removeItemTag(self.items[0], 'user/-/label/x')
+        self.assertEqual('OK', edit.wait(1))
+        self.assertEqual('user/-/label/x', self.auth.posts[0][1]['r'])
+
+    def test_mark_all_read_is_coalesced(self):
+        self.reader.enableWriteBehind()
+        self.reader.markFeedAsRead(self.container)
+        self.reader.markFeedAsRead(self.container)
+        self.reader.disableWriteBehind()
+        self.assertEqual([(ReaderUrl.MARK_ALL_READ_URL, {'s': self.container.id})], self.auth.posts)
+
+    def test_errors_reach_callers(self):
+        def fail(*args):
+            raise IOError('down')
+        self.auth.post = fail
+        self.reader.enableWriteBehind()
+        edit = self.items[0].star()
+        self.reader.flush()
+        self.assertFalse(edit.ok)
+        self.assertRaises(IOError, edit.wait)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the request instrumentation hooks, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import warnings
+
+from libgreader import GoogleReader, Feed, ReaderUrl, RequestStats, MemoryCache
+
+from .fakes import *
+
+FEED_ID = 'feed/http://a/'
+
+class TestHooks(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAuthMethod({
+            ReaderUrl.UNREAD_COUNT_URL: unreadCounts({FEED_ID: 2}),
+            ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList([(FEED_ID, 'A', ['x'])]),
+            feedUrl(FEED_ID): streamContents([item('1'), item('2')]),
+        })
+        self.reader = GoogleReader(self.auth)
+        self.events = []
+        self.reader.addHook(self.events.append)
+
+    def test_subscription_list_events(self):
+        self.reader.buildSubscriptionList()
+        self.assertEqual(['user-info', 'unread-count', 'subscription/list'],
+                         [event.endpoint for event in self.events])
+        subscriptions = self.events[2]
+        self.assertEqual(200, subscriptions.status)
+        self.assertTrue(subscriptions.bytes > 0)
+        self.assertTrue(subscriptions.decodeTime > 0)
+        self.assertTrue(subscriptions.buildTime > 0)
+        self.assertEqual(0, self.events[1].buildTime)
+
+    def test_content_event_counts_items(self):
+        self.reader.buildSubscriptionList()
+        del self.events[:]
+        self.reader.getFeed(FEED_ID).loadItems()
+        event, = self.events
+        self.assertEqual(('stream/contents', FEED_ID), (event.endpoint, event.streamId))
+        self.assertEqual(2, event.itemCount)
+        self.assertTrue(event.buildTime > 0)
+
+    def test_concurrent_loads_report_build_time(self):
+        self.reader.buildSubscriptionList()
+        del self.events[:]
+        self.reader.loadItemsForContainers([self.reader.getFeed(FEED_ID)])
+        event, = self.events
+        self.assertEqual(2, event.itemCount)
+
+    def test_post_and_error_events(self):
+        self.reader.httpPost(ReaderUrl.MARK_ALL_READ_URL, {'s': FEED_ID})
+        self.assertEqual(('mark-all-as-read', FEED_ID, 'POST'),
+                         (self.events[0].endpoint, self.events[0].streamId, self.events[0].method))
+        self.assertRaises(KeyError, self.reader.httpGet, ReaderUrl.API_URL + 'missing')
+        self.assertTrue(isinstance(self.events[1].error, KeyError))
+
+    def test_cache_hits_flagged(self):
+        self.reader.cache = MemoryCache()
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        self.reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        self.assertEqual([False, True], [event.cached for event in self.events])
+
+    def test_no_events_without_hooks(self):
+        self.reader.removeHook(self.events.append)
+        self.reader.buildSubscriptionList()
+        self.assertEqual([], self.events)
+        self.assertEqual([], self.reader.instrumentation.take())
+
+    def test_failing_hook_does_not_break_requests(self):
+        def broken(event):
+            raise ValueError()
+        self.reader.addHook(broken)
+        with warnings.catch_warnings(record=True):
+            warnings.simplefilter('always')
+            self.reader.getUserInfo()
+        self.assertEqual(1, len(self.events))
+
+class TestRequestStats(unittest.TestCase):
+    def test_aggregates_per_endpoint(self):
+        auth = FakeAuthMethod({ReaderUrl.UNREAD_COUNT_URL: unreadCounts({FEED_ID: 2})})
+        reader = GoogleReader(auth)
+        stats = RequestStats(buckets=(0.5, 1.0))
+        reader.addHook(stats)
+        for i in range(3):
+            reader.httpGet(ReaderUrl.UNREAD_COUNT_URL)
+        summary = stats.summary()['unread-count']
+        self.assertEqual(3, summary['requests'])
+        self.assertEqual([3, 0, 0], summary['histogram'])
+        self.assertEqual(0.5, summary['p99'])
+        stats.reset()
+        self.assertEqual({}, stats.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
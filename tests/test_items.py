@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for Item, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import gc
+
+from libgreader import GoogleReader, Item, SpecialFeed, Feed, Category, ReaderUrl
+
+from .fakes import *
+
+class TestItem(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAuthMethod()
+        self.reader = GoogleReader(self.auth)
+        self.reader.userId = USER_ID
+        self.container = SpecialFeed(self.reader, ReaderUrl.READING_LIST)
+
+    def test_fields(self):
+        data = item('1', read=True, crawlTimeMsec=5000)
+        entry = Item(self.reader, data, self.container)
+        self.assertEqual([entry], self.container.getItems())
+        self.assertEqual('title 1', entry.title)
+        self.assertEqual('author', entry.author)
+        self.assertEqual('content 1', entry.content)
+        self.assertEqual('http://a/1', entry.url)
+        self.assertEqual(5, entry.time)
+        self.assertEqual({'title': 'A', 'url': 'http://a/'}, entry.origin)
+        self.assertTrue(entry.isRead())
+        self.assertFalse(entry.isStarred())
+        self.assertFalse(entry.isShared())
+        self.assertTrue(entry.canUnread)
+        self.assertFalse(hasattr(entry, '__dict__'))
+
+    def test_missing_fields(self):
+        entry = Item(self.reader, {'id': '1'}, self.container)
+        self.assertEqual('(no title)', entry.title)
+        self.assertEqual('', entry.content)
+        self.assertEqual(None, entry.url)
+        self.assertEqual(None, entry.time)
+        self.assertEqual(None, entry.feed)
+        self.assertFalse(entry.isRead())
+
+    def test_origin_feed_is_registered(self):
+        entry = Item(self.reader, item('1', 'feed/http://b/'), self.container)
+        self.assertEqual([], self.reader.getSubscriptionList())
+        self.assertEqual('feed/http://b/', entry.feed.id)
+        self.assertTrue(entry.feed is self.reader.getFeed('feed/http://b/'))
+
+    def test_assigned_fields_win(self):
+        entry = Item(self.reader, item('1', starred=True), self.container)
+        entry.title = 'other'
+        entry.read = True
+        self.assertEqual('other', entry.title)
+        self.assertTrue(entry.isRead())
+        self.assertTrue(entry.isStarred())
+
+    def test_mark_starred(self):
+        entry = Item(self.reader, item('1'), self.container)
+        self.assertTrue(entry.star())
+        self.assertTrue(entry.isStarred())
+        self.assertTrue(entry.unStar())
+        self.assertFalse(entry.isStarred())
+        self.assertEqual([ReaderUrl.TAG_STARRED, ReaderUrl.TAG_STARRED],
+                         [post.get('a', post.get('r')) for url, post in self.auth.posts])
+
+class TestTags(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAuthMethod()
+        self.reader = GoogleReader(self.auth)
+        self.reader.userId = USER_ID
+        self.container = SpecialFeed(self.reader, ReaderUrl.READING_LIST)
+        data = item('1', read=True)
+        data['categories'] += ['user/%s/label/tech' % USER_ID, 'user/-/state/com.google/broadcast',
+                               'Technology']
+        self.entry = Item(self.reader, data, self.container)
+
+    def test_tags_are_interned(self):
+        tags = self.reader.tagDictionary
+        self.assertEqual([ReaderUrl.TAG_READ, ReaderUrl.TAG_SHARED, 'user/-/label/tech'],
+                         self.entry.getTags())
+        self.assertEqual(['tech'], self.entry.getLabels())
+        self.assertTrue(self.entry.isShared())
+        self.assertTrue(self.entry.hasTag('user/-/label/tech'))
+        self.assertTrue(self.entry.hasTag('user/%s/label/tech' % USER_ID))
+        self.assertFalse(self.entry.hasTag('Technology'))
+        self.assertFalse('Technology' in tags)
+        self.assertEqual(tags.intern('user/-/label/tech'),
+                         tags.intern('user/%s/label/tech' % USER_ID))
+
+    def test_added_tags_merged_with_the_record(self):
+        entry = Item(self.reader, item('3', starred=True), self.container)
+        self.reader.addItemTag(entry, 'user/-/label/later')
+        self.assertEqual(sorted([ReaderUrl.TAG_STARRED, 'user/-/label/later']), sorted(entry.getTags()))
+        self.assertEqual(0, self.reader.tagDictionary.bit('Technology'))
+        self.assertTrue('Technology' in self.reader.tagDictionary._bits)
+
+    def test_tags_of_other_users_ignored(self):
+        data = item('2')
+        data['categories'] += ['user/99999/state/com.google/broadcast',
+                               'user/99999/label/friendlabel']
+        shared = Item(self.reader, data, self.container)
+        self.assertFalse(shared.isShared())
+        self.assertEqual([], shared.getLabels())
+        self.assertFalse(shared.hasTag('user/-/label/friendlabel'))
+        self.assertEqual(None, self.reader.tagDictionary.intern('user/99999/label/tech'))
+
+    def test_user_id_known_later(self):
+        reader = GoogleReader(FakeAuthMethod())
+        tags = reader.tagDictionary
+        self.assertTrue(tags.bit('user/99999/label/x'))
+        reader.userId = USER_ID
+        self.assertEqual(USER_ID, tags.userId)
+        self.assertFalse(tags.bit('user/99999/label/x'))
+        self.assertEqual(tags.bit('user/-/label/x'), tags.bit('user/%s/label/x' % USER_ID))
+
+    def test_label_edits(self):
+        other = Item(self.reader, item('2'), self.container)
+        self.reader.addItemTag(other, 'user/-/label/tech')
+        self.assertEqual(['1', '2'], [i.id for i in self.container.getItemsWithTag('user/-/label/tech')])
+        self.reader.removeItemTag(self.entry, 'user/-/label/tech')
+        self.assertEqual(['2'], [i.id for i in self.container.getItemsWithTag('user/-/label/tech')])
+        self.assertEqual([], self.container.getItemsWithTag('Technology'))
+
+class TestIdentityMap(unittest.TestCase):
+    def setUp(self):
+        self.reader = GoogleReader(FakeAuthMethod())
+        self.reader.userId = USER_ID
+        self.category = Category(self.reader, 'tech', 'user/%s/label/tech' % USER_ID)
+        self.feed = Feed(self.reader, 'A', 'feed/http://a/', unread=2, categories=[self.category])
+        self.readingList = SpecialFeed(self.reader, ReaderUrl.READING_LIST)
+        self.readingList.unread = 2
+
+    def test_one_item_per_id(self):
+        records = [item('1'), item('2')]
+        fromFeed = self.reader.itemsToObjects(self.feed, records)
+        fromList = self.reader.itemsToObjects(self.readingList, [item('2'), item('3')])
+        self.assertTrue(fromFeed[1] is fromList[0])
+        self.assertEqual((self.feed, self.readingList), fromList[0].parents)
+        self.assertEqual(self.feed, fromList[0].parent)
+        self.assertEqual(['2', '3'], [i.id for i in self.readingList.getItems()])
+        self.reader.itemsToObjects(self.feed, records)
+        self.assertEqual(2, len(self.feed.getItems()))
+        self.assertEqual((self.feed, self.readingList), fromList[0].parents)
+
+    def test_state_is_shared(self):
+        entry = self.reader.itemsToObjects(self.feed, [item('1')])[0]
+        self.reader.itemsToObjects(self.category, [item('1')])
+        self.reader.itemsToObjects(self.readingList, [item('1')])
+        entry.markRead()
+        self.assertTrue(self.readingList.getItem('1').isRead())
+        self.assertEqual(1, self.feed.unread)
+        self.assertEqual(1, self.category.unread)
+        self.assertEqual(1, self.readingList.unread)
+
+    def test_reload_takes_new_record(self):
+        entry = self.reader.itemsToObjects(self.feed, [item('1')])[0]
+        self.assertEqual('title 1', entry.title)
+        self.assertFalse(entry.isRead())
+        fresh = item('1', read=True, starred=True)
+        fresh['title'] = 'edited'
+        self.reader.itemsToObjects(self.readingList, [fresh])
+        self.assertTrue(entry.data is fresh)
+        self.assertEqual('edited', entry.title)
+        self.assertTrue(entry.isRead())
+        self.assertTrue(entry.isStarred())
+
+    def test_reload_keeps_queued_edits(self):
+        entry = self.reader.itemsToObjects(self.feed, [item('1')])[0]
+        self.reader.enableWriteBehind()
+        entry.markRead()
+        self.reader.itemsToObjects(self.feed, [item('1', starred=True)])
+        self.assertTrue(entry.isRead())
+        self.assertTrue(entry.isStarred())
+
+    def test_indexed_when_a_second_container_loads(self):
+        entry = self.reader.itemsToObjects(self.feed, [item('1'), item('2')])[0]
+        self.assertEqual({}, self.reader.itemsById._refs)
+        self.assertTrue(self.reader.itemsById.get('1') is entry)
+        self.assertEqual(2, len(self.reader.itemsById))
+        self.reader.itemsToObjects(self.readingList, [item('1')])
+        self.assertEqual(['1', '2'], sorted(self.reader.itemsById._refs))
+        self.assertTrue(self.readingList.getItem('1') is entry)
+
+    def test_unreferenced_items_are_dropped(self):
+        self.reader.itemsToObjects(self.feed, [item('1')])
+        self.feed.clearItems()
+        gc.collect()
+        self.assertFalse('1' in self.reader.itemsById)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the streaming decoder of stream/contents responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import json
+
+from libgreader import GoogleReader, Feed
+from libgreader.jsonstream import StreamedContent
+
+from .fakes import *
+
+def chunked(data, size):
+    raw = json.dumps(data).encode('utf-8')
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+class TestStreamedContent(unittest.TestCase):
+    def setUp(self):
+        items = [item(str(i)) for i in range(5)]
+        items[2]['title'] = u'caf\xe9 ☃'
+        self.data = {'id': 'feed/x', 'updated': 1234567890, 'items': items,
+                     'continuation': 'CONT', 'n': 12345}
+
+    def test_every_chunk_size(self):
+        for size in (1, 2, 3, 7, 64, 100000):
+            content = StreamedContent(chunked(self.data, size))
+            self.assertEqual('feed/x', content['id'])
+            self.assertEqual(1234567890, content['updated'])
+            self.assertEqual(self.data['items'], list(content.iterItems()))
+            self.assertEqual('CONT', content['continuation'])
+            self.assertEqual(12345, content['n'])
+
+    def test_trailing_member_before_items_consumed(self):
+        content = StreamedContent(chunked(self.data, 10))
+        self.assertEqual('CONT', content.get('continuation'))
+        self.assertEqual(5, len(list(content.iterItems())))
+
+    def test_items_are_decoded_lazily(self):
+        chunks = chunked(self.data, 50)
+        read = []
+
+        def source():
+            for chunk in chunks:
+                read.append(chunk)
+                yield chunk
+        content = StreamedContent(source())
+        items = content.iterItems()
+        next(items)
+        self.assertTrue(len(read) < len(chunks))
+
+    def test_truncated(self):
+        content = StreamedContent(chunked(self.data, 10)[:-5])
+        self.assertRaises(ValueError, list, content.iterItems())
+
+class TestStreamingReader(unittest.TestCase):
+    def test_load_items(self):
+        feedId = 'feed/http://a/'
+        auth = FakeAuthMethod({feedUrl(feedId): streamContents([item('1'), item('2')], 'more')})
+        reader = GoogleReader(auth, streamContent=True)
+        feed = Feed(reader, 'A', feedId)
+        feed.loadItems()
+        self.assertEqual(['1', '2'], [i.id for i in feed.getItems()])
+        self.assertEqual(2, feed.lastLoadLength)
+        self.assertEqual('more', feed.continuation)
+
+    def test_iter_items(self):
+        feedId = 'feed/http://a/'
+
+        def page(parameters):
+            number = int(parameters.get('c', 0))
+            return streamContents([item('%d-%d' % (number, i)) for i in range(3)],
+                                  str(number + 1) if number < 2 else None)
+        reader = GoogleReader(FakeAuthMethod({feedUrl(feedId): page}), streamContent=True)
+        feed = Feed(reader, 'A', feedId)
+        self.assertEqual(9, len(list(feed.iterItems(prefetch=2))))
+
+    def test_iter_items_decodes_one_item_at_a_time(self):
+        feedId = 'feed/http://a/'
+        auth = FakeAuthMethod({feedUrl(feedId): streamContents([item(str(i)) for i in range(5)])})
+        reader = GoogleReader(auth, streamContent=True)
+        feed = Feed(reader, 'A', feedId)
+        pages = []
+        getContent = feed._getContent
+
+        def record(*args):
+            pages.append(getContent(*args))
+            return pages[-1]
+        feed._getContent = record
+        items = feed.iterItems()
+        next(items)
+        self.assertEqual(1, pages[0].itemCount)
+        self.assertEqual(4, len(list(items)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for loading container items, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import time
+
+from libgreader import GoogleReader, Feed
+
+from .fakes import *
+
+def slow(response, delay=0.1):
+    def respond(parameters):
+        time.sleep(delay)
+        return response
+    return respond
+
+class TestLoadItemsForContainers(unittest.TestCase):
+    def setUp(self):
+        self.feedIds = ['feed/http://%d/' % i for i in range(8)]
+        responses = {}
+        for feedId in self.feedIds:
+            responses[feedUrl(feedId)] = slow(streamContents([item(feedId + '1', feedId)], 'c'))
+        responses[feedUrl('feed/http://broken/')] = slow('not json')
+        self.auth = FakeAuthMethod(responses)
+        self.reader = GoogleReader(self.auth)
+
+    def test_loads_concurrently(self):
+        feeds = [Feed(self.reader, feedId, feedId) for feedId in self.feedIds]
+        start = time.time()
+        results = self.reader.loadItemsForContainers(feeds, max_workers=8)
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertEqual(feeds, [result.container for result in results])
+        for feed, result in zip(feeds, results):
+            self.assertTrue(result.ok)
+            self.assertTrue(result.elapsed >= 0.1)
+            self.assertEqual([feed.id + '1'], [i.id for i in feed.getItems()])
+            self.assertEqual('c', feed.continuation)
+
+    def test_streamed_pages_decoded_by_workers(self):
+        reader = GoogleReader(self.auth, streamContent=True)
+        feeds = [Feed(reader, feedId, feedId) for feedId in self.feedIds]
+        pages = []
+        for feed in feeds:
+            feed._itemsLoadedDone = lambda data, excludeRead, done=feed._itemsLoadedDone: \
+                (pages.append(type(data)), done(data, excludeRead))
+        results = reader.loadItemsForContainers(feeds, max_workers=8)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([dict] * len(feeds), pages)
+        self.assertEqual('c', feeds[0].continuation)
+        self.assertEqual([self.feedIds[0] + '1'], [i.id for i in feeds[0].getItems()])
+
+    def test_errors_are_reported_per_container(self):
+        good = Feed(self.reader, 'good', self.feedIds[0])
+        broken = Feed(self.reader, 'broken', 'feed/http://broken/')
+        results = self.reader.loadItemsForContainers([broken, good], max_workers=2)
+        self.assertFalse(results[0].ok)
+        self.assertTrue(isinstance(results[0].error, ValueError))
+        self.assertFalse(broken.lastLoadOk)
+        self.assertTrue(results[1].ok)
+        self.assertEqual(1, good.countItems())
+
+class TestIterItems(unittest.TestCase):
+    def setUp(self):
+        self.feedId = 'feed/http://a/'
+        self.fetched = []
+
+        def page(parameters):
+            time.sleep(0.05)
+            number = int(parameters.get('c', 0))
+            self.fetched.append(number)
+            items = [item('%d-%d' % (number, i)) for i in range(parameters['n'])]
+            return streamContents(items, str(number + 1) if number < 4 else None)
+
+        self.reader = GoogleReader(FakeAuthMethod({feedUrl(self.feedId): page}))
+        self.feed = Feed(self.reader, 'A', self.feedId)
+
+    def test_follows_continuations(self):
+        ids = [i.id for i in self.feed.iterItems(pageSize=3)]
+        self.assertEqual(15, len(ids))
+        self.assertEqual('4-2', ids[-1])
+        self.assertEqual([0, 1, 2, 3, 4], self.fetched)
+        self.assertEqual([], self.feed.getItems())
+
+    def test_prefetches_next_page(self):
+        start = time.time()
+        for i in self.feed.iterItems(pageSize=1, prefetch=1):
+            time.sleep(0.05)
+        prefetched = time.time() - start
+        start = time.time()
+        for i in self.feed.iterItems(pageSize=1, prefetch=0):
+            time.sleep(0.05)
+        self.assertTrue(prefetched < time.time() - start - 0.1)
+
+    def test_stops_early(self):
+        items = self.feed.iterItems(pageSize=2, prefetch=1)
+        next(items)
+        items.close()
+        time.sleep(0.3)
+        self.assertTrue(len(self.fetched) <= 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for decoding item pages in worker processes, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import json
+import pickle
+
+from libgreader import GoogleReader, Feed, SQLiteItemStore
+from libgreader.procdecode import decodePage, materialize, CompactRecord
+
+from .fakes import *
+
+FEED_ID = 'feed/http://a/'
+
+def records():
+    first = item('1', read=True, crawlTimeMsec=5000)
+    first['title'] = u'caf\xe9'
+    second = item('2', starred=True)
+    second['content'] = second.pop('summary')
+    second['isReadStateLocked'] = 'true'
+    third = item('3')
+    third['published'] = 1234
+    third['enclosure'] = [{'href': 'http://a/3.mp3', 'type': 'audio/mpeg'}]
+    third['alternate'].append({'href': 'http://a/3.rss', 'type': 'application/rss+xml'})
+    third['summary']['direction'] = 'ltr'
+    del third['origin']['htmlUrl']
+    third['isReadStateLocked'] = 'false'
+    return [first, second, third, {'id': '4'}]
+
+class TestCompactRecords(unittest.TestCase):
+    def test_round_trip(self):
+        body = json.dumps(streamContents(records(), 'next')).encode('utf-8')
+        page = materialize(*pickle.loads(pickle.dumps(decodePage(body))))
+        self.assertEqual('next', page['continuation'])
+        self.assertEqual(1000, page['updated'])
+        self.assertTrue(all(isinstance(record, CompactRecord) for record in page['items']))
+        for original, compact in zip(records(), page['items']):
+            self.assertEqual(original, dict(compact))
+
+class TestProcessDecoding(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAuthMethod({feedUrl(FEED_ID): streamContents(records(), 'next')})
+        self.reader = GoogleReader(self.auth)
+        self.reader.userId = USER_ID
+        self.reader.enableProcessDecoding(1, minBytes=0)
+
+    def tearDown(self):
+        self.reader.close()
+
+    def test_items_from_workers(self):
+        feed = Feed(self.reader, 'A', FEED_ID)
+        feed.loadItems()
+        self.assertEqual('next', feed.continuation)
+        first, second, third, fourth = feed.getItems()
+        self.assertEqual(u'caf\xe9', first.title)
+        self.assertEqual('content 1', first.content)
+        self.assertEqual(5, first.time)
+        self.assertTrue(first.isRead())
+        self.assertTrue(second.isStarred())
+        self.assertEqual('content 2', second.content)
+        self.assertFalse(second.canUnread)
+        self.assertEqual('http://a/2', second.url)
+        self.assertEqual(1234, third.data['published'])
+        self.assertEqual('http://a/3', third.url)
+        self.assertEqual({'title': 'A', 'url': ''}, third.origin)
+        self.assertEqual('(no title)', fourth.title)
+        self.assertEqual(None, fourth.time)
+
+    def test_small_pages_stay_in_process(self):
+        self.reader.decodeMinBytes = 1 << 20
+        feed = Feed(self.reader, 'A', FEED_ID)
+        feed.loadItems()
+        self.assertTrue(isinstance(feed.getItem('1').data, dict))
+
+    def test_store_accepts_compact_records(self):
+        store = SQLiteItemStore()
+        self.reader.itemStore = store
+        Feed(self.reader, 'A', FEED_ID).loadItems()
+        self.assertEqual(4, store.countItems(FEED_ID))
+        stored = dict((record['id'], record) for record, read, starred, shared
+                      in store.loadItems(FEED_ID, False))
+        self.assertEqual(records()[2], stored['3'])
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
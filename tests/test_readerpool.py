@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for ReaderPool, these do not hit the network.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import threading
+import time
+
+from libgreader import GoogleReader, AuthenticationMethod, ConnectionPool, ReaderPool
+
+from .fakes import *
+
+class TestReaderPool(unittest.TestCase):
+    def gated(self, pool):
+        """
+        Hold the only worker of pool until the returned event is set, so the
+        tasks submitted meanwhile are all queued.
+        """
+        gate = threading.Event()
+        pool.addAccount('gate', FakeAuthMethod())
+        pool.submit('gate', lambda reader: gate.wait())
+        time.sleep(0.05)
+        return gate
+
+    def test_accounts_share_the_pool(self):
+        own = AuthenticationMethod()
+        own.pool.session()
+        ownPool = own.pool
+        with ReaderPool(maxWorkers=1) as pool:
+            reader = pool.addAccount('a', own)
+            other = pool.addAccount('b', GoogleReader(AuthenticationMethod()))
+            self.assertTrue(reader.auth.pool is pool.connectionPool)
+            self.assertTrue(other.auth.pool is pool.connectionPool)
+            self.assertFalse(ownPool.isOpen())
+            self.assertTrue(pool.getReader('a') is reader)
+            self.assertRaises(KeyError, pool.addAccount, 'a', AuthenticationMethod())
+
+        shared = ConnectionPool()
+        shared.session()
+        with ReaderPool(shared, maxWorkers=1) as pool:
+            pool.addAccount('a', AuthenticationMethod())
+        self.assertTrue(shared.isOpen())
+
+    def test_round_robin(self):
+        order = []
+        with ReaderPool(maxWorkers=1) as pool:
+            gate = self.gated(pool)
+            pool.addAccount('big', FakeAuthMethod())
+            pool.addAccount('small', FakeAuthMethod())
+            for number in range(6):
+                pool.submit('big', lambda reader: order.append('big'))
+            for number in range(2):
+                pool.submit('small', lambda reader: order.append('small'))
+            gate.set()
+        self.assertEqual(['big', 'small', 'big', 'small', 'big', 'big', 'big', 'big'], order)
+
+    def test_weights(self):
+        order = []
+        with ReaderPool(maxWorkers=1) as pool:
+            gate = self.gated(pool)
+            pool.addAccount('heavy', FakeAuthMethod(), weight=3)
+            pool.addAccount('light', FakeAuthMethod())
+            for key in ('heavy', 'light'):
+                for number in range(8):
+                    pool.submit(key, lambda reader, key=key: order.append(key))
+            gate.set()
+        self.assertEqual(6, order[:8].count('heavy'))
+        self.assertEqual(2, order[:8].count('light'))
+
+    def test_concurrency_cap(self):
+        running = [0]
+        peak = [0]
+        lock = threading.Lock()
+        def task(reader):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+        with ReaderPool(maxWorkers=4) as pool:
+            pool.addAccount('a', FakeAuthMethod(), maxConcurrency=2)
+            for number in range(8):
+                pool.submit('a', task)
+        self.assertEqual(2, peak[0])
+
+    def test_results_and_stats(self):
+        def fail(reader):
+            raise IOError('down')
+        with ReaderPool(maxWorkers=2) as pool:
+            pool.addAccount('a', FakeAuthMethod())
+            pool.addAccount('b', FakeAuthMethod())
+            userIds = pool.submitAll(lambda reader: reader.getUserInfo()['userId'])
+            failed = pool.submit('b', fail)
+            self.assertEqual(USER_ID, userIds['a'].result())
+            self.assertEqual(USER_ID, userIds['b'].result())
+            self.assertRaises(IOError, failed.result)
+            stats = pool.stats()
+        self.assertEqual(1, stats['a']['completed'])
+        self.assertEqual(0, stats['a']['failed'])
+        self.assertEqual(2, stats['b']['submitted'])
+        self.assertEqual(1, stats['b']['failed'])
+        self.assertEqual(0, stats['b']['queued'])
+        self.assertRaises(RuntimeError, pool.submit, 'a', fail)
+
+    def test_remove_cancels_queued(self):
+        with ReaderPool(maxWorkers=1) as pool:
+            gate = self.gated(pool)
+            pool.addAccount('a', FakeAuthMethod())
+            future = pool.submit('a', lambda reader: 1)
+            pool.removeAccount('a')
+            gate.set()
+        self.assertTrue(future.cancelled())
+        self.assertEqual(['gate'], list(pool.stats()))
+
+if __name__ == '__main__':
+    unittest.main()
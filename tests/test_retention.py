@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for item retention policies, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import time
+
+from libgreader import GoogleReader, Feed, RetentionPolicy, SQLiteItemStore
+from libgreader.retention import itemBytes
+
+from .fakes import *
+
+FEED_ID = 'feed/http://a/'
+
+class TestRetentionPolicy(unittest.TestCase):
+    def setUp(self):
+        now = int(time.time())
+        # four pages of five items, newest first, the last two pages a day old
+        self.pages = []
+        for page in range(4):
+            age = 0 if page < 2 else 86400
+            self.pages.append([item('%d-%d' % (page, i), crawlTimeMsec=(now - age - page * 10 - i) * 1000)
+                               for i in range(5)])
+        self.auth = FakeAuthMethod({feedUrl(FEED_ID): self.respond})
+        self.reader = GoogleReader(self.auth)
+        self.feed = Feed(self.reader, 'A', FEED_ID, unread=20)
+
+    def respond(self, parameters):
+        page = int(parameters.get('c', 0))
+        continuation = str(page + 1) if page + 1 < len(self.pages) else None
+        return streamContents(self.pages[page], continuation)
+
+    def loadAll(self):
+        self.feed.loadItems(loadLimit=5)
+        while self.feed.continuation:
+            self.feed.loadMoreItems(loadLimit=5)
+
+    def ids(self):
+        return [i.id for i in self.feed.getItems()]
+
+    def test_max_items_keeps_a_window(self):
+        self.feed.setRetention(RetentionPolicy(maxItems=7))
+        self.loadAll()
+        self.assertEqual(['2-3', '2-4'] + ['3-%d' % i for i in range(5)], self.ids())
+        self.assertEqual(sorted(self.ids()), sorted(self.feed.itemsById))
+        self.assertEqual(20, self.feed.unread)
+        self.assertEqual(5, self.feed.lastLoadLength)
+        self.assertEqual(None, self.feed.continuation)
+
+    def test_max_age(self):
+        self.feed.setRetention(RetentionPolicy(maxAge=3600))
+        self.loadAll()
+        self.assertEqual(['0-%d' % i for i in range(5)] + ['1-%d' % i for i in range(5)], self.ids())
+        self.assertRaises(KeyError, self.feed.getItem, '2-0')
+
+    def test_max_bytes(self):
+        self.loadAll()
+        size = itemBytes(self.feed.getItem('0-0'))
+        self.feed.setRetention(RetentionPolicy(maxBytes=size * 3))
+        self.assertEqual(['3-2', '3-3', '3-4'], self.ids())
+        self.assertTrue(self.feed.loadedBytes <= size * 3)
+        self.feed.loadItems(loadLimit=5)
+        self.assertEqual(['0-2', '0-3', '0-4'], self.ids())
+
+    def test_spill_store(self):
+        store = SQLiteItemStore()
+        self.feed.setRetention(RetentionPolicy(maxItems=5, spillStore=store))
+        self.loadAll()
+        self.assertEqual(['3-%d' % i for i in range(5)], self.ids())
+        self.assertEqual(15, store.countItems(FEED_ID))
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
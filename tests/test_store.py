@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the SQLite item store, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import os
+import shutil
+import tempfile
+
+from libgreader import GoogleReader, Feed, SQLiteItemStore
+
+from .fakes import *
+
+FEED_ID = 'feed/http://a/'
+
+class TestSQLiteItemStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'items.db')
+        self.stream = [item(str(i), crawlTimeMsec=(10 - i) * 1000000) for i in range(10)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def respond(self, parameters):
+        items = self.stream
+        if 'ot' in parameters:
+            items = [i for i in items if int(i['crawlTimeMsec']) // 1000 >= parameters['ot']]
+        start = int(parameters.get('c', 0))
+        page = items[start:start + parameters['n']]
+        more = start + parameters['n'] < len(items)
+        return streamContents(page, str(start + parameters['n']) if more else None)
+
+    def open(self):
+        auth = FakeAuthMethod({feedUrl(FEED_ID): self.respond})
+        reader = GoogleReader(auth, itemStore=SQLiteItemStore(self.path))
+        return auth, Feed(reader, 'A', FEED_ID)
+
+    def test_warm_restart(self):
+        auth, feed = self.open()
+        feed.loadItems(loadLimit=4)
+        feed.loadMoreItems(loadLimit=4)
+        feed.getItems()[1].markRead()
+        feed.googleReader.itemStore.close()
+
+        self.stream.insert(0, item('new', crawlTimeMsec=11 * 1000000))
+        auth, feed = self.open()
+        feed.loadItems(loadLimit=4)
+        self.assertEqual(['new', '0', '1', '2', '3', '4', '5', '6', '7'],
+                         [i.id for i in feed.getItems()])
+        self.assertEqual(1, len(auth.gets))
+        self.assertEqual(10000, auth.gets[0][1]['ot'])
+        self.assertTrue(feed.getItem('1').isRead())
+        self.assertEqual('8', feed.continuation)
+
+        feed.loadMoreItems(loadLimit=4)
+        self.assertEqual(['8', '9'], [i.id for i in feed.getItems()[-2:]])
+
+    def test_many_new_items_reload(self):
+        auth, feed = self.open()
+        feed.loadItems(loadLimit=2)
+        self.stream[0:0] = [item('new%d' % i, crawlTimeMsec=(20 - i) * 1000000) for i in range(3)]
+        feed.loadItems(loadLimit=2)
+        self.assertEqual(['new0', 'new1'], [i.id for i in feed.getItems()])
+        self.assertEqual(2, feed.googleReader.itemStore.countItems(FEED_ID))
+
+    def test_concurrent_load_records_exclude_read(self):
+        auth, feed = self.open()
+        feed.googleReader.loadItemsForContainers([feed], excludeRead=True, loadLimit=4)
+        store = feed.googleReader.itemStore
+        self.assertEqual(('4', 1000, True), store.getStreamState(FEED_ID))
+        feed.loadItems(loadLimit=4)
+        self.assertEqual(2, len(auth.gets))
+        self.assertFalse('ot' in auth.gets[-1][1])
+        self.assertEqual(('4', 1000, False), store.getStreamState(FEED_ID))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the subscription list, using canned responses.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import time
+
+from libgreader import GoogleReader, Item, ReaderUrl
+
+from .fakes import *
+
+def specialId(type):
+    return 'user/%s/state/com.google/%s' % (USER_ID, type)
+
+class TestBuildSubscriptionList(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAuthMethod({
+            ReaderUrl.UNREAD_COUNT_URL: unreadCounts({
+                'feed/http://a/': 3, 'feed/http://b/': 4,
+                'user/%s/label/tech' % USER_ID: 7,
+                specialId(ReaderUrl.READING_LIST): 7,
+                specialId(ReaderUrl.SHARED_LIST): 2,
+                specialId(ReaderUrl.FRIENDS_LIST): 5,
+            }),
+            ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList([
+                ('feed/http://a/', 'A', ['tech', 'news']),
+                ('feed/http://b/', 'B', ['tech', 'tech']),
+                ('feed/http://c/', 'C', []),
+            ]),
+        })
+        self.reader = GoogleReader(self.auth)
+        self.reader.makeSpecialFeeds()
+        self.reader.buildSubscriptionList()
+
+    def test_feeds_and_categories(self):
+        self.assertEqual(['A', 'B', 'C'], [f.title for f in self.reader.getSubscriptionList()])
+        self.assertEqual(['tech', 'news'], [c.label for c in self.reader.getCategories()])
+        self.assertEqual(['C'], [f.title for f in self.reader.orphanFeeds])
+
+    def test_membership_is_unique_and_ordered(self):
+        tech = self.reader.getCategory('user/%s/label/tech' % USER_ID)
+        self.assertEqual(['A', 'B'], [f.title for f in tech.getFeeds()])
+        self.assertEqual(7, tech.unread)
+        b = self.reader.getFeed('feed/http://b/')
+        self.assertEqual([tech], b.getCategories())
+
+    def test_special_feed_unreads(self):
+        self.assertEqual(7, self.reader.getSpecialFeed(ReaderUrl.READING_LIST).unread)
+        self.assertEqual(2, self.reader.getSpecialFeed(ReaderUrl.SHARED_LIST).unread)
+        self.assertEqual(5, self.reader.getSpecialFeed(ReaderUrl.FRIENDS_LIST).unread)
+        self.assertEqual(0, self.reader.getSpecialFeed(ReaderUrl.STARRED_LIST).unread)
+
+class TestSyncSubscriptionList(unittest.TestCase):
+    def setUp(self):
+        self.unread = {'feed/http://a/': 3, 'feed/http://b/': 4}
+        self.subscriptions = [
+            ('feed/http://a/', 'A', ['tech']),
+            ('feed/http://b/', 'B', ['tech', 'news']),
+            ('feed/http://c/', 'C', []),
+        ]
+        self.auth = FakeAuthMethod({
+            ReaderUrl.UNREAD_COUNT_URL: lambda parameters: unreadCounts(self.unread),
+            ReaderUrl.SUBSCRIPTION_LIST_URL: lambda parameters: subscriptionList(self.subscriptions),
+        })
+        self.reader = GoogleReader(self.auth)
+        self.reader.buildSubscriptionList()
+
+    def test_unchanged(self):
+        feeds = self.reader.getSubscriptionList()
+        changes = self.reader.syncSubscriptionList()
+        self.assertFalse(changes)
+        self.assertTrue(feeds is self.reader.getSubscriptionList())
+
+    def test_changes(self):
+        a = self.reader.getFeed('feed/http://a/')
+        Item(self.reader, item('x'), a)
+        tech = self.reader.getCategory('user/%s/label/tech' % USER_ID)
+        self.subscriptions = [
+            ('feed/http://a/', 'A renamed', ['tech']),
+            ('feed/http://b/', 'B', ['news']),
+            ('feed/http://d/', 'D', ['new']),
+        ]
+        self.unread = {'feed/http://a/': 1, 'feed/http://b/': 4, 'feed/http://d/': 2}
+        changes = self.reader.syncSubscriptionList()
+
+        self.assertEqual(['D'], [f.title for f in changes.added])
+        self.assertEqual(['C'], [f.title for f in changes.removed])
+        self.assertEqual(['A renamed'], [f.title for f in changes.retitled])
+        self.assertEqual(['B'], [f.title for f in changes.recategorized])
+
+        self.assertTrue(a is self.reader.getFeed('feed/http://a/'))
+        self.assertEqual(['x'], [i.id for i in a.getItems()])
+        self.assertEqual(1, a.unread)
+        self.assertEqual([a], tech.getFeeds())
+        self.assertEqual(1, tech.unread)
+        self.assertEqual(['tech', 'news', 'new'], [c.label for c in self.reader.getCategories()])
+        self.assertEqual([], self.reader.orphanFeeds)
+        self.assertEqual(None, self.reader.getFeed('feed/http://c/'))
+
+    def test_only_unread_changed(self):
+        self.unread = {'feed/http://a/': 10}
+        changes = self.reader.syncSubscriptionList()
+        self.assertFalse(changes)
+        self.assertEqual(10, self.reader.getFeed('feed/http://a/').unread)
+        self.assertEqual(0, self.reader.getFeed('feed/http://b/').unread)
+        self.assertEqual(10, self.reader.getCategory('user/%s/label/tech' % USER_ID).unread)
+
+class TestRefreshChanged(unittest.TestCase):
+    def setUp(self):
+        self.unread = {'feed/http://a/': 1, 'feed/http://b/': 1}
+        self.newest = {'feed/http://a/': 1000000000, 'feed/http://b/': 1000000000}
+        self.pages = {
+            'feed/http://a/': [item('a1', crawlTimeMsec=1000000)],
+            'feed/http://b/': [item('b1', 'feed/http://b/', crawlTimeMsec=1000000)],
+        }
+        responses = {
+            ReaderUrl.UNREAD_COUNT_URL: lambda parameters: unreadCounts(self.unread, self.newest),
+            ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList([
+                ('feed/http://a/', 'A', ['tech']),
+                ('feed/http://b/', 'B', ['tech']),
+            ]),
+        }
+        for id in self.pages:
+            responses[feedUrl(id)] = lambda parameters, id=id: streamContents(self.pages[id])
+        self.auth = FakeAuthMethod(responses)
+        self.reader = GoogleReader(self.auth)
+        self.reader.buildSubscriptionList()
+        for feed in self.reader.getSubscriptionList():
+            feed.loadItems()
+        del self.auth.gets[:]
+
+    def test_nothing_changed(self):
+        self.assertEqual({}, self.reader.refreshChanged())
+        self.assertEqual([ReaderUrl.UNREAD_COUNT_URL], [url for url, parameters in self.auth.gets])
+
+    def test_only_moved_streams_fetched(self):
+        a = self.reader.getFeed('feed/http://a/')
+        self.unread['feed/http://a/'] = 2
+        self.newest['feed/http://a/'] = 2000000000
+        self.pages['feed/http://a/'] = [item('a2', crawlTimeMsec=2000000), item('a1', crawlTimeMsec=1000000)]
+
+        changed = self.reader.refreshChanged()
+        self.assertEqual(['a2'], [i.id for i in changed[a]])
+        self.assertEqual([a], list(changed))
+        self.assertEqual(['a1', 'a2'], [i.id for i in a.getItems()])
+        self.assertEqual(2, a.unread)
+        self.assertEqual(3, self.reader.getCategory('user/%s/label/tech' % USER_ID).unread)
+        url, parameters = self.auth.gets[1]
+        self.assertEqual(feedUrl('feed/http://a/'), url)
+        self.assertEqual(1000, parameters['ot'])
+        self.assertEqual(2, len(self.auth.gets))
+
+        self.assertEqual({}, self.reader.refreshChanged())
+
+    def test_stream_without_watermark_is_fetched(self):
+        b = self.reader.getFeed('feed/http://b/')
+        del self.reader.watermarks['feed/http://b/']
+        self.newest['feed/http://b/'] = 3000000000
+        self.pages['feed/http://b/'] = [item('b3', 'feed/http://b/', crawlTimeMsec=3000000)]
+        changed = self.reader.refreshChanged()
+        self.assertEqual(['b3'], [i.id for i in changed[b]])
+        self.assertEqual(1000, self.auth.gets[1][1]['ot'])
+        self.assertEqual(3000000000, self.reader.watermarks['feed/http://b/'])
+
+    def test_read_stream_gets_a_watermark_when_built(self):
+        del self.unread['feed/http://b/']
+        before = time.time()
+        self.reader.buildSubscriptionList()
+        b = self.reader.getFeed('feed/http://b/')
+        self.assertTrue(self.reader.watermarks['feed/http://b/'] >= int(before) * 1000000)
+        self.unread['feed/http://b/'] = 1
+        self.newest['feed/http://b/'] = int((time.time() + 60) * 1000000)
+        self.pages['feed/http://b/'] = [item('b2', 'feed/http://b/')]
+        del self.auth.gets[:]
+        changed = self.reader.refreshChanged()
+        self.assertEqual(['b2'], [i.id for i in changed[b]])
+        self.assertTrue(self.auth.gets[1][1]['ot'] >= int(before))
+
+if __name__ == '__main__':
+    unittest.main()
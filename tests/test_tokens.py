@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the token stores and the auth methods using them, these do
+not hit the network.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import json
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+from libgreader import ClientAuthMethod, OAuth2Method, ReaderUrl
+from libgreader.tokens import MemoryTokenStore, FileTokenStore
+
+class FakeResponse(object):
+    def __init__(self, status=200, text='', headers=None):
+        self.status_code = status
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def close(self):
+        pass
+
+class FakePool(object):
+    """
+    Answers ClientLogin and the Reader token url, then pops responses.
+    """
+    def __init__(self, responses=(), refreshDelay=0):
+        self.responses = list(responses)
+        self.requests = []
+        self.refreshDelay = refreshDelay
+        self.refreshes = 0
+
+    def _next(self):
+        if self.responses:
+            return self.responses.pop(0)
+        return FakeResponse(text='OK')
+
+    def get(self, url, **kwargs):
+        self.requests.append(('GET', url.split('?')[0], kwargs.get('headers')))
+        if url.split('?')[0] == ReaderUrl.ACTION_TOKEN_URL:
+            return FakeResponse(text='action%d' % len(self.requests))
+        return self._next()
+
+    def post(self, url, **kwargs):
+        self.requests.append(('POST', url.split('?')[0], kwargs.get('data')))
+        if url == ClientAuthMethod.CLIENT_URL:
+            return FakeResponse(text='SID=x\nAuth=auth%d\n' % len(self.requests))
+        if url == OAuth2Method.ACCESS_TOKEN_URL:
+            time.sleep(self.refreshDelay)
+            self.refreshes += 1
+            return FakeResponse(text=json.dumps({'access_token': 'access%d' % self.refreshes,
+                                                 'expires_in': 3600}))
+        return self._next()
+
+    def close(self):
+        pass
+
+def updateInProcess(path, number):
+    FileTokenStore(path).update('key%d' % number, auth='token%d' % number)
+
+class TestTokenStores(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'tokens.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_update_merges_and_deletes(self):
+        for store in (MemoryTokenStore(), FileTokenStore(self.path)):
+            store.update('k', auth='a', action='b')
+            store.update('k', action=None, other='c')
+            self.assertEqual({'auth': 'a', 'other': 'c'}, store.get('k'))
+            store.delete('k')
+            self.assertEqual({}, store.get('k'))
+
+    def test_expired_tokens_left_out(self):
+        store = MemoryTokenStore()
+        store.update('k', auth='a', action='b', actionExpires=time.time() - 1)
+        self.assertEqual({'auth': 'a'}, store.get('k'))
+
+    def test_file_shared_and_private(self):
+        FileTokenStore(self.path).update('k', auth='a')
+        self.assertEqual('a', FileTokenStore(self.path).get('k')['auth'])
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+
+    def test_concurrent_processes_keep_every_update(self):
+        processes = [multiprocessing.Process(target=updateInProcess, args=(self.path, number))
+                     for number in range(8)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        store = FileTokenStore(self.path)
+        for number in range(8):
+            self.assertEqual('token%d' % number, store.get('key%d' % number)['auth'])
+
+class TestClientAuthTokens(unittest.TestCase):
+    def test_stored_tokens_skip_login(self):
+        store = MemoryTokenStore()
+        ClientAuthMethod('user', 'pass', pool=FakePool(), tokenStore=store)
+        pool = FakePool([FakeResponse(text='{}')])
+        auth = ClientAuthMethod('user', 'pass', pool=pool, tokenStore=store)
+        self.assertEqual('{}', auth.get(ReaderUrl.USER_INFO_URL))
+        self.assertEqual([('GET', ReaderUrl.USER_INFO_URL)], [r[:2] for r in pool.requests])
+
+    def test_action_token_fetched_once_and_saved(self):
+        store = MemoryTokenStore()
+        pool = FakePool([FakeResponse(text='OK'), FakeResponse(text='OK')])
+        auth = ClientAuthMethod('user', 'pass', pool=pool, tokenStore=store)
+        auth.post(ReaderUrl.EDIT_TAG_URL, {'a': 'tag'})
+        auth.post(ReaderUrl.EDIT_TAG_URL, {'a': 'tag'})
+        tokenRequests = [r for r in pool.requests if r[1] == ReaderUrl.API_URL + 'token']
+        self.assertEqual(1, len(tokenRequests))
+        self.assertEqual(auth.token, store.get(auth.tokenKey)['action'])
+
+    def test_refused_auth_logs_in_again_once(self):
+        store = MemoryTokenStore()
+        store.update('ClientLogin:user', auth='stale')
+        pool = FakePool([FakeResponse(401), FakeResponse(text='{}')])
+        auth = ClientAuthMethod('user', 'pass', pool=pool, tokenStore=store)
+        self.assertEqual('{}', auth.get(ReaderUrl.USER_INFO_URL))
+        self.assertNotEqual('stale', store.get('ClientLogin:user')['auth'])
+        self.assertEqual('GoogleLogin auth=%s' % auth.auth_token,
+                         pool.requests[-1][2]['Authorization'])
+
+    def test_bad_action_token_refreshed(self):
+        store = MemoryTokenStore()
+        store.update('ClientLogin:user', auth='a', action='old')
+        pool = FakePool([FakeResponse(401, headers={'X-Reader-Google-Bad-Token': 'true'}),
+                         FakeResponse(text='OK')])
+        auth = ClientAuthMethod('user', 'pass', pool=pool, tokenStore=store)
+        self.assertEqual('OK', auth.post(ReaderUrl.EDIT_TAG_URL, {'a': 'tag'}))
+        self.assertNotEqual('old', pool.requests[-1][2]['T'])
+        self.assertEqual('a', auth.auth_token)
+
+class TestOAuth2Tokens(unittest.TestCase):
+    def test_tokens_restored_and_dropped_when_refused(self):
+        store = MemoryTokenStore()
+        OAuth2Method('id', 'secret', pool=FakePool(), tokenStore=store,
+                     tokenKey='alice').authFromAccessToken('access')
+        pool = FakePool([FakeResponse(401)])
+        auth = OAuth2Method('id', 'secret', pool=pool, tokenStore=store, tokenKey='alice')
+        self.assertEqual('access', auth.access_token)
+        self.assertRaises(IOError, auth.get, ReaderUrl.USER_INFO_URL)
+        self.assertEqual({}, store.get('alice'))
+
+    def test_users_of_one_client_kept_apart(self):
+        store = MemoryTokenStore()
+        OAuth2Method('id', 'secret', pool=FakePool(), tokenStore=store,
+                     tokenKey='alice').authFromAccessToken('access')
+        auth = OAuth2Method('id', 'secret', pool=FakePool(), tokenStore=store, tokenKey='bob')
+        self.assertEqual(None, auth.access_token)
+
+    def test_token_key_required_with_store(self):
+        self.assertRaises(ValueError, OAuth2Method, 'id', 'secret',
+                          pool=FakePool(), tokenStore=MemoryTokenStore())
+
+class TestTokenRefresh(unittest.TestCase):
+    def makeAuth(self, pool, expiresIn=3600):
+        auth = OAuth2Method('id', 'secret', pool=pool)
+        auth.authFromAccessToken('access', 'refresh', expiresIn)
+        return auth
+
+    def test_refused_access_token_refreshed_and_retried_once(self):
+        pool = FakePool([FakeResponse(401), FakeResponse(text='{}')])
+        auth = self.makeAuth(pool)
+        self.assertEqual('{}', auth.get(ReaderUrl.USER_INFO_URL))
+        self.assertEqual(1, pool.refreshes)
+        self.assertEqual('access1', auth.access_token)
+
+        pool = FakePool([FakeResponse(401), FakeResponse(401)])
+        auth = self.makeAuth(pool)
+        self.assertRaises(IOError, auth.get, ReaderUrl.USER_INFO_URL)
+        self.assertEqual(1, pool.refreshes)
+
+    def test_expired_access_token_refreshed_before_use(self):
+        pool = FakePool()
+        auth = self.makeAuth(pool, expiresIn=-1)
+        auth.get(ReaderUrl.USER_INFO_URL)
+        self.assertEqual(1, pool.refreshes)
+        self.assertEqual('access1', auth.access_token)
+
+    def test_concurrent_callers_share_one_refresh(self):
+        pool = FakePool(refreshDelay=0.05)
+        auth = self.makeAuth(pool, expiresIn=-1)
+        threads = [threading.Thread(target=auth.get, args=(ReaderUrl.USER_INFO_URL,))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, pool.refreshes)
+
+    def test_bad_action_token_retried_once(self):
+        badToken = {'X-Reader-Google-Bad-Token': 'true'}
+        pool = FakePool([FakeResponse(401, headers=badToken), FakeResponse(401, headers=badToken)])
+        auth = self.makeAuth(pool)
+        self.assertRaises(IOError, auth.post, ReaderUrl.EDIT_TAG_URL, {'a': 'tag'})
+        edits = [r for r in pool.requests if r[1] == ReaderUrl.EDIT_TAG_URL]
+        self.assertEqual(2, len(edits))
+
+    def test_background_refresh_before_expiry(self):
+        pool = FakePool()
+        auth = self.makeAuth(pool, expiresIn=3)
+        refresher = auth.startAutoRefresh(margin=10, interval=1)
+        try:
+            deadline = time.time() + 5
+            while pool.refreshes == 0 and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            auth.close()
+        self.assertTrue(pool.refreshes >= 1)
+        self.assertTrue(refresher.lastError is None)
+
+if __name__ == '__main__':
+    unittest.main()
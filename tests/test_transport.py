@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the HTTP transport layer, these do not hit the network.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+import io
+
+import requests
+
+from libgreader import GoogleReader, AuthenticationMethod, ConnectionPool, AdaptiveLimiter
+
+class FakeResponse(object):
+    def __init__(self, status, headers=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeSession(object):
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.methods = []
+
+    def request(self, method, url, **kwargs):
+        self.methods.append(method)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+def fakePool(outcomes, **kwargs):
+    pool = ConnectionPool(backoff=0, **kwargs)
+    session = FakeSession(outcomes)
+    pool.session = lambda: session
+    return pool, session
+
+class TestConnectionPool(unittest.TestCase):
+    def test_session_is_reused(self):
+        pool = ConnectionPool()
+        self.assertTrue(pool.session() is pool.session())
+
+    def test_idle_session_is_reopened(self):
+        pool = ConnectionPool(idleTimeout=0)
+        first = pool.session()
+        pool._lastUsed -= 1
+        self.assertFalse(first is pool.session())
+
+    def test_close_then_reuse(self):
+        pool = ConnectionPool()
+        pool.session()
+        pool.close()
+        self.assertFalse(pool.isOpen())
+        pool.session()
+        self.assertTrue(pool.isOpen())
+
+    def test_reader_closes_owned_pool_only(self):
+        shared = ConnectionPool()
+        shared.session()
+        with GoogleReader(AuthenticationMethod(pool=shared)):
+            pass
+        self.assertTrue(shared.isOpen())
+
+        auth = AuthenticationMethod()
+        auth.pool.session()
+        with GoogleReader(auth):
+            pass
+        self.assertFalse(auth.pool.isOpen())
+
+class TestRetries(unittest.TestCase):
+    def test_get_retried_until_success(self):
+        pool, session = fakePool([503, requests.ConnectionError(), 200])
+        self.assertEqual(pool.get('http://x').status_code, 200)
+        self.assertEqual(len(session.methods), 3)
+
+    def test_get_gives_up_after_retries(self):
+        pool, session = fakePool([500] * 3, retries=2)
+        self.assertEqual(pool.get('http://x').status_code, 500)
+        self.assertEqual(len(session.methods), 3)
+
+        pool, session = fakePool([requests.Timeout()] * 2, retries=1)
+        self.assertRaises(requests.Timeout, pool.get, 'http://x')
+
+    def test_post_not_retried(self):
+        pool, session = fakePool([503, 200])
+        self.assertEqual(pool.post('http://x').status_code, 503)
+        self.assertEqual(session.methods, ['POST'])
+
+    def test_client_error_not_retried(self):
+        pool, session = fakePool([404, 200])
+        self.assertEqual(pool.get('http://x').status_code, 404)
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def test_limit_grows_on_success(self):
+        limiter = AdaptiveLimiter(rate=None, concurrency=2)
+        for i in range(20):
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertTrue(limiter.stats()['limit'] > 2)
+        self.assertEqual(limiter.stats()['inFlight'], 0)
+
+    def test_limit_shrinks_on_errors(self):
+        limiter = AdaptiveLimiter(rate=None, concurrency=16)
+        limiter.acquire()
+        limiter.release(0.1, throttled=True)
+        self.assertEqual(limiter.stats()['limit'], 8)
+        self.assertEqual(limiter.stats()['throttled'], 1)
+
+    def test_limit_stays_in_bounds(self):
+        limiter = AdaptiveLimiter(rate=None, concurrency=2, minConcurrency=1, maxConcurrency=3)
+        for i in range(5):
+            limiter._lastDecrease = 0
+            limiter.acquire()
+            limiter.release(0.1, error=True)
+        self.assertEqual(limiter.stats()['limit'], 1)
+        for i in range(100):
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertEqual(limiter.stats()['limit'], 3)
+
+    def test_token_bucket(self):
+        limiter = AdaptiveLimiter(rate=1000, burst=2, concurrency=10)
+        for i in range(3):
+            limiter.acquire()
+        self.assertTrue(limiter.stats()['tokens'] < 1)
+
+    def test_wait_at_limit_follows_latency(self):
+        limiter = AdaptiveLimiter(rate=None, concurrency=1, maxConcurrency=1)
+        limiter.acquire()
+        limiter.release(0.2)
+        limiter.acquire()
+        wait = limiter.tryAcquire()
+        self.assertTrue(0 < wait <= 0.2)
+        limiter.release(0.2)
+        self.assertEqual(None, limiter.tryAcquire())
+
+    def test_pool_reports_to_limiter(self):
+        limiter = AdaptiveLimiter(rate=None)
+        pool, session = fakePool([503, 200], limiter=limiter)
+        pool.get('http://x')
+        stats = limiter.stats()
+        self.assertEqual((stats['successes'], stats['throttled'], stats['retries']), (1, 1, 1))
+
+    def test_streamed_response_released_when_closed(self):
+        limiter = AdaptiveLimiter(rate=None)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b'body')
+        session = FakeSession([])
+        session.request = lambda method, url, **kwargs: response
+        pool = ConnectionPool(limiter=limiter)
+        pool.session = lambda: session
+        streamed = pool.get('http://x', stream=True)
+        self.assertEqual(1, limiter.stats()['inFlight'])
+        self.assertEqual(b'body', streamed.raw.read())
+        streamed.close()
+        streamed.close()
+        stats = limiter.stats()
+        self.assertEqual((0, 1), (stats['inFlight'], stats['successes']))
+
+if __name__ == '__main__':
+    unittest.main()
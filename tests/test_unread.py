@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+libG(oogle)Reader
+Copyright (C) 2010  Matt Behrens <askedrelic@gmail.com> http://asktherelic.com
+
+Python library for working with the unofficial Google Reader API.
+
+Unit tests for the unread counts of feeds, categories and special feeds.
+"""
+
+try:
+    import unittest2 as unittest
+except:
+    import unittest
+
+from libgreader import GoogleReader, ReaderUrl
+
+from .fakes import *
+
+def labelId(label):
+    return 'user/%s/label/%s' % (USER_ID, label)
+
+class TestUnreadCounter(unittest.TestCase):
+    def setUp(self):
+        self.auth = FakeAuthMethod({
+            ReaderUrl.UNREAD_COUNT_URL: unreadCounts({
+                'feed/http://a/': 3, 'feed/http://b/': 4, 'feed/http://c/': 5,
+                'user/%s/state/com.google/%s' % (USER_ID, ReaderUrl.READING_LIST): 12,
+            }),
+            ReaderUrl.SUBSCRIPTION_LIST_URL: subscriptionList([
+                ('feed/http://a/', 'A', ['tech', 'news']),
+                ('feed/http://b/', 'B', ['tech']),
+                ('feed/http://c/', 'C', []),
+            ]),
+        })
+        self.reader = GoogleReader(self.auth)
+        self.reader.makeSpecialFeeds()
+        self.reader.buildSubscriptionList()
+        self.a = self.reader.getFeed('feed/http://a/')
+        self.tech = self.reader.getCategory(labelId('tech'))
+        self.news = self.reader.getCategory(labelId('news'))
+        self.readingList = self.reader.getSpecialFeed(ReaderUrl.READING_LIST)
+        self.items = self.reader.itemsToObjects(self.a, [item('1'), item('2'), item('3', read=True)])
+
+    def counts(self):
+        return [self.a.unread, self.reader.getFeed('feed/http://b/').unread,
+                self.reader.getFeed('feed/http://c/').unread,
+                self.tech.unread, self.news.unread, self.readingList.unread]
+
+    def test_seeded(self):
+        self.assertEqual([3, 4, 5, 7, 3, 12], self.counts())
+
+    def test_read_and_unread_propagate(self):
+        self.items[0].markRead()
+        self.assertEqual([2, 4, 5, 6, 2, 11], self.counts())
+        self.items[0].markRead()
+        self.assertEqual([2, 4, 5, 6, 2, 11], self.counts())
+        self.items[2].markUnread()
+        self.items[0].markUnread()
+        self.assertEqual([4, 4, 5, 8, 4, 13], self.counts())
+
+    def test_item_loaded_twice_counts_once(self):
+        self.reader.itemsToObjects(self.tech, [item('1')])
+        self.reader.itemsToObjects(self.readingList, [item('1')])
+        self.tech.getItem('1').markRead()
+        self.assertEqual([2, 4, 5, 6, 2, 11], self.counts())
+
+    def test_feed_all_read(self):
+        self.a.markAllRead()
+        self.assertEqual([0, 4, 5, 4, 0, 9], self.counts())
+        self.assertEqual(0, self.a.countItems(excludeRead=True))
+
+    def test_category_all_read(self):
+        self.tech.markAllRead()
+        self.assertEqual([0, 0, 5, 0, 0, 5], self.counts())
+
+    def test_reading_list_all_read(self):
+        self.readingList.markAllRead()
+        self.assertEqual([0, 0, 0, 0, 0, 0], self.counts())
+
+    def test_count_items(self):
+        self.assertEqual(3, self.a.countItems())
+        self.assertEqual(2, self.a.countItems(excludeRead=True))
+        self.a.countUnread()
+        self.assertEqual(2, self.a.unread)
+
+if __name__ == '__main__':
+    unittest.main()